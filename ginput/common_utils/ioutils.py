@@ -1,12 +1,18 @@
 from __future__ import print_function, division
 
+from collections import OrderedDict
 import cftime
 import datetime as dt
+from enum import Enum
 from hashlib import sha1
+import json
 import netCDF4 as ncdf
 import numpy as np
+import os
+import shutil
 from subprocess import CalledProcessError
 import sys
+import tempfile
 
 from . import mod_utils
 
@@ -169,7 +175,32 @@ def make_nctimedim_helper(nc_handle, dim_name, dim_var, base_date=dt.datetime(19
     return dim
 
 
-def make_ncvar_helper(nc_handle, var_name, var_data, dims, **attrs):
+def make_ncstrdim_helper(nc_handle, dim_name, dim_values, **attrs):
+    """
+    Create a netCDF dimension with a variable-length string coordinate variable
+
+    :param nc_handle: the handle to a netCDF file open for writing, returned by :class:`netCDF4.Dataset`
+    :type nc_handle: :class:`netCDF4.Dataset`
+
+    :param dim_name: the name to give both the dimension and its associated variable
+    :type dim_name: str
+
+    :param dim_values: the strings to use as the dimension's coordinates.
+    :type dim_values: list(str)
+
+    :param attrs: keyword-value pairs defining attribute to attach to the dimension variable.
+
+    :return: the dimension object
+    :rtype: :class:`netCDF4.Dimension`
+    """
+    dim = nc_handle.createDimension(dim_name, len(dim_values))
+    var = nc_handle.createVariable(dim_name, str, dimensions=(dim_name,))
+    var[:] = np.array(dim_values, dtype=object)
+    var.setncatts(attrs)
+    return dim
+
+
+def make_ncvar_helper(nc_handle, var_name, var_data, dims, create_kws=None, **attrs):
     """
     Create a netCDF variable and store the data for it simultaneously.
 
@@ -189,13 +220,22 @@ def make_ncvar_helper(nc_handle, var_name, var_data, dims, **attrs):
      dimension instances.
     :type dims: list(:class:`netCDF4.Dimensions` or str)
 
+    :param create_kws: optional, additional keyword arguments (e.g. ``zlib``, ``chunksizes``) to pass to
+     :meth:`netCDF4.Dataset.createVariable`.
+    :type create_kws: dict
+
     :param attrs: keyword-value pairs defining attribute to attach to the dimension variable.
 
     :return: the variable object
     :rtype: :class:`netCDF4.Variable`
     """
     dim_names = tuple([d if isinstance(d, str) else d.name for d in dims])
-    var = nc_handle.createVariable(var_name, var_data.dtype, dimensions=dim_names)
+    if create_kws is None:
+        create_kws = dict()
+    dtype = str if var_data.dtype.kind in 'UO' else var_data.dtype
+    if dtype is str:
+        var_data = var_data.astype(object)
+    var = nc_handle.createVariable(var_name, dtype, dimensions=dim_names, **create_kws)
     var[:] = var_data
     var.setncatts(attrs)
     return var
@@ -281,6 +321,258 @@ def make_dependent_file_hash(dependent_file):
     return hashobj.hexdigest()
 
 
+def make_dependent_file_signature(dependent_file):
+    """
+    Create a cheap signature of a file from its size and modification time.
+
+    This is meant to be stored alongside the hash from :func:`make_dependent_file_hash`: if the signature of the file
+    still matches, the file can be assumed unchanged without reading it; if not, the hash must be compared.
+
+    :param dependent_file: the path to the file.
+    :type dependent_file: str
+
+    :return: the signature, as "<size in bytes> <modification time in ns>"
+    :rtype: str
+    """
+    file_stat = os.stat(dependent_file)
+    return '{} {}'.format(file_stat.st_size, file_stat.st_mtime_ns)
+
+
+# Keyed by (absolute path, size/mtime signature) so that a file is only hashed again if it may have changed
+_dependent_file_hash_cache = dict()
+
+
+def make_output_fingerprint(dependent_files, **settings):
+    """
+    Create a fingerprint of everything an output file is generated from.
+
+    The fingerprint combines the SHA1 hashes of the contents of the dependent files (not their paths) and the settings.
+    Each file is hashed at most once per process unless its size or modification time changes.
+
+    :param dependent_files: the paths of the input files the output depends on, including code files if changes to
+     them should cause the output to be regenerated. The order matters.
+    :type dependent_files: sequence(str)
+
+    :param settings: any other options that affect the output. Values must be JSON-serializable or have a ``str``
+     representation that changes whenever they do.
+
+    :return: the fingerprint as a hex string, or ``None`` if any of the dependent files does not exist (in which case
+     the output cannot be checked and should always be regenerated).
+    :rtype: str or None
+    """
+    hashobj = sha1()
+    for dependent_file in dependent_files:
+        try:
+            cache_key = (os.path.abspath(dependent_file), make_dependent_file_signature(dependent_file))
+        except OSError:
+            return None
+        if cache_key not in _dependent_file_hash_cache:
+            _dependent_file_hash_cache[cache_key] = make_dependent_file_hash(dependent_file)
+        hashobj.update(_dependent_file_hash_cache[cache_key].encode())
+
+    hashobj.update(json.dumps(settings, sort_keys=True, default=str).encode())
+    return hashobj.hexdigest()
+
+
+class OutputFingerprints(object):
+    """
+    Record the fingerprints of the inputs that output files were generated from, to allow make-like incremental runs.
+
+    The fingerprints (see :func:`make_output_fingerprint`) are stored in a hidden JSON manifest in each output
+    directory, keyed by the output file's base name. Outputs whose file exists and whose recorded fingerprint matches
+    the current one are up to date and can be skipped. Use as a context manager so that the fingerprints recorded are
+    saved even if generating some outputs fails::
+
+        with OutputFingerprints() as fingerprints:
+            for out_file, fp in ...:
+                if fingerprints.is_current(out_file, fp):
+                    continue
+                ...write out_file...
+                fingerprints.record(out_file, fp)
+
+    :param force: if ``True``, :meth:`is_current` always returns ``False`` so that everything is regenerated, but the
+     new fingerprints are still recorded.
+    :type force: bool
+
+    :param exists_fxn: the function to check if an output file exists. The default, :func:`os.path.exists`, can be
+     replaced for example with :func:`mod_utils.profile_file_exists` for outputs that may be in consolidated files.
+    :type exists_fxn: callable
+    """
+    manifest_name = '.ginput_fingerprints.json'
+
+    def __init__(self, force=False, exists_fxn=os.path.exists):
+        self.force = force
+        self._exists_fxn = exists_fxn
+        self._manifests = dict()
+        self._recorded = dict()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.save()
+
+    @classmethod
+    def _read_manifest(cls, output_dir):
+        try:
+            with open(os.path.join(output_dir, cls.manifest_name)) as fobj:
+                return json.load(fobj)
+        except (OSError, ValueError):
+            return dict()
+
+    def _manifest_for(self, output_file):
+        output_dir = os.path.dirname(os.path.abspath(output_file))
+        if output_dir not in self._manifests:
+            self._manifests[output_dir] = self._read_manifest(output_dir)
+        return output_dir, self._manifests[output_dir]
+
+    def is_current(self, output_file, fingerprint):
+        """
+        Check whether an output file exists and was generated from inputs with the given fingerprint.
+
+        :param output_file: the path to the output file.
+        :type output_file: str
+
+        :param fingerprint: the fingerprint of the output's current inputs. ``None`` is never current.
+        :type fingerprint: str or None
+
+        :rtype: bool
+        """
+        if self.force or fingerprint is None:
+            return False
+        _, manifest = self._manifest_for(output_file)
+        return manifest.get(os.path.basename(output_file)) == fingerprint and self._exists_fxn(output_file)
+
+    def record(self, output_file, fingerprint):
+        """
+        Record the fingerprint of the inputs an output file was just generated from.
+
+        :param output_file: the path to the output file.
+        :type output_file: str
+
+        :param fingerprint: the fingerprint of its inputs. If ``None``, any previous fingerprint is forgotten.
+        :type fingerprint: str or None
+        """
+        output_dir, manifest = self._manifest_for(output_file)
+        manifest[os.path.basename(output_file)] = fingerprint
+        self._recorded.setdefault(output_dir, dict())[os.path.basename(output_file)] = fingerprint
+
+    def save(self):
+        """
+        Write the manifests of all output directories with newly recorded fingerprints.
+
+        The manifest on disk is reread and only the fingerprints recorded by this instance are changed, so that
+        other runs writing to the same directory in the meantime are not undone. Each manifest is written to a
+        temporary file and renamed into place, so an interrupted run never leaves a partial manifest.
+        """
+        for output_dir, recorded in sorted(self._recorded.items()):
+            manifest = self._read_manifest(output_dir)
+            manifest.update(recorded)
+            manifest = {k: v for k, v in manifest.items() if v is not None}
+            fd, tmp_file = tempfile.mkstemp(prefix=self.manifest_name + '.', dir=output_dir)
+            with os.fdopen(fd, 'w') as fobj:
+                json.dump(manifest, fobj, indent=0, sort_keys=True)
+            os.chmod(tmp_file, 0o644)
+            os.replace(tmp_file, os.path.join(output_dir, self.manifest_name))
+            self._manifests[output_dir] = manifest
+        self._recorded.clear()
+
+
+def write_memmap_arrays(mmap_dir, arrays, source_file=None, **metadata):
+    """
+    Save arrays in an uncompressed layout that :func:`read_memmap_arrays` can memory-map.
+
+    Each array is stored as a .npy file in ``mmap_dir``, alongside a JSON file with any extra metadata. The directory is
+    written under a temporary name and renamed into place. An existing copy is first renamed aside and then deleted, so
+    a process reading ``mmap_dir`` while it is replaced may find it missing or incomplete (which
+    :func:`read_memmap_arrays` reports as no copy) but will not load a mix of old and new arrays. Arrays that were
+    already memory-mapped from the old copy remain usable. If several processes replace the same directory at once,
+    the first one to rename its copy into place wins and the others discard theirs.
+
+    :param mmap_dir: the directory to write. It is replaced if it exists.
+    :type mmap_dir: str
+
+    :param arrays: the arrays to save, keyed by name. These may not be object arrays.
+    :type arrays: dict(str: :class:`numpy.ndarray`)
+
+    :param source_file: if the arrays are a copy of data in another file, the path to that file. Its size and
+     modification time are recorded so that :func:`read_memmap_arrays` can tell if the copy is stale.
+    :type source_file: str
+
+    :param metadata: additional JSON-serializable values to store.
+
+    :return: None
+    """
+    mmap_dir = os.path.abspath(mmap_dir)
+    tmp_dir = tempfile.mkdtemp(prefix=os.path.basename(mmap_dir) + '.', dir=os.path.dirname(mmap_dir))
+    try:
+        for name, values in arrays.items():
+            np.save(os.path.join(tmp_dir, name + '.npy'), np.ascontiguousarray(values), allow_pickle=False)
+
+        metadata = dict(metadata, array_names=list(arrays.keys()), source_signature=None if source_file is None
+                        else make_dependent_file_signature(source_file))
+        with open(os.path.join(tmp_dir, 'metadata.json'), 'w') as fobj:
+            json.dump(metadata, fobj)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    # os.rename can only replace an empty directory, so move the old copy out of the way first. Deleting it in place
+    # would let another process recreate it part way through, and the rename would then fail with ENOTEMPTY.
+    old_dir = None
+    if os.path.exists(mmap_dir):
+        old_dir = tempfile.mkdtemp(prefix=os.path.basename(mmap_dir) + '.old.', dir=os.path.dirname(mmap_dir))
+        try:
+            os.rename(mmap_dir, os.path.join(old_dir, 'old'))
+        except FileNotFoundError:
+            # Another process moved it first
+            pass
+
+    try:
+        os.rename(tmp_dir, mmap_dir)
+    except OSError:
+        # Another process put its copy in place between moving the old copy aside and renaming ours. Theirs is just as
+        # new, so keep it.
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        if not os.path.isdir(mmap_dir):
+            raise
+    finally:
+        if old_dir is not None:
+            shutil.rmtree(old_dir, ignore_errors=True)
+
+
+def read_memmap_arrays(mmap_dir, source_file=None):
+    """
+    Open arrays saved by :func:`write_memmap_arrays` as read-only memory maps.
+
+    Memory-mapped arrays are backed by the operating system's page cache, so many processes opening the same arrays
+    share one copy in memory.
+
+    :param mmap_dir: the directory written by :func:`write_memmap_arrays`.
+    :type mmap_dir: str
+
+    :param source_file: the file the arrays were copied from. If given, and its size or modification time differ from
+     when the copy was written, the copy is considered stale.
+    :type source_file: str
+
+    :return: the arrays, keyed by name, and the dictionary of extra metadata. If ``mmap_dir`` does not exist, is
+     incomplete or is stale, ``None`` is returned for both.
+    :rtype: dict(str: :class:`numpy.memmap`), dict
+    """
+    try:
+        with open(os.path.join(mmap_dir, 'metadata.json')) as fobj:
+            metadata = json.load(fobj)
+        if source_file is not None and metadata['source_signature'] != make_dependent_file_signature(source_file):
+            return None, None
+        arrays = OrderedDict([(name, np.load(os.path.join(mmap_dir, name + '.npy'), mmap_mode='r'))
+                              for name in metadata.pop('array_names')])
+    except (OSError, ValueError, KeyError):
+        return None, None
+
+    metadata.pop('source_signature')
+    return arrays, metadata
+
+
 def add_dependent_file_hash(nc_handle, hash_att_name, dependent_file):
     """
     Add an SHA1 hash of another file as an attribute to a netCDF file.
@@ -302,3 +594,120 @@ def add_dependent_file_hash(nc_handle, hash_att_name, dependent_file):
     """
     hash_hex = make_dependent_file_hash(dependent_file)
     nc_handle.setncattr(hash_att_name, hash_hex)
+
+
+def write_consolidated_profile(nc_file, profile_name, file_data):
+    """
+    Add one profile to a consolidated netCDF file that stands in for many .mod or .vmr text files.
+
+    A consolidated file stores the profiles from many text files along an unlimited "time" dimension. Each profile is
+    stored as it would be read from its text file: every category (e.g. "constants", "scalar", "profile") of
+    ``file_data`` becomes a netCDF group, scalar values become variables along "time" and profile arrays variables
+    along "time" and "level". The original text file name is stored so that the profile can be looked up by it. If the
+    file does not exist, it is created; if it already contains a profile with the same name, that profile is replaced.
+
+    :param nc_file: the path to the consolidated netCDF file.
+    :type nc_file: str
+
+    :param profile_name: the base name of the text file this profile would otherwise have been written to.
+    :type profile_name: str
+
+    :param file_data: the profile data, in the form returned by :func:`readers.read_mod_file` or
+     :func:`readers.read_vmr_file` (as dictionaries, not dataframes). Any "file" category is not stored since it is
+     derived from the file name.
+    :type file_data: dict
+
+    :return: none, writes to ``nc_file``.
+    """
+    mode = 'a' if os.path.exists(nc_file) else 'w'
+    with ncdf.Dataset(nc_file, mode) as ds:
+        if mode == 'w':
+            ds.createDimension('time', None)
+            ds.createDimension('level', None)
+            ds.createVariable('file_name', str, ('time',))
+            ds.createVariable('nlevels', np.int32, ('time',))
+            ds.comment = 'Consolidated ginput output: each index along the time dimension holds the contents of one ' \
+                         'text file, named by the file_name variable.'
+            ds.history = make_creation_info(nc_file, 'ginput.common_utils.ioutils.write_consolidated_profile')
+
+        names = list(ds['file_name'][:]) if ds.dimensions['time'].size > 0 else []
+        itime = names.index(profile_name) if profile_name in names else len(names)
+        ds['file_name'][itime] = profile_name
+
+        for category, category_data in file_data.items():
+            if category == 'file' or category_data is None:
+                continue
+            grp = ds.groups[category] if category in ds.groups else ds.createGroup(category)
+            for varname, value in category_data.items():
+                value = value.value if isinstance(value, Enum) else value
+                if np.ndim(value) == 0:
+                    _set_consolidated_value(grp, varname, ('time',), value, itime)
+                else:
+                    ds['nlevels'][itime] = np.size(value)
+                    _set_consolidated_value(grp, varname, ('time', 'level'), np.asarray(value), itime)
+
+
+def _set_consolidated_value(grp, varname, dims, value, itime):
+    if varname not in grp.variables:
+        if isinstance(value, str):
+            grp.createVariable(varname, str, dims)
+        else:
+            grp.createVariable(varname, np.asarray(value).dtype, dims, zlib=len(dims) > 1)
+
+    var = grp[varname]
+    if len(dims) == 1:
+        var[itime] = value
+    else:
+        var[itime, :value.size] = value
+
+
+def read_consolidated_profile(nc_file, profile_name):
+    """
+    Read one profile from a consolidated netCDF file written by :func:`write_consolidated_profile`.
+
+    :param nc_file: the path to the consolidated netCDF file.
+    :type nc_file: str
+
+    :param profile_name: the base name of the text file that the profile stands in for.
+    :type profile_name: str
+
+    :return: a dictionary with one key per category stored. Each value is a dictionary (ordered for the profile
+     variables) mapping variable names to Python scalars or 1D numpy arrays.
+    :rtype: dict
+    :raises KeyError: if the profile is not in the file.
+    """
+    with ncdf.Dataset(nc_file) as ds:
+        names = list(ds['file_name'][:]) if ds.dimensions['time'].size > 0 else []
+        if profile_name not in names:
+            raise KeyError('{} is not in the consolidated file {}'.format(profile_name, nc_file))
+        itime = names.index(profile_name)
+        nlev = int(ds['nlevels'][itime])
+
+        file_data = dict()
+        for category, grp in ds.groups.items():
+            category_data = OrderedDict()
+            for varname, var in grp.variables.items():
+                if var.dimensions == ('time',):
+                    value = var[itime]
+                    category_data[varname] = value if var.dtype == str else value.item()
+                else:
+                    category_data[varname] = np.ma.filled(var[itime, :nlev])
+            file_data[category] = category_data
+
+    return file_data
+
+
+def list_consolidated_profiles(nc_file):
+    """
+    List the text file names of the profiles stored in a consolidated netCDF file.
+
+    :param nc_file: the path to the consolidated netCDF file.
+    :type nc_file: str
+
+    :return: the base names of the text files that the stored profiles stand in for.
+    :rtype: list(str)
+    """
+    with ncdf.Dataset(nc_file) as ds:
+        if ds.dimensions['time'].size == 0:
+            return []
+        return list(ds['file_name'][:])
@@ -43,6 +43,10 @@ merra_pres_levels = _std_model_pres_levels
 geosfp_pres_levels = _std_model_pres_levels
 earth_radius = 6371  # kilometers
 
+# The floating point types used for the array-heavy parts of mod_maker. GEOS data are stored as single precision, so
+# "single" avoids promoting the global fields to double precision.
+_precision_dtypes = {'double': np.float64, 'single': np.float32}
+
 
 class TropopauseError(Exception):
     """
@@ -182,6 +186,20 @@ def get_num_header_lines(filename):
     with open(filename, 'r') as fobj:
         header_info = fobj.readline()
 
+    return parse_num_header_lines(header_info)
+
+
+def parse_num_header_lines(header_info):
+    """
+    Get the number of header lines from the first line of a standard GGG file
+
+    :param header_info: the first line of the file, with the number of header rows and the number of data columns
+     separated by whitespace or a comma.
+    :type header_info: str
+
+    :return: the number of header lines
+    :rtype: int
+    """
     if ',' in header_info:
         header = header_info.split(',')
     else:
@@ -289,6 +307,35 @@ def map_file_name_from_mod_vmr_files(site_abbrev, mod_file, vmr_file, map_fmt):
     )
 
 
+def consolidated_map_file_name(site_abbrev, mod_file, period_start, period):
+    """
+    Construct the name for a consolidated netCDF .map file holding a site's profiles for one day or month.
+
+    :param site_abbrev: the site abbreviation to go in the file name.
+    :type site_abbrev: str
+
+    :param mod_file: the path to one of the .mod files going into the .map file; the lat/lon strings are taken from it.
+    :type mod_file: str
+
+    :param period_start: the first day of the period covered by the file.
+    :type period_start: datetime-like
+
+    :param period: "day" or "month", the period covered by the file.
+    :type period: str
+
+    :return: the file name (without a directory).
+    :rtype: str
+    """
+    date_fmts = {'day': '%Y%m%d', 'month': '%Y%m'}
+    if period not in date_fmts:
+        raise ValueError('period must be one of: {}'.format(', '.join(date_fmts)))
+
+    return '{site}_{lat}_{lon}_{date}.map.nc'.format(
+        site=site_abbrev, lat=find_lat_substring(os.path.basename(mod_file)),
+        lon=find_lon_substring(os.path.basename(mod_file)), date=period_start.strftime(date_fmts[period])
+    )
+
+
 def format_lon(lon, prec=2, zero_pad=False):
     """
     Convert longitude between string and numeric representations.
@@ -470,8 +517,40 @@ def _vcs_dir_helper(vcs_dir):
     return os.path.abspath(vcs_dir)
 
 
-def _is_git_repo(vcs_dir=None):
+# The code version cannot meaningfully change while one ginput process writes its output, so the VCS information is
+# looked up at most once per process and directory rather than spawning git/hg subprocesses for every output file.
+# Failures are cached as well so that a missing git/hg is not retried for every file.
+_vcs_info_cache = dict()
+
+
+def _cached_vcs_call(key, vcs_dir, fxn):
     vcs_dir = _vcs_dir_helper(vcs_dir)
+    cache_key = (key, vcs_dir)
+    if cache_key not in _vcs_info_cache:
+        try:
+            _vcs_info_cache[cache_key] = (True, fxn(vcs_dir))
+        except (subprocess.CalledProcessError, FileNotFoundError) as err:
+            _vcs_info_cache[cache_key] = (False, err)
+
+    ok, result = _vcs_info_cache[cache_key]
+    if ok:
+        return result
+    raise result
+
+
+def clear_vcs_cache():
+    """
+    Forget the cached VCS information so that the next call to :func:`vcs_commit_info` or :func:`vcs_is_commit_clean`
+    queries git/hg again.
+    """
+    _vcs_info_cache.clear()
+
+
+def _is_git_repo(vcs_dir=None):
+    return _cached_vcs_call('is_git', vcs_dir, _is_git_repo_uncached)
+
+
+def _is_git_repo_uncached(vcs_dir):
     try:
         subprocess.check_call(['git', 'status'], cwd=vcs_dir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
     except subprocess.CalledProcessError:
@@ -484,7 +563,8 @@ def vcs_commit_info(vcs_dir=None):
     Return the last commit hash on the current branch, current branch, and last commit date for a VCS repo.
 
     This function will use Git if ``vcs_dir`` points to a valid Git repo and only fall back
-    on Mercurial if ``vcs_dir`` is not a Git repo.
+    on Mercurial if ``vcs_dir`` is not a Git repo. The result is cached for the life of the process;
+    use :func:`clear_vcs_cache` to force it to be looked up again.
 
     :param vcs_dir: optional, the VCS directory to check. If not given, defaults to the one containing this repo.
     :type vcs_dir: str
@@ -494,9 +574,9 @@ def vcs_commit_info(vcs_dir=None):
     :rtype: str, str, str
     """
     if _is_git_repo(vcs_dir):
-        return _git_commit_info(vcs_dir)
+        return _cached_vcs_call('commit_info', vcs_dir, _git_commit_info)
     else:
-        return _hg_commit_info(vcs_dir)
+        return _cached_vcs_call('commit_info', vcs_dir, _hg_commit_info)
 
 
 def _git_commit_info(git_dir=None):
@@ -541,7 +621,8 @@ def vcs_is_commit_clean(vcs_dir=None, ignore_untracked=True, ignore_files=tuple(
     By default, a directory is considered clean if all tracked files have no uncommitted changes. Untracked files are
     not considered. Setting ``ignore_untracked`` to ``False`` means that there must be no untracked files for the
     directory to be clean. This function will use Git if ``vcs_dir`` points to a valid Git repo and only fall back
-    on Mercurial if ``vcs_dir`` is not a Git repo.
+    on Mercurial if ``vcs_dir`` is not a Git repo. The status of the repo is cached for the life of the process, as in
+    :func:`vcs_commit_info`.
 
     :param vcs_dir: optional, the VCS directory to check. If not given, defaults to the one containing this repo.
     :type vcs_dir: str
@@ -577,9 +658,16 @@ def _in_vcs_ignore(f: str, root: str, ignore_files):
             return True
     return False
 
-def _git_is_commit_clean(git_dir=None, ignore_untracked=True, ignore_files=tuple()):
+def _git_status(git_dir):
+    # As before the VCS lookups were cached, the status is taken from the current working directory rather than
+    # ``git_dir``, so the cache key in _git_is_commit_clean includes the working directory.
     git_root = subprocess.check_output(['git', 'rev-parse', '--show-toplevel']).decode('utf8').strip()
     summary = subprocess.check_output(['git', 'status', '--porcelain']).decode('utf8').strip().splitlines()
+    return git_root, summary
+
+
+def _git_is_commit_clean(git_dir=None, ignore_untracked=True, ignore_files=tuple()):
+    git_root, summary = _cached_vcs_call(('status', os.getcwd()), git_dir, _git_status)
     for line in summary:
         stat, filename = line.split(maxsplit=2)
         if stat == '??' and ignore_untracked:
@@ -613,10 +701,7 @@ def _hg_is_commit_clean(hg_dir=None, ignore_untracked=True, ignore_files=tuple()
     :return: ``True`` if the directory is clean, ``False`` otherwise.
     :rtype: bool
     """
-    hg_dir = _vcs_dir_helper(hg_dir)
-    hg_root = subprocess.check_output(['hg', 'root'], cwd=hg_dir).strip()
-    summary = subprocess.check_output(['hg', 'status'], cwd=hg_dir).splitlines()
-
+    hg_root, summary = _cached_vcs_call('status', hg_dir, _hg_status)
 
     # Since subprocess returns a bytes object (at least on Linux) rather than an encoded string object, all the strings
     # below must be bytes, not unicode strings
@@ -632,6 +717,12 @@ def _hg_is_commit_clean(hg_dir=None, ignore_untracked=True, ignore_files=tuple()
     return True
 
 
+def _hg_status(hg_dir):
+    hg_root = subprocess.check_output(['hg', 'root'], cwd=hg_dir).strip()
+    summary = subprocess.check_output(['hg', 'status'], cwd=hg_dir).splitlines()
+    return hg_root, summary
+
+
 def _lrange(*args):
     # Ensure Python 3 compatibility for adding range() calls together
     r = range(*args)
@@ -733,11 +824,77 @@ def iter_mod_files(mod_top_dir, include_slant=False):
         raise NotImplementedError('include_slant not yet implemented')
 
     for vdir in iter_mod_dirs(mod_top_dir, 'vertical'):
-        vertical_files = sorted(glob(os.path.join(vdir, '*.mod')))
-        for f in vertical_files:
+        for f in iter_profile_files(vdir, '.mod'):
             yield f
 
 
+def consolidated_file_name(profile_file):
+    """
+    Get the path of the consolidated netCDF file that would hold a given .mod or .vmr file.
+
+    Consolidated files hold all the profiles for one month from the same directory (i.e. one site), and are named like
+    the text files with the date replaced by the year and month and ".nc" appended, e.g. the consolidated file for
+    "FPIT_2018010103Z_37N_097W.mod" is "FPIT_201801_37N_097W.mod.nc" in the same directory.
+
+    :param profile_file: the path to the .mod or .vmr file.
+    :type profile_file: str
+
+    :return: the path to the consolidated file
+    :rtype: str
+    """
+    directory, base_name = os.path.split(profile_file)
+    date_str = find_datetime_substring(base_name)
+    month_str = date_str[:6]
+    if date_str + 'Z' in base_name:
+        date_str += 'Z'
+    return os.path.join(directory, base_name.replace(date_str, month_str, 1) + '.nc')
+
+
+def profile_file_exists(profile_file):
+    """
+    Check whether a .mod or .vmr file exists, either as a text file or within its consolidated netCDF file.
+
+    :param profile_file: the path to the .mod or .vmr text file.
+    :type profile_file: str
+
+    :return: ``True`` if the profile is available.
+    :rtype: bool
+    """
+    # Imported here because ioutils imports this module
+    from . import ioutils
+
+    if os.path.isfile(profile_file):
+        return True
+    cons_file = consolidated_file_name(profile_file)
+    return os.path.isfile(cons_file) and \
+        os.path.basename(profile_file) in ioutils.list_consolidated_profiles(cons_file)
+
+
+def iter_profile_files(directory, extension):
+    """
+    List the .mod or .vmr files in a directory, including those stored in consolidated netCDF files.
+
+    Profiles stored in consolidated files are listed by the path their text file would have; :func:`readers.read_mod_file`
+    and :func:`readers.read_vmr_file` accept these paths and read the profile from the consolidated file.
+
+    :param directory: the directory to search.
+    :type directory: str
+
+    :param extension: the extension of the text files, e.g. ".mod" or ".vmr".
+    :type extension: str
+
+    :return: the sorted paths of the available profiles.
+    :rtype: list(str)
+    """
+    # Imported here because ioutils imports this module
+    from . import ioutils
+
+    files = set(glob(os.path.join(directory, '*' + extension)))
+    for cons_file in glob(os.path.join(directory, '*' + extension + '.nc')):
+        files.update(os.path.join(directory, name) for name in ioutils.list_consolidated_profiles(cons_file))
+    return sorted(files)
+
+
 def calculate_model_potential_temperature(temp, pres_levels=_std_model_pres_levels):
     """
     Calculate potental temperature for model output on fixed pressure levels.
@@ -761,6 +918,23 @@ def calculate_model_potential_temperature(temp, pres_levels=_std_model_pres_leve
     return calculate_potential_temperature(pres, temp)
 
 
+def precision_to_dtype(precision):
+    """
+    Get the numpy floating point type to use for a given computation precision.
+
+    :param precision: "double" or "single"
+    :type precision: str
+
+    :return: the numpy floating point type
+    :raises ValueError: if ``precision`` is not one of the allowed values.
+    """
+    try:
+        return _precision_dtypes[precision]
+    except KeyError:
+        raise ValueError('precision "{}" is not recognized. Allowed values are: {}'
+                         .format(precision, ', '.join(_precision_dtypes.keys())))
+
+
 def calculate_potential_temperature(pres, temp):
     """
     Calculate potential temperature.
@@ -772,12 +946,15 @@ def calculate_potential_temperature(pres, temp):
     return temp * (1000/pres) ** 0.286
 
 
-def convert_geos_eta_coord(delp):
+def convert_geos_eta_coord(delp, dtype=None):
     """
     Calculate the pressure grid for a GEOS native file.
 
     :param pres: DELP (pressure thickness) array in Pa. May be any number of
      dimensions, as long as exactly one has a length of 72.
+    :param dtype: if given, the floating point type to do the calculation in. The
+     default lets numpy promote the data as needed, which gives double precision
+     output.
     :return: the pressure level midpoints, in hPa. Note the unit change, this
      is because the GEOS DELP variable is usually in Pa, but hPa is the standard
      unit for pressure levels in the Np files.
@@ -794,7 +971,11 @@ def convert_geos_eta_coord(delp):
     level_shape = dp_shape.copy()
     level_shape[i_ax] = 1
     top_p = 0.01
-    top_p_slice = np.full(level_shape, top_p)
+    if dtype is None:
+        top_p_slice = np.full(level_shape, top_p)
+    else:
+        delp = delp.astype(dtype)
+        top_p_slice = np.full(level_shape, top_p, dtype=dtype)
 
     delp = delp * 0.01  # assume input is in Pa, want hPa
     p_edge = top_p + np.cumsum(delp, axis=i_ax)
@@ -901,7 +1082,7 @@ def calculate_eq_lat_on_grid(EPV, PT, area):
     return EL
 
 
-def calculate_eq_lat(EPV, PT, area):
+def calculate_eq_lat(EPV, PT, area, dtype=np.float64):
     """
     Construct an interpolator for equivalent latitude.
 
@@ -914,6 +1095,9 @@ def calculate_eq_lat(EPV, PT, area):
     :param area: the 2D grid of surface area (in steradians) that corresponds to the 2D slices of the 4D grid.
     :type area: :class:`numpy.ndarray`
 
+    :param dtype: the floating point type to hold PV interpolated onto the fixed potential temperature grid.
+    :type dtype: type
+
     :return: a 2D interpolator for equivalent latitude, requires potential vorticity and potential temperature as inputs
     :rtype: :class:`scipy.interpolate.interp2d`
 
@@ -944,7 +1128,7 @@ def calculate_eq_lat(EPV, PT, area):
     new_nlev = np.size(theta_grid)
 
     # Get PV on the fixed PT levels ~ 2 seconds per date
-    new_EPV = np.zeros([new_nlev, nlat, nlon])
+    new_EPV = np.zeros([new_nlev, nlat, nlon], dtype=dtype)
     for i in range(nlat):
         for j in range(nlon):
             new_EPV[:, i, j] = np.interp(theta_grid, PT[:, i, j], EPV[:, i, j])
@@ -1254,6 +1438,10 @@ def read_geos_files(start_date, end_date, geos_path, profile_variables, surface_
     :return: dictionaries of profile and surface variables, and a Pandas DateTimeIndex of the file dates. The variable
      dictionaries' values' format depends on the value of ``concatenate_arrays``.
     :rtype: dict, dict, DatetimeIndex
+
+    When ``concatenate_arrays`` and ``set_mask_to_nan`` are both ``True``, the files are read by
+    :func:`read_geos_files_parallel` (serially), which writes each file's data into preallocated arrays instead of
+    concatenating them at the end. That function can also read a spatial subset with multiple threads.
     """
     def read_var_helper(nchandle, varname, keep_time=keep_time_dim):
         if keep_time:
@@ -1312,6 +1500,10 @@ def read_geos_files(start_date, end_date, geos_path, profile_variables, surface_
     if concatenate_arrays and not keep_time_dim:
         raise ValueError('concatenate_arrays = True requires keep_time_dim = True')
 
+    if concatenate_arrays and set_mask_to_nan:
+        return read_geos_files_parallel(start_date, end_date, geos_path, profile_variables, surface_variables,
+                                        product=product, nthreads=1)
+
     # If we're converting the default masked arrays to regular arrays, we have to use np.concatenate because
     # ma.concatenate always returns a masked array. If we're not converting, then the reverse applied.
     if set_mask_to_nan:
@@ -1335,6 +1527,218 @@ def read_geos_files(start_date, end_date, geos_path, profile_variables, surface_
     return prof_data, surf_data, file_dates
 
 
+def read_geos_files_parallel(start_date, end_date, geos_path, profile_variables, surface_variables, product='fpit',
+                             lat_lim=None, lon_lim=None, lev_lim=None, nthreads=1, as_dataset=False, chunks=None):
+    """
+    Read GEOS FP or FP-IT files between specified dates, using multiple threads and an optional spatial subset.
+
+    Unlike :func:`read_geos_files`, this does not accumulate each file's data in a list and concatenate at the end.
+    Instead, the output arrays are allocated once (ntimes x nlev x nlat x nlon for profile variables, ntimes x nlat x
+    nlon for surface variables) and each file's data is written directly into its slice of those arrays by a pool of
+    threads. Only the requested subset of each variable is read from disk.
+
+    :param start_date: the first date to read GEOS files from
+    :type start_date: datetime-like
+
+    :param end_date: the last date to read GEOS file from (exclusive). See :func:`read_geos_files`.
+    :type end_date: datetime-like
+
+    :param geos_path: the path where the GEOS files are stored. Must have subdirectories 'Np' and 'Nx' for the profile
+     and surface files, respectively.
+    :type geos_path: str
+
+    :param profile_variables: a list of variables to read from the profile (Np) files. 'lon', 'lat', and 'lev' are
+     always read.
+    :type profile_variables: list(str)
+
+    :param surface_variables: a list of variables to read from the surface (Nx) files. 'lon' and 'lat' are always read.
+    :type surface_variables: list(str)
+
+    :param product: one of the strings 'fp' or 'fpit', determine which GEOS product is being read.
+    :type product: str
+
+    :param lat_lim: if given, a two-element sequence giving the minimum and maximum latitude to read (inclusive).
+     ``None`` reads all latitudes.
+    :type lat_lim: None or sequence(float)
+
+    :param lon_lim: same as ``lat_lim`` but for longitude. Longitudes must be given on the same -180 to +180 convention
+     as the GEOS files, and the subset cannot cross the dateline.
+    :type lon_lim: None or sequence(float)
+
+    :param lev_lim: same as ``lat_lim`` but for the vertical coordinate of the profile files (pressure in hPa for the
+     Np files). The order of the two values does not matter.
+    :type lev_lim: None or sequence(float)
+
+    :param nthreads: the number of threads to read files with. The default, 1, reads the files serially. ``None`` will
+     use one thread per file, up to the number of CPUs. Only use more than one thread if the netCDF/HDF5 libraries are
+     built thread safe, since the threads open and read files concurrently.
+    :type nthreads: int or None
+
+    :param as_dataset: set to ``True`` to return an :class:`xarray.Dataset` instead of arrays. In that case the data
+     are opened lazily with dask (which must be installed) using ``chunks`` and are not read until computed.
+    :type as_dataset: bool
+
+    :param chunks: the chunk sizes to use when ``as_dataset`` is ``True``, as a dictionary with dimension names as keys.
+     The default is one chunk per file.
+    :type chunks: None or dict
+
+    :return: if ``as_dataset`` is ``False``, dictionaries of profile and surface variables, and a Pandas DateTimeIndex
+     of the file dates (i.e. the same output as :func:`read_geos_files` with ``concatenate_arrays=True`` and
+     ``set_mask_to_nan=True``). If ``as_dataset`` is ``True``, a single dataset containing the profile and surface
+     variables.
+    :rtype: dict, dict, DatetimeIndex or :class:`xarray.Dataset`
+
+    :raises ValueError: if there are no GEOS times between ``start_date`` and ``end_date``.
+    """
+    geos_prof_files, file_dates = geosfp_file_names(product, 'met', 'p', start_date, end_date)
+    geos_surf_files, surf_file_dates = geosfp_file_names(product, 'met', 'surf', start_date, end_date)
+    if len(file_dates) != len(surf_file_dates) or any(file_dates[i] != surf_file_dates[i] for i in range(len(file_dates))):
+        raise RuntimeError('Somehow listed different profile and surface files')
+    elif len(file_dates) == 0:
+        raise ValueError('There are no GEOS files between {} and {} (the end date is exclusive)'
+                         .format(start_date, end_date))
+
+    geos_prof_files = [os.path.join(geos_path, 'Np', f) for f in geos_prof_files]
+    geos_surf_files = [os.path.join(geos_path, 'Nx', f) for f in geos_surf_files]
+    file_dates = pd.DatetimeIndex(file_dates)
+
+    # Work out the subset indices from the first profile file. The surface files are on the same horizontal grid.
+    with ncdf.Dataset(geos_prof_files[0], 'r') as nchandle:
+        subset = {'lat': _geos_subset_slice(nchandle.variables['lat'][:], lat_lim),
+                  'lon': _geos_subset_slice(nchandle.variables['lon'][:], lon_lim),
+                  'lev': _geos_subset_slice(nchandle.variables['lev'][:], lev_lim)}
+
+    if as_dataset:
+        return _open_geos_files_lazy(geos_prof_files, geos_surf_files, file_dates, profile_variables,
+                                     surface_variables, subset, chunks)
+
+    if nthreads is None:
+        nthreads = min(len(file_dates), os.cpu_count() or 1)
+
+    prof_data = _read_geos_files_preallocated(geos_prof_files, profile_variables, subset, is_profile=True,
+                                              nthreads=nthreads)
+    surf_data = _read_geos_files_preallocated(geos_surf_files, surface_variables, subset, is_profile=False,
+                                              nthreads=nthreads)
+    return prof_data, surf_data, file_dates
+
+
+def _geos_subset_slice(coord, lim):
+    """
+    Convert a (min, max) coordinate range into a slice along that coordinate.
+
+    :param coord: the coordinate vector, must be monotonic.
+    :type coord: array-like
+
+    :param lim: the two element coordinate range (inclusive) or ``None`` to take the whole coordinate.
+    :type lim: None or sequence(float)
+
+    :return: the slice that selects the requested range.
+    :rtype: slice
+    """
+    if lim is None:
+        return slice(None)
+
+    coord = np.asarray(coord)
+    lo, hi = min(lim), max(lim)
+    inds = np.flatnonzero((coord >= lo) & (coord <= hi))
+    if inds.size == 0:
+        raise ValueError('No GEOS coordinate values fall between {} and {}'.format(lo, hi))
+    return slice(inds[0], inds[-1] + 1)
+
+
+def _read_geos_files_preallocated(file_list, variables, subset, is_profile, nthreads):
+    """
+    Read variables from a list of GEOS files into preallocated arrays, one file per task in a thread pool.
+
+    :param file_list: the GEOS files to read, in time order.
+    :type file_list: list(str)
+
+    :param variables: the variables to read from each file.
+    :type variables: list(str)
+
+    :param subset: a dictionary with keys 'lat', 'lon', and 'lev' giving the slices to read along each coordinate.
+    :type subset: dict
+
+    :param is_profile: whether these are profile (``True``) or surface (``False``) files.
+    :type is_profile: bool
+
+    :param nthreads: number of threads to use.
+    :type nthreads: int
+
+    :return: dictionary of the variables plus the lat/lon (and lev, if a profile file) coordinates
+    :rtype: dict
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    coord_names = ('lon', 'lat', 'lev') if is_profile else ('lon', 'lat')
+    with ncdf.Dataset(file_list[0], 'r') as nchandle:
+        coords = {c: nchandle.variables[c][subset[c]].filled(np.nan) for c in coord_names}
+        var_data = dict()
+        for var in variables:
+            ncvar = nchandle.variables[var]
+            # Each file has a singleton time dimension, so our final shape is the number of files times the subset
+            # shape of the spatial dimensions.
+            var_inds = _geos_var_subset_inds(ncvar, subset)
+            var_shape = tuple(len(range(*s.indices(n))) for s, n in zip(var_inds[1:], ncvar.shape[1:]))
+            dtype = np.result_type(ncvar.dtype, np.float32)
+            var_data[var] = np.full((len(file_list),) + var_shape, np.nan, dtype=dtype)
+
+    def read_one_file(fidx):
+        with ncdf.Dataset(file_list[fidx], 'r') as nchandle:
+            for c in coord_names:
+                if not np.allclose(coords[c], nchandle.variables[c][subset[c]].filled(np.nan)):
+                    raise RuntimeError('lat, lon, and/or lev are inconsistent among the GEOS files')
+            for var in variables:
+                ncvar = nchandle.variables[var]
+                var_inds = _geos_var_subset_inds(ncvar, subset)
+                var_data[var][fidx] = ncvar[var_inds][0].filled(np.nan)
+
+    if nthreads <= 1:
+        for i in range(len(file_list)):
+            read_one_file(i)
+    else:
+        with ThreadPoolExecutor(max_workers=nthreads) as pool:
+            # Consume the iterator so that any errors in the threads get raised here
+            for _ in pool.map(read_one_file, range(len(file_list))):
+                pass
+
+    var_data.update(coords)
+    return var_data
+
+
+def _geos_var_subset_inds(ncvar, subset):
+    """
+    Build the tuple of indices to read the subset of a GEOS variable, based on its dimension names.
+
+    The first (time) dimension is always read in full, dimensions not named 'lat', 'lon', or 'lev' are also read in
+    full.
+    """
+    return tuple(subset.get(dim, slice(None)) if i > 0 else slice(None) for i, dim in enumerate(ncvar.dimensions))
+
+
+def _open_geos_files_lazy(prof_files, surf_files, file_dates, profile_variables, surface_variables, subset, chunks):
+    """
+    Open GEOS profile and surface files as a single lazily-loaded, dask-backed :class:`xarray.Dataset`.
+
+    See :func:`read_geos_files_parallel` for the meaning of the inputs.
+    """
+    # dask is only needed for lazy loading, so only import it here to avoid making it a hard requirement
+    import dask  # noqa: F401
+
+    if chunks is None:
+        chunks = {'time': 1}
+
+    def open_files(files, variables, dims):
+        ds = xr.open_mfdataset(files, combine='nested', concat_dim='time', chunks=chunks, parallel=True,
+                               data_vars='minimal', coords='minimal', compat='override')
+        ds = ds[list(variables)].isel({d: subset[d] for d in dims if d in ds.dims})
+        return ds.assign_coords(time=file_dates)
+
+    prof_ds = open_files(prof_files, profile_variables, ('lat', 'lon', 'lev'))
+    surf_ds = open_files(surf_files, surface_variables, ('lat', 'lon'))
+    return xr.merge([prof_ds, surf_ds], compat='override', join='override')
+
+
 def geosfp_file_names(product, file_type, levels, start_date, end_date=None):
     """
     List all file names for GEOS FP or FP-IT files for the given date(s).
@@ -1813,8 +2217,9 @@ def age_of_air(lat, z, ztrop, ref_lat=45.0):
      the same shape. Must have units of kilometers.
     :type z: float or :class:`numpy.ndarray`
 
-    :param ztrop: the tropopause altitude, in kilometers.
-    :type ztrop: float
+    :param ztrop: the tropopause altitude, in kilometers. May also be an array the same shape as ``z`` to compute ages
+     for points from several profiles at once.
+    :type ztrop: float or :class:`numpy.ndarray`
 
     :param ref_lat: the reference latitude for the cycle. This is where the exponential in latitude is maximized. 45N
      was chosen as the default as the center of the northern hemisphere, where most anthropogenic emissions are.
@@ -1834,8 +2239,10 @@ def age_of_air(lat, z, ztrop, ref_lat=45.0):
     # We limit the calculation to z > ztrop here because that avoids a divide-by-0 warning
     # This term is really only kept in for completeness; in practice, it should never be used because we don't use
     # this term in the stratosphere.
-    extra_term = 7.0 * (z[z > ztrop]-ztrop)/z[z > ztrop]
-    aoa[z > ztrop] += extra_term
+    xx_strat = z > ztrop
+    ztrop_strat = ztrop[xx_strat] if np.ndim(ztrop) > 0 else ztrop
+    extra_term = 7.0 * (z[xx_strat]-ztrop_strat)/z[xx_strat]
+    aoa[xx_strat] += extra_term
     return aoa
 
 
@@ -2358,8 +2765,13 @@ def interp_to_zgrid(profile_dict, zgrid, gas_extrap_method='linear'):
     with respect to altitude. It will extrapolate linearly towards the surface, but will raise an error if the profile
     does not go high enough.
 
+    All variables are interpolated together, so the cost is about the same whether the dictionary holds a few variables
+    or many. The variables may also be stacks of profiles (profiles along the first dimension, levels along the
+    second), in which case all profiles are interpolated at once. Each profile must be defined on all levels, i.e.
+    no fill values in "Height".
+
     :param profile_dict: a dictionary of profile variables. Must include the altitude levels as the key "Height". The
-     keys "gas_record_dates" and "gas_date" are treated as dates for interpolation.
+     keys "gas_record_dates" and "gas_date" are treated as dates for interpolation. The altitudes must be increasing.
     :type profile_dict: dict
 
     :param zgrid: any specification of a fixed altitude grid accepted by :func:`_setup_zgrid`, i.e. ``None`` to do no
@@ -2378,35 +2790,62 @@ def interp_to_zgrid(profile_dict, zgrid, gas_extrap_method='linear'):
     converters = {'gas_record_dates': dt_converters,
                   'gas_date': dt_converters}
 
+    if gas_extrap_method not in ('linear', 'const', 'constant'):
+        raise ValueError('extrap_method must be one of: "linear", "const", or "constant".')
+
     zgrid = _setup_zgrid(zgrid)
     if zgrid is None:
         return profile_dict
 
-    profile_z = profile_dict['Height'].copy()
-    for k, v in profile_dict.items():
-        if k in converters:
-            v = converters[k][0](v)
-
-        v = xr.DataArray(v, coords=[profile_z], dims=['z'])
-        if gas_extrap_method == 'linear' or k in met_variables:
-            # we always want to linearly extrapolate the met variables, especially since they often act as vertical
-            # coordinates. If more met variables are added, you'll have to update the list.
-            fills = 'extrapolate'
-        elif gas_extrap_method in ('const', 'constant'):
-            fills = (v[0], v[-1])
-        else:
-            raise ValueError('extrap_method must be one of: "linear", "const", or "constant".')
-        v = v.interp(z=zgrid, method='linear', kwargs={'fill_value': fills})
+    profile_z = np.asarray(profile_dict['Height'], dtype=float)
+    keys = list(profile_dict.keys())
+    values = np.array([converters[k][0](np.ravel(v)).reshape(np.shape(v)) if k in converters else v
+                       for k, v in profile_dict.items()], dtype=float)
 
-        if k in converters:
-            v = converters[k][1](v.data)
-        else:
-            v = v.data
-        profile_dict[k] = v
+    # we always want to linearly extrapolate the met variables, especially since they often act as vertical
+    # coordinates. If more met variables are added, you'll have to update the list. The gases may instead be held
+    # constant outside the profile.
+    const_extrap = [gas_extrap_method != 'linear' and k not in met_variables for k in keys]
+    new_values = _interp_profiles_linear(profile_z, values, np.asarray(zgrid, dtype=float), const_extrap)
+
+    for k, v in zip(keys, new_values):
+        profile_dict[k] = converters[k][1](v.ravel()).reshape(v.shape) if k in converters else v
 
     return profile_dict
 
 
+def _interp_profiles_linear(z, values, znew, const_extrap):
+    # Linear interpolation of several variables (first dimension of ``values``) that share the altitudes ``z`` to the
+    # altitudes ``znew``. ``z`` and each variable may be one profile or a stack of profiles (profiles x levels). Points
+    # outside ``z`` are linearly extrapolated from the end segments, unless ``const_extrap`` is true for that variable,
+    # in which case they get the first/last value of the profile. This reproduces scipy's interp1d with
+    # fill_value='extrapolate' or fill_value=(first, last), which is what the xarray interpolation used to call.
+    nlev = z.shape[-1]
+    zz = np.atleast_2d(z)
+    yy = values.reshape((values.shape[0],) + zz.shape)
+
+    # Index of the first level at or above each new altitude, limited to the end segments for extrapolation
+    ihi = np.clip(np.sum(zz[:, None, :] < znew[None, :, None], axis=-1), 1, nlev - 1)
+    ilo = ihi - 1
+    z_lo = np.take_along_axis(zz, ilo, axis=-1)
+    z_hi = np.take_along_axis(zz, ihi, axis=-1)
+    y_lo = np.take_along_axis(yy, np.broadcast_to(ilo, yy.shape[:2] + ilo.shape[-1:]), axis=-1)
+    y_hi = np.take_along_axis(yy, np.broadcast_to(ihi, yy.shape[:2] + ihi.shape[-1:]), axis=-1)
+    slope = (y_hi - y_lo) / (z_hi - z_lo)
+    ynew = slope * (znew - z_lo) + y_lo
+
+    const_extrap = np.asarray(const_extrap)
+    if const_extrap.any():
+        below = znew < zz[:, :1]
+        above = znew > zz[:, -1:]
+        yc = ynew[const_extrap]
+        yc = np.where(below, yy[const_extrap][..., :1], yc)
+        yc = np.where(above, yy[const_extrap][..., -1:], yc)
+        ynew[const_extrap] = yc
+
+    return ynew.reshape(values.shape[:-1] + znew.shape)
+
+
 def _setup_zgrid(zgrid):
     """
     Setup a fixed altitude grid
@@ -2422,6 +2861,11 @@ def _setup_zgrid(zgrid):
         return zgrid
 
 
+# Integral files are read for every prior written, so each one is parsed only once per process (and again if it
+# changes on disk).
+_integral_file_cache = dict()
+
+
 def _read_integral_file(integral_file, as_dataframes=False):
     """
     Read an integral file that defines an altitude grid for GGG
@@ -2436,11 +2880,15 @@ def _read_integral_file(integral_file, as_dataframes=False):
     :return: the table of altitudes and mean molecular weights.
     :rtype: :class:`pandas.DataFrame` or dict
     """
-    df = pd.read_csv(integral_file, sep=r'\s+', header=None, names=['Height', 'mmw'])
+    cache_key = (os.path.abspath(integral_file), os.stat(integral_file).st_mtime_ns)
+    if cache_key not in _integral_file_cache:
+        _integral_file_cache[cache_key] = pd.read_csv(integral_file, sep=r'\s+', header=None, names=['Height', 'mmw'])
+
+    df = _integral_file_cache[cache_key]
     if as_dataframes:
-        return df
+        return df.copy()
     else:
-        return {k: v.to_numpy() for k, v in df.items()}
+        return {k: v.to_numpy(copy=True) for k, v in df.items()}
 
 
 def _datetime2float(dtarray):
@@ -1,3 +1,5 @@
+from contextlib import contextmanager
+import copy
 import datetime as dt
 import os
 import re
@@ -7,11 +9,15 @@ import netCDF4 as ncdf
 import numpy as np
 import pandas as pd
 
-from . import mod_utils
+from . import mod_utils, ioutils
 from .mod_utils import ModelError
 from .mod_constants import COSource
 from .ggg_logging import logger
 
+# Contents of .mod and .vmr files written while a profile_file_cache() context is active, keyed by absolute path. Each
+# entry holds the file text and the parsed results, so that every file is parsed at most once per set of options.
+_profile_file_cache = None
+
 
 def read_out_file(out_file, as_dataframes=False, replace_fills=False):
     """Read a GGG output file
@@ -88,10 +94,17 @@ def read_out_file(out_file, as_dataframes=False, replace_fills=False):
         return df
 
 
+_mod_constant_names = ('earth_radius', 'ecc2', 'obs_lat', 'surface_gravity', 'profile_base_geometric_alt',
+                       'base_pressure', 'tropopause_pressure')
+
+
 def read_mod_file(mod_file, as_dataframes=False):
     """
     Read a TCCON .mod file.
 
+    If ``mod_file`` does not exist but its consolidated netCDF file (see :func:`mod_utils.consolidated_file_name`)
+    does, the profile is read from the consolidated file instead.
+
     :param mod_file: the path to the mod file.
     :type mod_file: str
 
@@ -105,22 +118,23 @@ def read_mod_file(mod_file, as_dataframes=False):
      or data frames, depending on ``as_dataframes``.
     :rtype: dict
     """
-    n_header_lines = mod_utils.get_num_header_lines(mod_file)
-    # Read the constants from the second line of the file. There's no header for these, we just have to rely on the
-    # same constants being in the same position.
-    constant_vars = pd.read_csv(mod_file, sep='\s+', header=None, nrows=1, skiprows=1,
-                                names=('earth_radius', 'ecc2', 'obs_lat', 'surface_gravity',
-                                       'profile_base_geometric_alt', 'base_pressure', 'tropopause_pressure'))
-    # Read the scalar variables (e.g. surface pressure, SZA, tropopause) first. We just have to assume their headers are
-    # on line 3 and values on line 4 of the file, the first number in the first line gives us the line the profile
-    # variables start on.
-    scalar_vars = pd.read_csv(mod_file, sep='\s+', header=2, nrows=1)
-
-    # Get the CO source from the header. If absent, use a deafult
-    constant_vars['co_source'] = _read_mod_file_co_source(mod_file)
+    cached_data = _parse_cached_profile_file(mod_file, parse_mod_lines, mod_file=mod_file)
+    cons_file = _consolidated_file_for(mod_file) if cached_data is None else None
+    if cached_data is not None:
+        mod_data = cached_data
+    elif cons_file is None:
+        # Read the whole file once and parse the header, scalar section, and profile table from the lines in memory
+        # rather than reopening the file for each section.
+        with open(mod_file, 'r') as robj:
+            mod_data = parse_mod_lines(robj.read().splitlines(), mod_file)
+    else:
+        mod_data = ioutils.read_consolidated_profile(cons_file, os.path.basename(mod_file))
+        mod_data = {k: dict(v) for k, v in mod_data.items()}
+        mod_data['constants']['co_source'] = COSource(mod_data['constants']['co_source'])
 
-    # Now read the profile vars.
-    profile_vars = pd.read_csv(mod_file, sep='\s+', header=n_header_lines-1)
+    constant_vars = mod_data['constants']
+    scalar_vars = mod_data['scalar']
+    profile_vars = mod_data['profile']
 
     # Also get the information that's only in the file name (namely date and longitude, we'll also read the latitude
     # because it's there).
@@ -133,43 +147,272 @@ def read_mod_file(mod_file, as_dataframes=False):
     # Check that the header latitude and the file name latitude don't differ by more than 0.5 degree. Even if rounded
     # to an integer for the file name, the difference should not exceed 0.5 degree.
     lat_diff_threshold = 0.5
-    if np.abs(file_vars['lat'] - constant_vars['obs_lat'].item()) > lat_diff_threshold:
+    if np.abs(file_vars['lat'] - constant_vars['obs_lat']) > lat_diff_threshold:
         raise ModelError('The latitude in the file name and .mod file header differ by more than {lim} deg ({name} vs. '
                          '{head}). This indicates a possibly malformed .mod file.'
-                         .format(lim=lat_diff_threshold, name=file_vars['lat'], head=constant_vars['obs_lat'].item())
+                         .format(lim=lat_diff_threshold, name=file_vars['lat'], head=constant_vars['obs_lat'])
                          )
 
     out_dict = dict()
     if as_dataframes:
         out_dict['file'] = pd.DataFrame(file_vars, index=[0])
+        out_dict['constants'] = pd.DataFrame(constant_vars, index=[0])
+        out_dict['scalar'] = pd.DataFrame(scalar_vars, index=[0])
+        out_dict['profile'] = pd.DataFrame(profile_vars)
+    else:
+        out_dict['file'] = file_vars
         out_dict['constants'] = constant_vars
         out_dict['scalar'] = scalar_vars
         out_dict['profile'] = profile_vars
-    else:
-        out_dict['file'] = file_vars
-        out_dict['constants'] = {k: v.item() for k, v in constant_vars.items()}
-        out_dict['scalar'] = {k: v.item() for k, v in scalar_vars.items()}
-        out_dict['profile'] = {k: v.values for k, v in profile_vars.items()}
 
     return out_dict
 
 
+def parse_mod_lines(lines, mod_file='<mod file>'):
+    """
+    Parse the contents of a .mod file already in memory.
+
+    :param lines: the lines of the .mod file, without line endings.
+    :type lines: list(str)
+
+    :param mod_file: the name of the .mod file, only used in warning messages.
+    :type mod_file: str
+
+    :return: a dictionary with keys 'constants', 'scalar', and 'profile', as in :func:`read_mod_file` (but without
+     the 'file' key, which is derived from the file name).
+    :rtype: dict
+    """
+    n_header_lines = mod_utils.parse_num_header_lines(lines[0])
+
+    # Read the constants from the second line of the file. There's no header for these, we just have to rely on the
+    # same constants being in the same position.
+    constant_vars = {k: _parse_number(v) for k, v in zip(_mod_constant_names, lines[1].split())}
+    # Read the scalar variables (e.g. surface pressure, SZA, tropopause) next. We just have to assume their headers are
+    # on line 3 and values on line 4 of the file, the first number in the first line gives us the line the profile
+    # variables start on.
+    scalar_vars = {k: _parse_number(v) for k, v in zip(lines[2].split(), lines[3].split())}
+
+    # Get the CO source from the header. If absent, use a deafult
+    constant_vars['co_source'] = _parse_mod_file_co_source(lines[:n_header_lines], mod_file)
+
+    # Now read the profile vars. All the data lines are converted in one go.
+    profile_vars = dict(_parse_data_table(lines[n_header_lines:], lines[n_header_lines-1].split()))
+
+    return {'constants': constant_vars, 'scalar': scalar_vars, 'profile': profile_vars}
+
+
+def profile_source_file(profile_file):
+    """
+    Get the file that a .mod or .vmr profile is actually read from.
+
+    :param profile_file: the path to the .mod or .vmr text file.
+    :type profile_file: str
+
+    :return: ``profile_file`` itself if it exists or if no consolidated file holds it, otherwise the path to the
+     consolidated netCDF file that the profile will be read from.
+    :rtype: str
+    """
+    cons_file = _consolidated_file_for(profile_file)
+    return profile_file if cons_file is None else cons_file
+
+
+def _consolidated_file_for(profile_file):
+    # Text files take precedence; only fall back on the consolidated file if the text file is absent
+    if os.path.exists(profile_file):
+        return None
+    try:
+        cons_file = mod_utils.consolidated_file_name(profile_file)
+    except AttributeError:
+        # No date in the file name, so it cannot be part of a consolidated file
+        return None
+    return cons_file if os.path.exists(cons_file) else None
+
+
+@contextmanager
+def profile_file_cache():
+    """
+    Keep the .mod and .vmr files written within this context in memory for later reads.
+
+    While this context is active, files written by :func:`ginput.mod_maker.mod_maker.write_mod` and
+    :func:`writers.write_vmr_file` are still written to disk, but :func:`read_mod_file` and :func:`read_vmr_file` parse
+    them from memory, and only once no matter how many times they are read. Because the cached text is exactly what was
+    written, the values read are identical to those read from disk. Nested contexts share the outer cache. Entries are
+    kept until the context exits or they are removed with :func:`evict_cached_profile_file`, so callers that are done
+    with a file should evict it.
+
+    The cache only exists in the process that entered the context. Files written by worker processes do not reach it,
+    so code that writes .mod or .vmr files in a process pool should check :func:`profile_file_cache_active` and write
+    them in the parent process instead.
+
+    :return: context manager that yields the cache dictionary.
+    """
+    global _profile_file_cache
+    prev_cache = _profile_file_cache
+    if prev_cache is None:
+        _profile_file_cache = dict()
+    try:
+        yield _profile_file_cache
+    finally:
+        _profile_file_cache = prev_cache
+
+
+def profile_file_cache_active():
+    """
+    Check whether a :func:`profile_file_cache` context is active.
+
+    :return: ``True`` if files written now will be cached.
+    :rtype: bool
+    """
+    return _profile_file_cache is not None
+
+
+def cache_profile_file(profile_file, text):
+    """
+    Record the text of a .mod or .vmr file just written, if a :func:`profile_file_cache` is active.
+
+    :param profile_file: the path the file was written to (or, for consolidated profiles, the text file path).
+    :type profile_file: str
+
+    :param text: the full contents of the file.
+    :type text: str
+    """
+    if _profile_file_cache is not None:
+        _profile_file_cache[os.path.abspath(profile_file)] = {'text': text}
+
+
+def move_cached_profile_file(old_file, new_file):
+    """
+    Update the :func:`profile_file_cache` after a .mod or .vmr file was renamed. Does nothing if no cache is active.
+
+    :param old_file: the old path of the file.
+    :type old_file: str
+
+    :param new_file: the new path of the file.
+    :type new_file: str
+    """
+    if _profile_file_cache is not None:
+        entry = _profile_file_cache.pop(os.path.abspath(old_file), None)
+        if entry is not None:
+            _profile_file_cache[os.path.abspath(new_file)] = entry
+
+
+def evict_cached_profile_file(profile_file):
+    """
+    Remove a .mod or .vmr file from the :func:`profile_file_cache` once it is no longer needed, freeing its text and
+    parsed contents. Later reads of the file come from disk. Does nothing if no cache is active or the file is not cached.
+
+    :param profile_file: the path the file was written to.
+    :type profile_file: str
+    """
+    if _profile_file_cache is not None:
+        _profile_file_cache.pop(os.path.abspath(profile_file), None)
+
+
+def _parse_cached_profile_file(profile_file, parser, **kwargs):
+    if _profile_file_cache is None:
+        return None
+    entry = _profile_file_cache.get(os.path.abspath(profile_file))
+    if entry is None:
+        return None
+
+    key = (parser.__name__,) + tuple(sorted(kwargs.items()))
+    if key not in entry:
+        entry[key] = parser(entry['text'].splitlines(), **kwargs)
+    # Callers may modify what they are given, so hand out copies and keep the cached version pristine
+    return copy.deepcopy(entry[key])
+
+
+def read_mod_files(mod_files):
+    """
+    Read many .mod files into arrays stacked along a new first dimension.
+
+    :param mod_files: the paths to the .mod files to read.
+    :type mod_files: sequence(str)
+
+    :return: a dictionary with the same keys as :func:`read_mod_file`. The 'file', 'constants' and 'scalar' values are
+     dictionaries of arrays with one element per file; the 'profile' value is a dictionary of arrays that are
+     nfiles-by-nlevels. If the files have different numbers of levels, the shorter profiles are padded at the end with
+     NaNs. Variables missing from some files are filled with NaNs (or ``None`` for non-numeric values).
+    :rtype: dict
+    """
+    return stack_mod_data([read_mod_file(f) for f in mod_files])
+
+
+def stack_mod_data(all_data):
+    """
+    Stack data already read from .mod files along a new first dimension.
+
+    :param all_data: the dictionaries returned by :func:`read_mod_file` for each file.
+    :type all_data: sequence(dict)
+
+    :return: the stacked data, see :func:`read_mod_files`.
+    :rtype: dict
+    """
+    return _stack_file_data(all_data, ('file', 'constants', 'scalar'), 'profile')
+
+
+def _stack_file_data(all_data, scalar_categories, profile_category):
+    nfiles = len(all_data)
+    out_dict = dict()
+
+    for category in scalar_categories:
+        varnames = _ordered_union(d[category].keys() for d in all_data)
+        out_dict[category] = dict()
+        for var in varnames:
+            values = [d[category].get(var) for d in all_data]
+            if all(isinstance(v, (int, float)) or v is None for v in values):
+                out_dict[category][var] = np.array([np.nan if v is None else v for v in values], dtype=float)
+            else:
+                out_dict[category][var] = np.array(values, dtype=object)
+
+    nlev = max([np.size(v) for d in all_data for v in d[profile_category].values()], default=0)
+    varnames = _ordered_union(d[profile_category].keys() for d in all_data)
+    out_dict[profile_category] = OrderedDict([(v, np.full((nfiles, nlev), np.nan)) for v in varnames])
+    for i, d in enumerate(all_data):
+        for var, values in d[profile_category].items():
+            out_dict[profile_category][var][i, :np.size(values)] = values
+
+    return out_dict
+
+
+def _ordered_union(key_collections):
+    keys = OrderedDict()
+    for collection in key_collections:
+        for k in collection:
+            keys[k] = None
+    return list(keys.keys())
+
+
+def _parse_number(value):
+    # Mimic how pandas would type a single value read from a text file: integers stay integers, everything else is
+    # parsed as a float.
+    try:
+        return int(value)
+    except ValueError:
+        return float(value)
+
+
 def _read_mod_file_co_source(mod_file: str) -> COSource:
     nhead = mod_utils.get_num_header_lines(mod_file)
     with open(mod_file) as f:
-        for idx, line in enumerate(f):
-            if idx == nhead:
-                # This is the default; .mod files before v1.2.0 did not include a CO
-                # source in the header because it was always from GEOS FP-IT. Also 
-                # prior to v1.2.0, the header only had 7 lines (by default), so if
-                # there's >7 lines, that probably means we messed up.
-                if nhead > 7:
-                    logger.warning((f'In .mod file {mod_file}, did not find a "CO source" line in the header, but the header has more than 7 lines. '
-                                     'Unless this is a custom .mod file, this means I may have missed the CO source line.'))
-                return COSource.FPIT
-            elif line.startswith('CO source'):
-                source = line.split(':', maxsplit=2)[1].strip()
-                return COSource(source)
+        header_lines = [f.readline() for _ in range(nhead)]
+    return _parse_mod_file_co_source(header_lines, mod_file)
+
+
+def _parse_mod_file_co_source(header_lines, mod_file: str) -> COSource:
+    for line in header_lines:
+        if line.startswith('CO source'):
+            source = line.split(':', maxsplit=2)[1].strip()
+            return COSource(source)
+
+    # This is the default; .mod files before v1.2.0 did not include a CO
+    # source in the header because it was always from GEOS FP-IT. Also
+    # prior to v1.2.0, the header only had 7 lines (by default), so if
+    # there's >7 lines, that probably means we messed up.
+    if len(header_lines) > 7:
+        logger.warning((f'In .mod file {mod_file}, did not find a "CO source" line in the header, but the header has more than 7 lines. '
+                         'Unless this is a custom .mod file, this means I may have missed the CO source line.'))
+    return COSource.FPIT
 
 
 def read_mod_file_units(mod_file):
@@ -195,10 +438,15 @@ def read_mod_file_units(mod_file):
     return {n: u for n, u in zip(names, units)}
  
 
-def read_map_file(map_file, as_dataframes=False, skip_header=False, fmt=None):
+def read_map_file(map_file, as_dataframes=False, skip_header=False, fmt=None, site=None, date=None):
     """
     Read a .map file
 
+    Consolidated netCDF .map files (written by :func:`writers.write_consolidated_map_file`) contain profiles for many
+    sites and times. For these, pass ``site`` and ``date`` to read a single profile, which is returned in the same form
+    as if it had been read from a single-profile netCDF .map file. Only that profile is read from disk. If ``site`` and
+    ``date`` are omitted, all profiles are returned as time-by-site-by-altitude arrays.
+
     :param map_file: the path to the .map file
     :type map_file: str
 
@@ -214,12 +462,20 @@ def read_map_file(map_file, as_dataframes=False, skip_header=False, fmt=None):
      netCDF. If not specified, it will attempt to infer from the extension.
     :type fmt: str or None
 
+    :param site: the site abbreviation of the profile to read from a consolidated .map file. Ignored for single-profile
+     files.
+    :type site: str or None
+
+    :param date: the date and time of the profile to read from a consolidated .map file. Ignored for single-profile
+     files.
+    :type date: datetime-like or None
+
     :return: a dictionary with keys 'constants' and 'profile' that hold the header values and main profile data,
      respectively. The form of these values depends on ``as_dataframes``.
     :rtype: dict
     """
     if map_file.endswith('.nc') or fmt == 'nc':
-        return _read_map_nc_file(map_file, as_dataframes=as_dataframes, skip_header=skip_header)
+        return _read_map_nc_file(map_file, as_dataframes=as_dataframes, skip_header=skip_header, site=site, date=date)
     elif map_file.endswith('.map') or fmt == 'txt':
         return _read_map_txt_file(map_file, as_dataframes=as_dataframes, skip_header=skip_header)
     else:
@@ -227,16 +483,29 @@ def read_map_file(map_file, as_dataframes=False, skip_header=False, fmt=None):
         raise ValueError('Unknown extension "{}" for map file. Use the `fmt` keyword to indicate the file type.'.format(ext))
 
 
-def _read_map_nc_file(map_file, as_dataframes=False, skip_header=False):
+def _read_map_nc_file(map_file, as_dataframes=False, skip_header=False, site=None, date=None):
     profile_dict = dict()
     constant_dict = dict()
     with ncdf.Dataset(map_file) as ds:
-        for varname, vardat in ds.variables.items():
-            if varname == 'time':
-                vardat = ncdf.num2date(vardat[:], vardat.units, only_use_cftime_datetimes=False)
-                profile_dict[varname] = pd.DatetimeIndex(vardat)
-            else:
-                profile_dict[varname] = vardat[:].filled(np.nan)
+        if 'site' in ds.dimensions and (site is None or date is None):
+            if as_dataframes:
+                raise ValueError('Reading all profiles from a consolidated .map file is not supported with '
+                                 'as_dataframes=True; give a site and date to read a single profile.')
+            for varname, vardat in ds.variables.items():
+                if varname == 'time':
+                    profile_dict[varname] = _nc_times_to_index(vardat)
+                elif vardat.dtype == str:
+                    profile_dict[varname] = vardat[:]
+                else:
+                    profile_dict[varname] = vardat[:].filled(np.nan)
+        elif 'site' in ds.dimensions:
+            profile_dict = _read_consolidated_map_profile(ds, map_file, site, date)
+        else:
+            for varname, vardat in ds.variables.items():
+                if varname == 'time':
+                    profile_dict[varname] = _nc_times_to_index(vardat)
+                else:
+                    profile_dict[varname] = vardat[:].filled(np.nan)
 
         if not skip_header:
             for attr in ds.ncattrs():
@@ -256,6 +525,42 @@ def _read_map_nc_file(map_file, as_dataframes=False, skip_header=False):
     return {'profile': profile_dict, 'constants': constant_dict}
 
 
+def _nc_times_to_index(time_var):
+    times = ncdf.num2date(time_var[:], time_var.units, only_use_cftime_datetimes=False)
+    return pd.DatetimeIndex(times)
+
+
+def _read_consolidated_map_profile(ds, map_file, site, date):
+    # Only the small coordinate variables are read in full; for the profile variables, just the requested chunk is read.
+    sites = list(ds['site'][:])
+    times = _nc_times_to_index(ds['time'])
+    date = pd.Timestamp(date)
+    if site not in sites:
+        raise KeyError('Site "{}" is not in the consolidated .map file {}'.format(site, map_file))
+    it = np.flatnonzero(times == date)
+    if it.size == 0:
+        raise KeyError('{} is not in the consolidated .map file {}'.format(date, map_file))
+    it = it[0]
+    isite = sites.index(site)
+
+    lat = ds['lat'][it, isite]
+    if np.ma.is_masked(lat) or np.isnan(lat):
+        raise KeyError('There is no profile for site "{}" at {} in {}'.format(site, date, map_file))
+
+    # Match the variables and order of a single-profile netCDF .map file, trimming the fill values used to pad
+    # profiles shorter than the level dimension.
+    altitude = ds['altitude'][it, isite, :].filled(np.nan)
+    nlev = np.count_nonzero(~np.isnan(altitude))
+    profile_dict = dict()
+    profile_dict['altitude'] = altitude[:nlev]
+    profile_dict['time'] = times[it:it+1]
+    profile_dict['lat'] = np.array([lat])
+    for varname, vardat in ds.variables.items():
+        if vardat.dimensions == ('time', 'site', 'level') and varname != 'altitude':
+            profile_dict[varname] = vardat[it, isite, :nlev].filled(np.nan)
+    return profile_dict
+
+
 def _read_map_txt_file(map_file, as_dataframes=False, skip_header=False):
     n_header_lines = mod_utils.get_num_header_lines(map_file)
     constants = dict()
@@ -324,45 +629,27 @@ def read_isotopes(isotopes_file, gases_only=False):
 
 
 def read_vmr_file(vmr_file, as_dataframes=False, lowercase_names=True, style='new'):
-    nheader = mod_utils.get_num_header_lines(vmr_file)
-
-    if style == 'new':
-        last_const_line = nheader - 1
-        old_style = False
-    elif style == 'old':
-        last_const_line = 4
-        old_style = True
+    # New-style .vmr files may be stored in a consolidated netCDF file instead, see read_mod_file
+    cached_data = _parse_cached_profile_file(vmr_file, parse_vmr_lines, lowercase_names=lowercase_names, style=style)
+    cons_file = _consolidated_file_for(vmr_file) if style == 'new' and cached_data is None else None
+    if cached_data is not None:
+        vmr_data = cached_data
+    elif cons_file is None:
+        # Read the whole file once; the header constants, prior info, and data table are all parsed from these lines.
+        with open(vmr_file, 'r') as fobj:
+            vmr_data = parse_vmr_lines(fobj.read().splitlines(), lowercase_names=lowercase_names, style=style)
     else:
-        raise ValueError('style must be one of "new" or "old"')
+        vmr_data = ioutils.read_consolidated_profile(cons_file, os.path.basename(vmr_file))
+        vmr_data['prior_info'] = dict()
+        if lowercase_names:
+            vmr_data['scalar'] = OrderedDict([(k.lower(), v) for k, v in vmr_data['scalar'].items()])
+            vmr_data['profile'] = OrderedDict([(k.lower(), v) for k, v in vmr_data['profile'].items()])
+        vmr_data['scalar'] = dict(vmr_data['scalar'])
 
-    header_data = dict()
-    with open(vmr_file, 'r') as fobj:
-        # Skip the line with the number of header lines and columns
-        fobj.readline()
-        for i in range(1, last_const_line):
-            line = fobj.readline()
-            const_name, const_val = [v.strip() for v in line.split(':')]
-            if lowercase_names:
-                const_name = const_name.lower()
+    header_data = vmr_data['scalar']
+    prior_info = vmr_data['prior_info']
+    data_table = vmr_data['profile']
 
-            try:
-                const_val = float(const_val)
-            except ValueError:
-                pass
-            header_data[const_name] = const_val
-
-        prior_info = dict()
-        if old_style:
-            for i in range(last_const_line, nheader-1, 2):
-                category_line = fobj.readline()
-                category = re.split(r'[:\.]', category_line)[0].strip()
-                data_line = fobj.readline()
-                data_line = data_line.split(':')[1].strip()
-                split_data_line = re.split(r'\s+', data_line)
-                prior_info[category] = np.array([float(x) for x in split_data_line])
-
-    data_table = pd.read_csv(vmr_file, sep='\s+', header=nheader-1)
-    
     # Also get the information that's only in the file name (namely date and longitude, we'll also read the latitude
     # because it's there).
     file_vars = dict()
@@ -376,26 +663,123 @@ def read_vmr_file(vmr_file, as_dataframes=False, lowercase_names=True, style='ne
         # usually means we're reading a climatological file
         file_vars = dict(datetime=None, lon=None, lat=None)
 
-    if lowercase_names:
-        data_table.columns = [v.lower() for v in data_table]
-
     if as_dataframes:
+        data_table = pd.DataFrame(data_table)
         header_data = pd.DataFrame(header_data, index=[0])
         # Rearrange the prior info dict so that the data frame has the categories as the index and the species as the
         # columns.
         categories = list(prior_info.keys())
         tmp_prior_info = dict()
-        for i, k in enumerate(data_table.columns.drop('altitude')):
+        for i, k in enumerate(data_table.columns.drop('altitude' if lowercase_names else 'Altitude')):
             tmp_prior_info[k] = np.array([prior_info[cat][i] for cat in categories])
         prior_info = pd.DataFrame(tmp_prior_info, index=categories)
-    else:
-        # use an ordered dict to ensure we keep the order of the gases. This is important if we use this .vmr file as
-        # a template to write another .vmr file that gsetup.f can read.
-        data_table = OrderedDict([(k, v.to_numpy()) for k, v in data_table.items()])
 
+    # when not returning dataframes, the data table stays an ordered dict to ensure we keep the order of the gases. This
+    # is important if we use this .vmr file as a template to write another .vmr file that gsetup.f can read.
     return {'scalar': header_data, 'profile': data_table, 'prior_info': prior_info, 'file': file_vars}
 
 
+def parse_vmr_lines(lines, lowercase_names=True, style='new'):
+    """
+    Parse the contents of a .vmr file already in memory.
+
+    :param lines: the lines of the .vmr file, without line endings.
+    :type lines: list(str)
+
+    :param lowercase_names: whether to convert the header and gas names to lower case.
+    :type lowercase_names: bool
+
+    :param style: which style of .vmr file this is, "new" or "old".
+    :type style: str
+
+    :return: a dictionary with keys 'scalar', 'profile', and 'prior_info', as in :func:`read_vmr_file` (but without
+     the 'file' key, which is derived from the file name).
+    :rtype: dict
+    """
+    nheader = mod_utils.parse_num_header_lines(lines[0])
+
+    if style == 'new':
+        last_const_line = nheader - 1
+        old_style = False
+    elif style == 'old':
+        last_const_line = 4
+        old_style = True
+    else:
+        raise ValueError('style must be one of "new" or "old"')
+
+    header_data = dict()
+    # Skip the line with the number of header lines and columns
+    for line in lines[1:last_const_line]:
+        const_name, const_val = [v.strip() for v in line.split(':')]
+        if lowercase_names:
+            const_name = const_name.lower()
+
+        try:
+            const_val = float(const_val)
+        except ValueError:
+            pass
+        header_data[const_name] = const_val
+
+    prior_info = dict()
+    if old_style:
+        for i in range(last_const_line, nheader-1, 2):
+            category_line = lines[i]
+            category = re.split(r'[:\.]', category_line)[0].strip()
+            data_line = lines[i+1]
+            data_line = data_line.split(':')[1].strip()
+            split_data_line = re.split(r'\s+', data_line)
+            prior_info[category] = np.array([float(x) for x in split_data_line])
+
+    column_names = lines[nheader-1].split()
+    data_table = _parse_data_table(lines[nheader:], column_names)
+    if lowercase_names:
+        data_table = OrderedDict([(k.lower(), v) for k, v in data_table.items()])
+
+    return {'scalar': header_data, 'profile': data_table, 'prior_info': prior_info}
+
+
+def read_vmr_files(vmr_files, lowercase_names=True, style='new'):
+    """
+    Read many .vmr files into arrays stacked along a new first dimension.
+
+    :param vmr_files: the paths to the .vmr files to read.
+    :type vmr_files: sequence(str)
+
+    :param lowercase_names: whether to convert the header and gas names to lower case, as in :func:`read_vmr_file`.
+    :type lowercase_names: bool
+
+    :param style: which style of .vmr file these are, "new" or "old", as in :func:`read_vmr_file`.
+    :type style: str
+
+    :return: a dictionary with keys 'file', 'scalar' and 'profile'. The 'file' and 'scalar' values are dictionaries of
+     arrays with one element per file; the 'profile' value is an ordered dictionary of nfiles-by-nlevels arrays. Shorter
+     profiles are padded at the end with NaNs and values missing from some files are filled with NaNs (or ``None`` for
+     non-numeric values). The prior info is not included; use :func:`read_vmr_file` on a single file for that.
+    :rtype: dict
+    """
+    all_data = [read_vmr_file(f, lowercase_names=lowercase_names, style=style) for f in vmr_files]
+    return _stack_file_data(all_data, ('file', 'scalar'), 'profile')
+
+
+_int_token_re = re.compile(r'[+-]?\d+$')
+
+
+def _parse_data_table(data_lines, column_names):
+    # Convert all the values in one go, then hand back columns the way pandas would have typed them (integers only if
+    # every value in the column is an integer).
+    ncol = len(column_names)
+    tokens = ' '.join(data_lines).split()
+    values = np.array(tokens, dtype=float).reshape(-1, ncol)
+    table = OrderedDict()
+    for i, name in enumerate(column_names):
+        column_tokens = tokens[i::ncol]
+        if all(_int_token_re.match(t) for t in column_tokens):
+            table[name] = np.array([int(t) for t in column_tokens], dtype=np.int64)
+        else:
+            table[name] = values[:, i]
+    return table
+
+
 def read_runlog(runlog_file, as_dataframes=False, remove_commented_lines=True):
     nhead = mod_utils.get_num_header_lines(runlog_file)
     with open(runlog_file, 'r') as robj:
@@ -1,6 +1,8 @@
+import io
 import netCDF4 as ncdf
 import numpy as np
 import os
+from collections import OrderedDict
 from warnings import warn
 
 # Have trouble with CFUnits when calling from a Jupyter notebook. This allows the module to at least be imported if that
@@ -85,13 +87,39 @@ def _cfunits(unit_string, no_cfunits=False):
         return units
 
 
+# Changes to these modules may change the .map files, so their contents are part of the .map files' fingerprints
+_map_code_files = tuple(os.path.abspath(m.__file__) for m in (mod_utils, readers, ioutils)) + (os.path.abspath(__file__),)
+
+
+def map_file_fingerprint(vmr_file, mod_file, map_output_dir, fmt='txt', wet_or_dry='wet', site_abbrev='xx',
+                         no_cfunits=False):
+    """
+    Get the path and input fingerprint of the .map file that :func:`write_map_from_vmr_mod` would write.
+
+    The arguments are the same as for :func:`write_map_from_vmr_mod`. The fingerprint (see
+    :func:`ioutils.make_output_fingerprint`) covers the .vmr and .mod files, the code that writes the .map file, and the
+    options.
+
+    :return: the path to the .map file and its fingerprint (``None`` if the .vmr or .mod file do not exist on disk).
+    :rtype: str, str or None
+    """
+    map_name = os.path.join(map_output_dir, mod_utils.map_file_name_from_mod_vmr_files(site_abbrev, mod_file, vmr_file,
+                                                                                        fmt))
+    dependent_files = (readers.profile_source_file(vmr_file), readers.profile_source_file(mod_file)) + _map_code_files
+    fingerprint = ioutils.make_output_fingerprint(dependent_files, fmt=fmt, wet_or_dry=wet_or_dry,
+                                                  site_abbrev=site_abbrev, no_cfunits=no_cfunits, version=__version__)
+    return map_name, fingerprint
+
+
 def write_map_from_vmr_mod(vmr_file, mod_file, map_output_dir, fmt='txt', wet_or_dry='wet', site_abbrev='xx',
-                           no_cfunits=False):
+                           no_cfunits=False, vmr_data=None, mod_data=None, fingerprints=None):
     """
     Create a .map file from a .vmr and .mod file
 
-    :param vmr_file: the path to the .vmr file to read the gas concentrations from
-    :param mod_file: the path to the .mod file to read the met variables from
+    :param vmr_file: the path to the .vmr file to read the gas concentrations from. If ``vmr_data`` is given, this is
+     only used to determine the .map file name and need not exist.
+    :param mod_file: the path to the .mod file to read the met variables from. If ``mod_data`` is given, this is only
+     used to determine the .map file name and need not exist.
     :param map_output_dir: the directory to write the .map file to. It will automatically be given the correct name.
     :param fmt: what format to write the .map files in, either "txt" for the original text files or "nc" for the new
      netCDF files.
@@ -99,32 +127,54 @@ def write_map_from_vmr_mod(vmr_file, mod_file, map_output_dir, fmt='txt', wet_or
     :param site_abbrev: the site abbreviation to go in the file name and netCDF attributes.
     :param no_cfunits: if True, then will not format unit strings if CFUnits failed to import. Has no effect if CFUnits
      did import successfully.
-    :return: none, writes .map or .map.nc file.
+    :param vmr_data: optional, the contents of the .vmr file as returned by :func:`readers.read_vmr_file`. If given, the
+     .vmr file is not read.
+    :param mod_data: optional, the contents of the .mod file as returned by :func:`readers.read_mod_file`. If given, the
+     .mod file is not read.
+    :param fingerprints: optional, an :class:`ioutils.OutputFingerprints` instance. If given, the .map file is not
+     rewritten if it is up to date with its inputs (see :func:`map_file_fingerprint`), and the fingerprint of its inputs
+     is recorded when it is written.
+    :return: ``True`` if the .map or .map.nc file was written, ``False`` if it was up to date.
     """
-    if not os.path.isfile(vmr_file):
+    if vmr_data is None and not mod_utils.profile_file_exists(vmr_file):
         raise OSError('vmr_file "{}" does not exist'.format(vmr_file))
     if not os.path.isdir(map_output_dir):
         raise OSError('map_output_dir "{}" is not a directory'.format(map_output_dir))
     if wet_or_dry not in ('wet', 'dry'):
         raise ValueError('wet_or_dry must be "wet" or "dry"')
 
-    map_name = mod_utils.map_file_name_from_mod_vmr_files(site_abbrev, mod_file, vmr_file, fmt)
-    map_name = os.path.join(map_output_dir, map_name)
-    mapdat, obs_lat = _merge_and_convert_mod_vmr(vmr_file, mod_file, wet_or_dry=wet_or_dry)
+    if fingerprints is None:
+        map_name = mod_utils.map_file_name_from_mod_vmr_files(site_abbrev, mod_file, vmr_file, fmt)
+        map_name = os.path.join(map_output_dir, map_name)
+    else:
+        map_name, fingerprint = map_file_fingerprint(vmr_file, mod_file, map_output_dir, fmt=fmt,
+                                                     wet_or_dry=wet_or_dry, site_abbrev=site_abbrev,
+                                                     no_cfunits=no_cfunits)
+        if fingerprints.is_current(map_name, fingerprint):
+            logger.debug('{} is up to date, not rewriting it'.format(map_name))
+            return False
+
+    # Each input file is read at most once, and not at all if the caller already has its contents.
+    if vmr_data is None:
+        vmr_data = readers.read_vmr_file(vmr_file)
+    if mod_data is None:
+        mod_data = readers.read_mod_file(mod_file)
+    mapdat, obs_lat = _merge_and_convert_mod_vmr(vmr_data, mod_data, wet_or_dry=wet_or_dry)
 
     if fmt in {'txt', 'text'}:
         _write_text_map_file(mapdat=mapdat, obs_lat=obs_lat, map_file=map_name, wet_or_dry=wet_or_dry)
     elif fmt in {'nc', 'netcdf'}:
-        moddat = readers.read_mod_file(mod_file)
-        _write_ncdf_map_file(mapdat=mapdat, obs_lat=obs_lat, obs_date=moddat['file']['datetime'], obs_site=site_abbrev,
-                             file_lat=moddat['file']['lat'], file_lon=moddat['file']['lon'],
+        _write_ncdf_map_file(mapdat=mapdat, obs_lat=obs_lat, obs_date=mod_data['file']['datetime'], obs_site=site_abbrev,
+                             file_lat=mod_data['file']['lat'], file_lon=mod_data['file']['lon'],
                              map_file=map_name, wet_or_dry=wet_or_dry, no_cfunits=no_cfunits)
 
+    if fingerprints is not None:
+        fingerprints.record(map_name, fingerprint)
+    return True
 
-def _merge_and_convert_mod_vmr(vmr_file, mod_file, vmr_vars=('h2o', 'hdo', 'co2', 'n2o', 'co', 'ch4', 'hf', 'o2'),
+
+def _merge_and_convert_mod_vmr(vmrdat, moddat, vmr_vars=('h2o', 'hdo', 'co2', 'n2o', 'co', 'ch4', 'hf', 'o2'),
                                mod_vars=('Height', 'Temperature', 'Pressure', 'Density', 'gravity'), wet_or_dry='wet'):
-    vmrdat = readers.read_vmr_file(vmr_file)
-    moddat = readers.read_mod_file(mod_file)
     mapdat = dict()
 
     # put the .mod variables (always on the GEOS native grid) on the same grid as the .vmr file (whatever that is).
@@ -226,40 +276,168 @@ def _write_ncdf_map_file(mapdat, obs_lat, obs_date, file_lat, file_lon, obs_site
             ioutils.make_ncvar_helper(wobj, varname.lower(), mapdat[varname], dims=[altdim],
                                       units=cf_units, full_units=human_units, long_name=std_name)
 
-        # finally the file attributes, including ginput version, constants used, WMF message, etc. Global CF attributes
-        # to include are "comment", "Conventions" (?), "history", "institution", "references", "source", and "title"
-        wobj.comment_full_units = 'The full_units attribute provides a human-readable counterpart to the ' \
-                                  'CF-compliant units attribute'
-        if wet_or_dry == 'wet':
-            wobj.comment_wet_mole_fractions = ' '.join(wmf_message)
-        wobj.comment_file_lat_lon = 'These are the latitude/longitude recorded in the input .mod file name. They ' \
-                                    'may be rounded to the nearest degree.'
-        wobj.contact = 'Joshua Laughner (jlaugh@caltech.edu)'
-        wobj.Conventions = 'CF-1.7'
-        wobj.institution = 'California Institute of Technology, Pasadena, CA, USA'
-        wobj.references = 'https://tccon-wiki.caltech.edu'
-        wobj.source = 'ginput version {}'.format(__version__)
-        wobj.title = 'GGG2020 TCCON prior profiles'
-
-        creation_note = 'ginput (commit {})'.format(mod_utils.vcs_commit_info()[0])
-        ioutils.add_creation_info(wobj, creation_note, creation_att_name='history')
+        _write_ncdf_map_attributes(wobj, wet_or_dry=wet_or_dry, no_cfunits=no_cfunits)
 
         # ggg-specific attributes
         wobj.file_latitude = file_lat
         wobj.file_longitude = file_lon
         wobj.file_datetime = obs_date.strftime('%Y-%m-%d %H:%M:%S UTC')
         wobj.tccon_site = obs_site
-        wobj.tccon_site_full_name = tccon_sites.site_dict[obs_site]['name'] if obs_site in tccon_sites.site_dict else 'N/A'
-        wobj.constant_avogadros_number = mod_constants.avogadro
-        wobj.constant_avogadros_number_units = 'molecules.mole-1'  # CF convention would be '1.66053878316273e-24 1' which is just ugly
-        wobj.constant_mass_dry_air = mod_constants.mass_dry_air
-        wobj.constant_mass_dry_air_units = _cfunits('kg/mol', no_cfunits=no_cfunits)
-        wobj.constant_mass_h2o = mod_constants.mass_h2o
-        wobj.constant_mass_h2o_units = _cfunits('kg/mol', no_cfunits=no_cfunits)
+        wobj.tccon_site_full_name = _tccon_site_full_name(obs_site)
+
+
+def write_consolidated_map_file(map_file, vmr_files, mod_files, site_abbrevs, wet_or_dry='wet', no_cfunits=False,
+                                vmr_data=None, mod_data=None, complevel=4):
+    """
+    Write many priors into one netCDF .map file with time and site dimensions
+
+    Writing one netCDF file per profile produces very many small files with the same metadata repeated in each. This
+    instead stores the profiles for any number of sites and times (typically one site-day or site-month) in a single
+    compressed file, with each profile in its own chunk so that :func:`readers.read_map_file` can extract one profile
+    efficiently. Since the .vmr altitude grid may differ between profiles, the altitude is stored as a variable along
+    the time, site and level dimensions. Site/time combinations with no profile, and levels beyond the end of shorter
+    profiles, are filled with NaNs.
+
+    :param map_file: the path to write the consolidated .map.nc file to.
+    :param vmr_files: the paths to the .vmr files to read the gas concentrations from. If ``vmr_data`` is given, these
+     are only used to report errors and need not exist.
+    :param mod_files: the paths to the .mod files to read the met variables from, in the same order as ``vmr_files``.
+     If ``mod_data`` is given, these need not exist.
+    :param site_abbrevs: the site abbreviation for each profile, or a single abbreviation to use for all of them.
+    :param wet_or_dry: whether to write wet or dry mole fractions.
+    :param no_cfunits: if True, then will not format unit strings if CFUnits failed to import. Has no effect if CFUnits
+     did import successfully.
+    :param vmr_data: optional, a list of the contents of the .vmr files as returned by :func:`readers.read_vmr_file`.
+     Elements that are ``None`` are read from the corresponding file.
+    :param mod_data: optional, a list of the contents of the .mod files as returned by :func:`readers.read_mod_file`.
+     Elements that are ``None`` are read from the corresponding file.
+    :param complevel: the zlib compression level (1-9) for the profile variables.
+    :return: none, writes the .map.nc file.
+    """
+    if wet_or_dry not in ('wet', 'dry'):
+        raise ValueError('wet_or_dry must be "wet" or "dry"')
+
+    nprof = len(vmr_files)
+    if len(mod_files) != nprof:
+        raise ValueError('vmr_files and mod_files must be the same length')
+    if isinstance(site_abbrevs, str):
+        site_abbrevs = [site_abbrevs] * nprof
+    elif len(site_abbrevs) != nprof:
+        raise ValueError('site_abbrevs must be a string or have the same length as vmr_files')
+    if vmr_data is None:
+        vmr_data = [None] * nprof
+    if mod_data is None:
+        mod_data = [None] * nprof
+
+    profiles = []
+    for vmr_file, mod_file, site, vmrdat, moddat in zip(vmr_files, mod_files, site_abbrevs, vmr_data, mod_data):
+        if vmrdat is None:
+            vmrdat = readers.read_vmr_file(vmr_file)
+        if moddat is None:
+            moddat = readers.read_mod_file(mod_file)
+        mapdat, obs_lat = _merge_and_convert_mod_vmr(vmrdat, moddat, wet_or_dry=wet_or_dry)
+        profiles.append((site, moddat['file']['datetime'], mapdat, obs_lat, moddat['file'], vmr_file))
+
+    if nprof == 0:
+        raise ValueError('No profiles given to write to {}'.format(map_file))
+
+    sites = list(OrderedDict.fromkeys(p[0] for p in profiles))
+    times = sorted(set(p[1] for p in profiles))
+    site_inds = {s: i for i, s in enumerate(sites)}
+    time_inds = {t: i for i, t in enumerate(times)}
+    nlev = max(p[2]['Height'].size for p in profiles)
+
+    shape2d = (len(times), len(sites))
+    gas_data = {v: np.full(shape2d + (nlev,), np.nan) for v in _map_var_order}
+    lat_data = np.full(shape2d, np.nan)
+    file_lat_data = np.full(shape2d, np.nan)
+    file_lon_data = np.full(shape2d, np.nan)
+    filled = np.zeros(shape2d, dtype=bool)
+
+    for site, date, mapdat, obs_lat, file_vars, vmr_file in profiles:
+        it, isite = time_inds[date], site_inds[site]
+        if filled[it, isite]:
+            raise ValueError('Multiple profiles given for site {} at {} (including {})'.format(site, date, vmr_file))
+        filled[it, isite] = True
+
+        for varname, arr in gas_data.items():
+            arr[it, isite, :mapdat[varname].size] = mapdat[varname]
+        lat_data[it, isite] = obs_lat
+        file_lat_data[it, isite] = file_vars['lat']
+        file_lon_data[it, isite] = file_vars['lon']
+
+    with ncdf.Dataset(map_file, 'w') as wobj:
+        levdim = wobj.createDimension('level', nlev)
+        timedim = ioutils.make_nctimedim_helper(wobj, 'time', np.array(times), time_units='hours', long_name='time')
+        sitedim = ioutils.make_ncstrdim_helper(wobj, 'site', sites, long_name='TCCON site abbreviation')
+        ioutils.make_ncvar_helper(wobj, 'site_full_name', np.array([_tccon_site_full_name(s) for s in sites]),
+                                  dims=[sitedim], long_name='TCCON site name')
+
+        # Each profile gets its own chunk so that reading a single profile only decompresses that profile
+        create_kws = dict(zlib=True, complevel=complevel, fill_value=np.nan)
+        ioutils.make_ncvar_helper(wobj, 'lat', lat_data, dims=[timedim, sitedim], create_kws=create_kws,
+                                  units='degrees_north', long_name='latitude')
+        ioutils.make_ncvar_helper(wobj, 'file_latitude', file_lat_data, dims=[timedim, sitedim],
+                                  create_kws=create_kws, units='degrees_north',
+                                  long_name='latitude recorded in the input .mod file name')
+        ioutils.make_ncvar_helper(wobj, 'file_longitude', file_lon_data, dims=[timedim, sitedim],
+                                  create_kws=create_kws, units='degrees_east',
+                                  long_name='longitude recorded in the input .mod file name')
+
+        create_kws['chunksizes'] = (1, 1, nlev)
+        for varname in _map_var_order:
+            human_units = _map_canonical_units[varname]
+            cf_units = _cfunits(human_units, no_cfunits=no_cfunits)
+            if varname == 'Height':
+                # in a single-profile file, this is the altitude coordinate
+                ioutils.make_ncvar_helper(wobj, 'altitude', gas_data[varname], dims=[timedim, sitedim, levdim],
+                                          create_kws=create_kws, units=cf_units, full_units=human_units,
+                                          long_name='altitude', tccon_name='height')
+                continue
+
+            std_name = _map_standard_names[varname].format(w_or_d=wet_or_dry)
+            ioutils.make_ncvar_helper(wobj, varname.lower(), gas_data[varname], dims=[timedim, sitedim, levdim],
+                                      create_kws=create_kws, units=cf_units, full_units=human_units,
+                                      long_name=std_name)
+
+        _write_ncdf_map_attributes(wobj, wet_or_dry=wet_or_dry, no_cfunits=no_cfunits)
+        wobj.comment_consolidated = 'This file contains prior profiles for multiple sites and/or times. Site/time ' \
+                                    'combinations without a profile are filled with NaNs.'
+
+
+def _tccon_site_full_name(site_abbrev):
+    return tccon_sites.site_dict[site_abbrev]['name'] if site_abbrev in tccon_sites.site_dict else 'N/A'
+
+
+def _write_ncdf_map_attributes(wobj, wet_or_dry, no_cfunits=False):
+    # the file attributes, including ginput version, constants used, WMF message, etc. Global CF attributes to include
+    # are "comment", "Conventions" (?), "history", "institution", "references", "source", and "title"
+    wobj.comment_full_units = 'The full_units attribute provides a human-readable counterpart to the ' \
+                              'CF-compliant units attribute'
+    if wet_or_dry == 'wet':
+        wobj.comment_wet_mole_fractions = ' '.join(wmf_message)
+    wobj.comment_file_lat_lon = 'These are the latitude/longitude recorded in the input .mod file name. They ' \
+                                'may be rounded to the nearest degree.'
+    wobj.contact = 'Joshua Laughner (jlaugh@caltech.edu)'
+    wobj.Conventions = 'CF-1.7'
+    wobj.institution = 'California Institute of Technology, Pasadena, CA, USA'
+    wobj.references = 'https://tccon-wiki.caltech.edu'
+    wobj.source = 'ginput version {}'.format(__version__)
+    wobj.title = 'GGG2020 TCCON prior profiles'
+
+    creation_note = 'ginput (commit {})'.format(mod_utils.vcs_commit_info()[0])
+    ioutils.add_creation_info(wobj, creation_note, creation_att_name='history')
+
+    wobj.constant_avogadros_number = mod_constants.avogadro
+    wobj.constant_avogadros_number_units = 'molecules.mole-1'  # CF convention would be '1.66053878316273e-24 1' which is just ugly
+    wobj.constant_mass_dry_air = mod_constants.mass_dry_air
+    wobj.constant_mass_dry_air_units = _cfunits('kg/mol', no_cfunits=no_cfunits)
+    wobj.constant_mass_h2o = mod_constants.mass_h2o
+    wobj.constant_mass_h2o_units = _cfunits('kg/mol', no_cfunits=no_cfunits)
 
 
 def write_vmr_file(vmr_file, tropopause_alt, profile_date, profile_lat, profile_alt, profile_gases, gas_name_order=None,
-                   extra_header_info=None):
+                   extra_header_info=None, consolidate=False):
     """
     Write a new-style .vmr file (without seasonal cycle, secular trends, and latitudinal gradients
 
@@ -291,6 +469,11 @@ def write_vmr_file(vmr_file, tropopause_alt, profile_date, profile_lat, profile_
      header in the .vmr. If a list, must be a list of strings. If a dict, each line will be formatted as "key: value"
      and the keys/values may be any type.
 
+    :param consolidate: if ``True``, the profile is added to the monthly consolidated netCDF file (see
+     :func:`mod_utils.consolidated_file_name`) instead of being written as a text file. :func:`readers.read_vmr_file`
+     will still read it given ``vmr_file``.
+    :type consolidate: bool
+
     :return: none, writes the .vmr file.
     """
 
@@ -336,17 +519,33 @@ def write_vmr_file(vmr_file, tropopause_alt, profile_date, profile_lat, profile_
                 + [' ' + l for l in extra_header_info] \
                 + [' '.join(table_header)]
 
-    with open(vmr_file, 'w') as fobj:
-        _write_header(fobj, header_lines, len(gas_name_order) + 1)
-        for i in range(np.size(profile_alt)):
-            fobj.write(alt_fmt.format(profile_alt[i]))
-            for gas_name in gas_name_order:
-                if gas_name_mapping[gas_name] is not None:
-                    gas_conc = profile_gases[gas_name_mapping[gas_name]][i]
-                else:
-                    gas_conc = 0.0
-                fobj.write(gas_fmt.format(gas_conc))
-            fobj.write('\n')
+    # Assemble the whole data table as one array so that each row can be formatted in a single operation, rather than
+    # writing one value at a time. Gases missing from profile_gases are written as zeros.
+    data_table = np.zeros((np.size(profile_alt), len(gas_name_order) + 1))
+    data_table[:, 0] = profile_alt
+    for j, gas_name in enumerate(gas_name_order, start=1):
+        if gas_name_mapping[gas_name] is not None:
+            data_table[:, j] = profile_gases[gas_name_mapping[gas_name]]
+    row_fmt = alt_fmt + gas_fmt * len(gas_name_order)
+
+    # Build the text in memory first; it is needed both for the consolidated file and the profile file cache
+    buf = io.StringIO()
+    _write_header(buf, header_lines, len(gas_name_order) + 1)
+    buf.write(''.join([row_fmt.format(*row) + '\n' for row in data_table.tolist()]))
+    vmr_text = buf.getvalue()
+
+    if consolidate:
+        # Parse the text back so that the consolidated file holds exactly the values that would have been read from
+        # the text file.
+        vmr_data = readers.parse_vmr_lines(vmr_text.splitlines(), lowercase_names=False)
+        del vmr_data['prior_info']
+        ioutils.write_consolidated_profile(mod_utils.consolidated_file_name(vmr_file), os.path.basename(vmr_file),
+                                           vmr_data)
+    else:
+        with open(vmr_file, 'w') as fobj:
+            fobj.write(vmr_text)
+
+    readers.cache_profile_file(vmr_file, vmr_text)
 
 
 def _write_header(fobj, header_lines, n_data_columns):
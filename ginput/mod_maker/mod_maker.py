@@ -100,12 +100,12 @@ from pydap.cas.urs import setup_session # used to connect to the merra opendap s
 import xarray
 import warnings
 
-from ..common_utils import mod_utils, run_utils
+from ..common_utils import mod_utils, run_utils, readers, ioutils
 from ..common_utils.mod_utils import gravity, check_site_lat_lon_alt
 from ..common_utils.mod_constants import ratio_molec_mass as rmm, p_ussa, t_ussa, z_ussa, mass_dry_air, COSource
 from ..common_utils.ggg_logging import logger
 from .slantify import * # code to make slant paths
-from .tccon_sites import site_dict, tccon_site_info, tccon_site_info_for_date
+from .tccon_sites import site_dict, tccon_site_info, TCCONSiteIndex
 
 
 ####################
@@ -211,7 +211,8 @@ def build_mod_fmt_strings(var_order):
     return header_names, header_units, var_name_mapping, data_fmt
 
 
-def write_mod(mod_path, version, site_lat, data=0, surf_data=0, func=None, muted=False, slant=False, chem_vars=False, co_source=None):
+def write_mod(mod_path, version, site_lat, data=0, surf_data=0, func=None, muted=False, slant=False, chem_vars=False, co_source=None,
+              consolidate=False):
     """
     Creates a GGG-format .mod file
     INPUTS:
@@ -220,6 +221,8 @@ def write_mod(mod_path, version, site_lat, data=0, surf_data=0, func=None, muted
         site_lat: site latitude (-90 to 90)
         data: dictionary of the inputs
         surf_data: dictionary of the surface inputs (for merra/geos5)
+        consolidate: if True, add the profile to the monthly consolidated netCDF file
+            (see mod_utils.consolidated_file_name) instead of writing a text .mod file
     """
 
     # Output scaling: define factors to multiply values by before writing to the .mod file. If a column name is not
@@ -418,8 +421,15 @@ def write_mod(mod_path, version, site_lat, data=0, surf_data=0, func=None, muted
 
     output_dict['constants'] = {k: v for k, v in zip(mod_constant_names, mod_constants)}
 
-    with open(mod_path,'w') as outfile:
-        outfile.writelines(mod_content)
+    mod_text = ''.join(mod_content)
+    if consolidate:
+        # Parse the formatted text back so the consolidated file holds exactly what the text file would have
+        mod_data = readers.parse_mod_lines(mod_text.splitlines(), mod_path)
+        ioutils.write_consolidated_profile(mod_utils.consolidated_file_name(mod_path), os.path.basename(mod_path), mod_data)
+    else:
+        with open(mod_path,'w') as outfile:
+            outfile.write(mod_text)
+    readers.cache_profile_file(mod_path, mod_text)
 
     if not muted:
         print(mod_path)
@@ -1045,6 +1055,15 @@ def _add_common_args(parser):
     parser.add_argument('-f', '--flat-outdir', action='store_true',
                         help='Write the .mod files directly to the specified output directory, rather than organizing '
                              'by product/site/vertical or slant.')
+    parser.add_argument('--precision', choices=('double', 'single'), default='double',
+                        help='Floating point precision to use for the interpolation, potential temperature, and '
+                             'equivalent latitude calculations. "single" uses about half the memory and is faster, '
+                             'but the output will differ slightly from the default "%(default)s". Only used by the '
+                             'new mod_maker modes.')
+    parser.add_argument('--consolidate', action='store_true',
+                        help='Write the profiles to one netCDF file per site per month instead of individual .mod '
+                             'files. The readers in ginput read these transparently in place of the .mod files. Only '
+                             'used by the new mod_maker modes.')
 
 
 def parse_args(parser=None):
@@ -1156,13 +1175,14 @@ def GEOS_files(GEOS_path, start_date, end_date, chm=False):
     return select_files,select_dates
 
 
-def equivalent_latitude_functions_geos(GEOS_path, start_date=None, end_date=None, muted=False, **kwargs):
+def equivalent_latitude_functions_geos(GEOS_path, start_date=None, end_date=None, muted=False, precision='double', **kwargs):
     """
     Inputs:
         - GEOS_path: full path to the folder containing GEOS5-fpit files, an 'Np' folder with 3-hourly files is expected under that path
         - start_date: datetime object
         - end_date: datetime object (exclusive)
         - muted: if True there will be no print statements
+        - precision: 'double' or 'single', the floating point precision to do the calculations in
     Outputs:
         - func_dict: list of functions, at each dataset time, to get equivalent latitude for a given PV and PT
 
@@ -1178,10 +1198,11 @@ def equivalent_latitude_functions_geos(GEOS_path, start_date=None, end_date=None
     if not muted:
         print('\nGenerating equivalent latitude functions for {} times'.format(len(select_dates)))
 
-    return equivalent_latitude_functions_from_geos_files(select_files, select_dates, muted=muted)
+    return equivalent_latitude_functions_from_geos_files(select_files, select_dates, muted=muted, precision=precision)
 
 
-def equivalent_latitude_functions_native_geos(GEOS_path, start_date=None, end_date=None, muted=False, **kwargs):
+def equivalent_latitude_functions_native_geos(GEOS_path, start_date=None, end_date=None, muted=False, precision='double',
+                                              **kwargs):
     """
     Generate equivalent latitude interpolators from native (72 eta level) GEOS files.
 
@@ -1198,6 +1219,10 @@ def equivalent_latitude_functions_native_geos(GEOS_path, start_date=None, end_da
     :param muted: set to ``True`` to disable logging to the console.
     :type muted: bool
 
+    :param precision: "double" or "single", the floating point precision to compute potential temperature and
+     equivalent latitude in.
+    :type precision: str
+
     :param kwargs: unused, swallows extra keyword arguments.
 
     :return: dictionary of equivalent latitude intepolators, the keys will be the datetime of the interpolators
@@ -1209,10 +1234,12 @@ def equivalent_latitude_functions_native_geos(GEOS_path, start_date=None, end_da
     if not muted:
         print('\nGenerating equivalent latitude functions for {} native GEOS files'.format(len(select_dates)))
 
-    return equivalent_latitude_functions_from_native_geos_files(select_files, select_dates, muted=muted)
+    return equivalent_latitude_functions_from_native_geos_files(select_files, select_dates, muted=muted,
+                                                                precision=precision)
 
 
-def equivalent_latitude_functions_from_geos_files(geos_np_files, geos_dates, muted=False):
+def equivalent_latitude_functions_from_geos_files(geos_np_files, geos_dates, muted=False, precision='double'):
+    dtype = mod_utils.precision_to_dtype(precision)
     # Use any file for stuff that is the same in all files
     with netCDF4.Dataset(geos_np_files[0], 'r') as dataset:
         lat = dataset['lat'][:]
@@ -1230,7 +1257,7 @@ def equivalent_latitude_functions_from_geos_files(geos_np_files, geos_dates, mut
     # pre-compute pressure coefficients for calculating potential temperature, this is the (Po/P)^(R/Cp) term
     # TODO: test replacement with mod_utils potential temperature function
     coeff = (1000.0 / pres) ** 0.286
-    coeff_mat = np.zeros([nlev, nlat, nlon])
+    coeff_mat = np.zeros([nlev, nlat, nlon], dtype=dtype)
     for i in range(nlat):
         for j in range(nlon):
             coeff_mat[:, i, j] = coeff
@@ -1252,7 +1279,7 @@ def equivalent_latitude_functions_from_geos_files(geos_np_files, geos_dates, mut
             PT = (dataset['T'][0] * coeff_mat).data  # Compute potential temperature
             EPV = (dataset['EPV'][0].data) * 1e6  # Potential vorticity in PVU = 1e-6 K . m2 / kg / s
 
-        func_dict[date] = mod_utils.calculate_eq_lat(EPV, PT, area)
+        func_dict[date] = mod_utils.calculate_eq_lat(EPV, PT, area, dtype=dtype)
 
         end = time.time()
         nmin.append(int(end - start) / 60.0)
@@ -1267,7 +1294,7 @@ def equivalent_latitude_functions_from_geos_files(geos_np_files, geos_dates, mut
     return func_dict
 
 
-def equivalent_latitude_functions_from_native_geos_files(geos_nv_files, geos_dates, muted=False):
+def equivalent_latitude_functions_from_native_geos_files(geos_nv_files, geos_dates, muted=False, precision='double'):
     """
     Generate equivalent latitude interpolators from native GEOS FP(-IT) files
 
@@ -1281,10 +1308,17 @@ def equivalent_latitude_functions_from_native_geos_files(geos_nv_files, geos_dat
     :param muted: set to ``True`` to disable some logging to console.
     :type muted: bool
 
+    :param precision: "double" or "single", the floating point precision to compute potential temperature and
+     equivalent latitude in.
+    :type precision: str
+
     :return: a dictionary of equivalent latitude interpolators. THe keys will be the dates of the GEOS files, there will
      be one interpolator per GEOS file.
     :rtype: dict
     """
+    dtype = mod_utils.precision_to_dtype(precision)
+    # Passing dtype=None to convert_geos_eta_coord keeps the original promotion to double precision
+    pres_dtype = None if precision == 'double' else dtype
     func_dict = dict()
     start = time.time()
     for idx, (geos_file, date) in enumerate(zip(geos_nv_files, geos_dates)):
@@ -1293,7 +1327,7 @@ def equivalent_latitude_functions_from_native_geos_files(geos_nv_files, geos_dat
             lat = dataset['lat'][:]
             lat[np.abs(lat) < 0.001] = 0.0
             lon = dataset['lon'][:]
-            pres = mod_utils.convert_geos_eta_coord(dataset['DELP'][0])
+            pres = mod_utils.convert_geos_eta_coord(dataset['DELP'][0], dtype=pres_dtype)
             EPV = dataset['EPV'][0] * 1e6
             PT = mod_utils.calculate_potential_temperature(pres, dataset['T'][0])
 
@@ -1304,7 +1338,7 @@ def equivalent_latitude_functions_from_native_geos_files(geos_nv_files, geos_dat
 
         # The native 72-level geos files are ordered space-to-surface. The equivalent latitude calculation *may* be okay
         # with that, but I felt it was safer to just go ahead and flip them.
-        func_dict[date] = mod_utils.calculate_eq_lat(np.flip(EPV, axis=0), np.flip(PT, axis=0), area)
+        func_dict[date] = mod_utils.calculate_eq_lat(np.flip(EPV, axis=0), np.flip(PT, axis=0), area, dtype=dtype)
     print("It took {:.1f} minutes to generate equivalent latitude functions for {} GEOS files".format((time.time()-start)/60.0,len(geos_nv_files)))
 
     return func_dict
@@ -1425,7 +1459,8 @@ def show_interp(data,x,y,interp_data,ilev,pres):
 
 
 def load_chem_variables(geos_file, geos_vars, target_site_dicts, pres_levels=None,
-                        muted=False):
+                        muted=False, precision='double'):
+    dtype = mod_utils.precision_to_dtype(precision)
     if not mod_utils.is_geos_on_native_grid(geos_file):
         raise NotImplementedError('GEOS chemistry file ({}) does not appear to be on the native eta grid. This case '
                                   'has not been implemented.')
@@ -1445,13 +1480,14 @@ def load_chem_variables(geos_file, geos_vars, target_site_dicts, pres_levels=Non
                 # to be surface-to-space.
                 geos_data[var] = np.flipud(geos_data[var])
 
-        geos_pres = mod_utils.convert_geos_eta_coord(dataset['DELP'][0].filled(np.nan))
+        geos_pres = mod_utils.convert_geos_eta_coord(dataset['DELP'][0].filled(np.nan),
+                                                     dtype=None if precision == 'double' else dtype)
         geos_data['pres'] = np.flipud(geos_pres)
 
     # Handle the lat/lon interpolation
     nlevels = np.size(pres_levels) if pres_levels is not None else geos_data['pres'].shape[0]
     nsites = len(target_site_dicts)
-    site_data = {v: np.full([nlevels, nsites], np.nan) for v in geos_vars}
+    site_data = {v: np.full([nlevels, nsites], np.nan, dtype=dtype) for v in geos_vars}
 
     for site, subdict in target_site_dicts.items():
         slat = subdict['lat']
@@ -1460,7 +1496,7 @@ def load_chem_variables(geos_file, geos_vars, target_site_dicts, pres_levels=Non
                                                         box_lat_half_width=box_lat_half_width,
                                                         box_lon_half_width=box_lon_half_width)
 
-    interp_geos_data = interp_geos_data_to_sites(geos_data, lat, lon, target_site_dicts, muted=muted)
+    interp_geos_data = interp_geos_data_to_sites(geos_data, lat, lon, target_site_dicts, muted=muted, dtype=dtype)
 
     # Interpolate to the standard pressure levels. Do this in log-log space since pressure and concentration typically
     # vary exponentially with altitude. If no pressure levels given, then assume we are working with the native files
@@ -1484,7 +1520,7 @@ def load_chem_variables(geos_file, geos_vars, target_site_dicts, pres_levels=Non
     return site_data
 
 
-def interp_geos_data_to_sites(DATA, lat, lon, site_dict, varlist=None, muted=False):
+def interp_geos_data_to_sites(DATA, lat, lon, site_dict, varlist=None, muted=False, dtype=np.float64):
     """
     Interpolate GEOS data to the lat/lon of the sites where .mod files are needed.
 
@@ -1507,6 +1543,9 @@ def interp_geos_data_to_sites(DATA, lat, lon, site_dict, varlist=None, muted=Fal
     :param muted: set to ``True`` to silence progress messages
     :type muted: bool
 
+    :param dtype: the floating point type for the output arrays of 3D variables.
+    :type dtype: type
+
     :return: a dictionary of GEOS variables as masked arrays, interpolated to the site lat/lons. The arrays will be
      nlevels-by-nsites.
     :rtype: dict
@@ -1535,7 +1574,7 @@ def interp_geos_data_to_sites(DATA, lat, lon, site_dict, varlist=None, muted=Fal
             if DATA[var].ndim == 2:
                 interp_data[var] = lat_lon_interp(DATA[var], lat, lon, new_lats, new_lons, ids_list)
             else:
-                interp_data[var] = np.zeros([nlev, nsite])
+                interp_data[var] = np.zeros([nlev, nsite], dtype=dtype)
                 for ilev, level_data in enumerate(DATA[var]):
                     # JLL 2023-008-29: for whatever reason, numpy 1.24.4 doesn't like assigning a list of arrays
                     # to an array element, but it is okay converting that list to an equivalent 2D array and assigning that.
@@ -1676,7 +1715,8 @@ def extrapolate_to_surface(var_to_interp, INTERP_DATA, SLANT_DATA=None):
 
 def mod_maker_new(start_date=None, end_date=None, func_dict=None, GEOS_path=None, chem_path=None, locations=site_dict,
                   slant=False, muted=False, lat=None, lon=None, alt=None, site_abbrv=None, save_path=None, product='fpit',
-                  keep_latlon_prec=False, save_in_utc=True, native_files=False, chem_variables=tuple(), flat_outdir=False, **kwargs):
+                  keep_latlon_prec=False, save_in_utc=True, native_files=False, chem_variables=tuple(), flat_outdir=False,
+                  precision='double', consolidate=False, **kwargs):
     """
     This code only works with GEOS-5 FP-IT data.
     It generates MOD files for all sites between start_date and end_date on GEOS-5 times (every 3 hours)
@@ -1693,6 +1733,10 @@ def mod_maker_new(start_date=None, end_date=None, func_dict=None, GEOS_path=None
         - (optional) lon: longitude in [0,360] range
         - (optional) alt: altitude (meters)
         - (optional) site_abbrv: two letter site abbreviation
+        - (optional) precision: 'double' (default) or 'single', the floating point precision to read the GEOS fields
+          and do the interpolation in. 'single' keeps the GEOS data in the precision it is stored in.
+        - (optional) consolidate: if True, write the profiles to monthly consolidated netCDF files instead of
+          individual .mod files
     Outputs:
         - .mod files at every GEOS5 time within the given date range
 
@@ -1759,12 +1803,19 @@ def mod_maker_new(start_date=None, end_date=None, func_dict=None, GEOS_path=None
                                'went wrong when looking for these files.')
 
     nsite = len(locations)
+    dtype = mod_utils.precision_to_dtype(precision)
+    # When computing in double precision, leave the data types as they were read, numpy will promote as needed
+    cast_dtype = None if precision == 'double' else dtype
+
+    # Resolve the site locations for all the GEOS times at once, rather than searching each site's time spans for
+    # every date.
+    site_dicts_by_date = TCCONSiteIndex(locations).info_for_dates(select_dates)
 
     start = time.time()
     mod_dicts = dict()
 
     for date_ID, UTC_date in enumerate(select_dates):
-        site_dict = tccon_site_info_for_date(UTC_date, site_dict_in=locations)
+        site_dict = site_dicts_by_date[UTC_date]
         mod_dicts[UTC_date] = dict()
         start_it = time.time()
 
@@ -1787,6 +1838,8 @@ def mod_maker_new(start_date=None, end_date=None, func_dict=None, GEOS_path=None
                 # Taking dataset[var][0] is equivalent to dataset[var][0,:,:,:], which since there's only one time per
                 # file just cuts the data from 4D to 3D
                 DATA[var] = dataset[var][0]
+                if cast_dtype is not None:
+                    DATA[var] = DATA[var].astype(cast_dtype)
                 if file_is_native and DATA[var].shape[0] == 72:
                     # The native 72 eta level files are organized space-to-surface vertically; the 42 fixed pressure
                     # level files are surface-to-space. We want the latter so we need to flip the vertical dimension
@@ -1794,7 +1847,7 @@ def mod_maker_new(start_date=None, end_date=None, func_dict=None, GEOS_path=None
                     DATA[var] = np.flipud(DATA[var])
 
             if file_is_native:
-                pres_levels = mod_utils.convert_geos_eta_coord(dataset['DELP'][0])
+                pres_levels = mod_utils.convert_geos_eta_coord(dataset['DELP'][0], dtype=cast_dtype)
                 pres_levels = np.flipud(pres_levels)
             else:
                 pres_levels = dataset['lev'][:]
@@ -1825,6 +1878,8 @@ def mod_maker_new(start_date=None, end_date=None, func_dict=None, GEOS_path=None
         with netCDF4.Dataset(select_surf_files[date_ID],'r') as dataset:
             for var in surf_varlist:
                 SURF_DATA[var] = dataset[var][0]
+                if cast_dtype is not None:
+                    SURF_DATA[var] = SURF_DATA[var].astype(cast_dtype)
 
         if not muted:
             print('\t-Interpolate to (lat,lon) of sites ...')
@@ -1833,10 +1888,10 @@ def mod_maker_new(start_date=None, end_date=None, func_dict=None, GEOS_path=None
         # on fixed pressure levels, and need to interpolate anyway. If using a fixed pressure level file, we've
         # broadcast the pressure levels to be the same size as the rest of the 3D variables.
         INTERP_DATA = interp_geos_data_to_sites(DATA, lat=lat, lon=lon, site_dict=site_dict, varlist=varlist,
-                                                muted=muted)
+                                                muted=muted, dtype=dtype)
 
         INTERP_SURF_DATA = interp_geos_data_to_sites(SURF_DATA, lat=lat, lon=lon, site_dict=site_dict,
-                                                     varlist=surf_varlist, muted=muted)
+                                                     varlist=surf_varlist, muted=muted, dtype=dtype)
 
         ##############################################################################
         # Handle some variable conversions/custom calculations for the met variables #
@@ -1870,7 +1925,8 @@ def mod_maker_new(start_date=None, end_date=None, func_dict=None, GEOS_path=None
         # If requested, load the chemistry data and incorporate it into the existing dictionaries.
         if do_load_chem:
             chem_plevs = None if native_files else mod_utils._std_model_pres_levels
-            CHEM_DATA = load_chem_variables(select_chem_files[date_ID], chem_variables, site_dict, pres_levels=chem_plevs)
+            CHEM_DATA = load_chem_variables(select_chem_files[date_ID], chem_variables, site_dict, pres_levels=chem_plevs,
+                                            precision=precision)
             for site in INTERP_DATA.keys():
                 INTERP_DATA[site]['prof'].update(CHEM_DATA[site]['prof'])
 
@@ -1947,7 +2003,7 @@ def mod_maker_new(start_date=None, end_date=None, func_dict=None, GEOS_path=None
                         NEW_INTERP_DATA[var] = lat_lon_interp(DATA[var],lat,lon,slant_lat,slant_lon,IDs_list)
                         continue
 
-                    NEW_INTERP_DATA[var] = np.zeros([nlev,len(IDs_list)])
+                    NEW_INTERP_DATA[var] = np.zeros([nlev,len(IDs_list)], dtype=dtype)
                     for ilev,level_data in enumerate(DATA[var]):
                         NEW_INTERP_DATA[var][ilev] = lat_lon_interp(level_data,lat,lon,slant_lat,slant_lon,IDs_list)
                 if not muted:
@@ -2050,7 +2106,8 @@ def mod_maker_new(start_date=None, end_date=None, func_dict=None, GEOS_path=None
             mod_file_path = os.path.join(vertical_mod_path,mod_name)
             vertical_mod_dict = write_mod(mod_file_path,version,site_lat,data=INTERP_DATA[site]['prof']
                                           ,surf_data=INTERP_DATA[site]['surf'],func=func_dict[UTC_date],
-                                          muted=muted,slant=slant,chem_vars=do_load_chem,co_source=co_source)
+                                          muted=muted,slant=slant,chem_vars=do_load_chem,co_source=co_source,
+                                          consolidate=consolidate)
 
             if slant:
                 # write slant mod_file
@@ -2058,7 +2115,7 @@ def mod_maker_new(start_date=None, end_date=None, func_dict=None, GEOS_path=None
                     if not muted:
                         print('\t\t\t{:>20s} + slant'.format(''))
                     mod_file_path = os.path.join(slant_mod_path,mod_name)
-                    slant_mod_dict = write_mod(mod_file_path,version,site_lat,data=SLANT_DATA[site],surf_data=INTERP_DATA[site]['surf'],func=func_dict[UTC_date],muted=muted,slant=slant)
+                    slant_mod_dict = write_mod(mod_file_path,version,site_lat,data=SLANT_DATA[site],surf_data=INTERP_DATA[site]['surf'],func=func_dict[UTC_date],muted=muted,slant=slant,consolidate=consolidate)
             else:
                 slant_mod_dict = dict()
 
@@ -2299,7 +2356,8 @@ def runlog_driver(runlog, site_abbrv=None, first_date='2000-01-01', **kwargs):
 
 
 def driver(date_range, met_path, chem_path=None, save_path=None, keep_latlon_prec=False, save_in_utc=True, muted=False,
-           slant=False, alt=None, lon=None, lat=None, site_abbrv=None, mode=_default_mode, include_chm=True, flat_outdir=False, **kwargs):
+           slant=False, alt=None, lon=None, lat=None, site_abbrv=None, mode=_default_mode, include_chm=True, flat_outdir=False,
+           precision='double', consolidate=False, **kwargs):
     """
     Function that when called executes the full mod maker process as if called from the command line
 
@@ -2388,6 +2446,17 @@ def driver(date_range, met_path, chem_path=None, save_path=None, keep_latlon_pre
      subdirectories by product, site, and vertical/slant.
     :type flat_outdir: bool
 
+    :param precision: "double" or "single", the floating point precision to use for the interpolation, potential
+     temperature, and equivalent latitude calculations. "single" roughly halves the memory needed and is faster, but
+     gives slightly different .mod files; use :mod:`ginput.testing.precision_check` to quantify the differences. Only
+     used by the new mod_maker modes.
+    :type precision: str
+
+    :param consolidate: if ``True``, the profiles are written to one netCDF file per site per month (see
+     :func:`mod_utils.consolidated_file_name`) rather than to individual .mod files. Only used by the new mod_maker
+     modes.
+    :type consolidate: bool
+
     :param kwargs: unused, swallows extra keyword arguments
 
     :return: nothing, writes .mod files to the output directory.
@@ -2415,13 +2484,15 @@ def driver(date_range, met_path, chem_path=None, save_path=None, keep_latlon_pre
 
         chem_vars = ('CO',) if include_chm else tuple()
         product = mod_utils.mode_to_product(mode)
-        func_dict = eqlat_fxn(GEOS_path=met_path, start_date=start_date, end_date=end_date, muted=muted)
+        func_dict = eqlat_fxn(GEOS_path=met_path, start_date=start_date, end_date=end_date, muted=muted,
+                              precision=precision)
 
         for this_abbrv, this_lat, this_lon, this_alt in zip(site_abbrv, lat, lon, alt):
             mod_maker_new(start_date=start_date, end_date=end_date, func_dict=func_dict, GEOS_path=met_path,
                           chem_path=chem_path, chem_variables=chem_vars, slant=slant, locations=site_dict, muted=muted,
                           lat=this_lat, lon=this_lon, alt=this_alt, site_abbrv=this_abbrv, save_path=save_path, product=product,
-                          keep_latlon_prec=keep_latlon_prec, save_in_utc=save_in_utc, native_files=native_files, flat_outdir=flat_outdir)
+                          keep_latlon_prec=keep_latlon_prec, save_in_utc=save_in_utc, native_files=native_files, flat_outdir=flat_outdir,
+                          precision=precision, consolidate=consolidate)
     else:
         raise ValueError('mode "{}" is not one of the allowed values: {}'.format(
             mode, ', '.join(_old_modmaker_modes + _new_modmaker_modes)
@@ -1,3 +1,4 @@
+from bisect import bisect_right
 from collections import OrderedDict
 from copy import deepcopy
 from datetime import datetime
@@ -480,8 +481,9 @@ def tccon_site_info_for_date(date, site_abbrv=None, site_dict_in=None, use_close
      sites are returned.
     :type site_abbrv: str
 
-    :param site_dict_in: optional, if you have a site dictionary already prepared, you can pass it in to save a little
-     bit of time. Otherwise, the default dictionary will be loaded.
+    :param site_dict_in: optional, if you have a site dictionary already prepared, you can pass it in. Otherwise, the
+     default dictionary will be used. Note that to look up many dates for the same sites, it is faster to create a
+     :class:`TCCONSiteIndex` once and query that.
     :type site_dict_in: None or dict
 
     :param use_closest_in_time: controls what happens if you try to get a profile outside a defined time range. For
@@ -496,47 +498,141 @@ def tccon_site_info_for_date(date, site_abbrv=None, site_dict_in=None, use_close
      is ``None``, then it will be a dictionary of dictionaries, with the top dictionary having the site IDs as keys.
     :rtype: dict
     """
-    # Get the raw dictionary or ensure that the input has the lon_180 key.
-    new_site_dict = tccon_site_info() if site_dict_in is None else tccon_site_info(site_dict_in)
-    if use_closest_in_time == 'nullify':
-        use_closest_in_time_inner = False
+    if site_dict_in is None:
+        site_index = _get_default_site_index()
     else:
-        use_closest_in_time_inner = use_closest_in_time
+        site_index = TCCONSiteIndex(site_dict_in)
+    return site_index.info_for_date(date, site_abbrv=site_abbrv, use_closest_in_time=use_closest_in_time)
 
-    for site, info in new_site_dict.items():
-        # If a site has the time spans defined, then we need to find the one that has the date we're interested in
-        # Otherwise, we can just leave the entry for this site as-is and select the correct site at the end of the
-        # function.
-        if 'time_spans' not in info:
-            if site_dict_in is None:
-                # Require that any standard sites defined must specify a time period they were operational - 
-                # necessary for the mod/vmr automation        
-                raise TCCONSiteDefError('All sites must define the time spans they were operational')
-            else:
-                # if we were given a site then we shouldn't require it to specify a time period
-                lon = info['lon']
-                if lon > 180:
-                    info['lon_180'] = lon - 360
-                else:
-                    info['lon_180'] = lon
+
+class TCCONSiteIndex(object):
+    """
+    A precomputed lookup of site information by date.
+
+    Each site's time spans are sorted once when this is created, so that finding the site information for a date is
+    a binary search over the span start dates rather than a loop over all the spans with the site dictionaries
+    rebuilt each time. Use :meth:`info_for_date` in place of :func:`tccon_site_info_for_date` and
+    :meth:`info_for_dates` to resolve a whole series of dates at once.
+
+    :param site_dict_in: the site dictionary to index. If not given, the default one in this module is used. In that
+     case, every site must define its time spans.
+    :type site_dict_in: None or dict
+
+    :raises TCCONSiteDefError: if using the default site dictionary and a site does not define its time spans, or if
+     any site has overlapping time spans.
+    """
+    def __init__(self, site_dict_in=None):
+        full_site_dict = tccon_site_info(site_dict_in)
+        self._site_order = list(full_site_dict.keys())
+        self._span_starts = dict()
+        self._span_ends = dict()
+        self._span_infos = dict()
+
+        for site, info in full_site_dict.items():
+            if 'time_spans' not in info:
+                if site_dict_in is None:
+                    # Require that any standard sites defined must specify a time period they were operational -
+                    # necessary for the mod/vmr automation
+                    raise TCCONSiteDefError('All sites must define the time spans they were operational')
+                # Sites without time spans have the same information for all dates
+                self._span_starts[site] = None
+                self._span_ends[site] = None
+                self._span_infos[site] = [info]
                 continue
-        else:
-            time_spans = info.pop('time_spans')
 
-            try:
-                date_range = _find_time_span_for_date(date, time_spans.keys(), site, use_closest_in_time_inner)
-            except TCCONTimeSpanError:
-                if use_closest_in_time == 'nullify':
-                    new_site_dict[site] = None
-                else:
-                    raise
+            time_spans = info.pop('time_spans')
+            sorted_spans = sorted(time_spans.keys(), key=lambda span: span[0])
+            for prev_span, next_span in zip(sorted_spans[:-1], sorted_spans[1:]):
+                if prev_span[1] > next_span[0]:
+                    raise TCCONSiteDefError('Site "{}" has overlapping time spans: {} and {}'
+                                            .format(site, prev_span, next_span))
+
+            self._span_starts[site] = [span[0] for span in sorted_spans]
+            self._span_ends[site] = [span[1] for span in sorted_spans]
+            span_infos = []
+            for span in sorted_spans:
+                span_info = info.copy()
+                span_info.update(time_spans[span])
+                span_infos.append(span_info)
+            self._span_infos[site] = span_infos
+
+    @property
+    def sites(self):
+        """The site abbreviations in this index, in the order of the site dictionary"""
+        return tuple(self._site_order)
+
+    def info_for_date(self, date, site_abbrv=None, use_closest_in_time=True):
+        """
+        Get the information (lat, lon, alt, etc.) for one or all sites for a specific date.
+
+        The inputs and output are the same as :func:`tccon_site_info_for_date`. The returned dictionaries are new
+        copies, so they may be modified freely.
+        """
+        if site_abbrv is not None:
+            return self._site_info_for_date(site_abbrv, date, use_closest_in_time)
+
+        return OrderedDict((site, self._site_info_for_date(site, date, use_closest_in_time))
+                           for site in self._site_order)
+
+    def info_for_dates(self, dates, site_abbrv=None, use_closest_in_time=True):
+        """
+        Get the site information for each of a series of dates
+
+        :param dates: the dates to get site information for.
+        :type dates: iterable(datetime-like)
+
+        :param site_abbrv: if given, only get the information for this site. Otherwise all sites are included.
+        :type site_abbrv: str or None
+
+        :param use_closest_in_time: controls the behavior for dates outside the time spans of a site. See
+         :func:`tccon_site_info_for_date`.
+
+        :return: an ordered dictionary with the dates as keys and the output of :meth:`info_for_date` for that date as
+         the values.
+        :rtype: :class:`collections.OrderedDict`
+        """
+        return OrderedDict((date, self.info_for_date(date, site_abbrv=site_abbrv,
+                                                     use_closest_in_time=use_closest_in_time))
+                           for date in dates)
+
+    def _site_info_for_date(self, site, date, use_closest_in_time):
+        starts = self._span_starts[site]
+        infos = self._span_infos[site]
+        if starts is None:
+            return infos[0].copy()
+
+        ends = self._span_ends[site]
+        idx = bisect_right(starts, date) - 1
+        if idx >= 0 and date < ends[idx]:
+            return infos[idx].copy()
+
+        # Could not find one of the predefined time spans that match. This follows the same rules as
+        # _find_time_span_for_date: dates before or after all the time spans can use the first or last one,
+        # dates in a gap between time spans are not handled.
+        if use_closest_in_time is True:
+            if idx < 0:
+                return infos[0].copy()
+            elif date >= ends[-1]:
+                return infos[-1].copy()
             else:
-                info.update(time_spans[date_range])
+                raise NotImplementedError('The date requested ({date}) is outside the available dates '
+                                          '({first}-{last}) for {site}. This case is not yet implemented'
+                                          .format(date=date, first=(starts[0], ends[0]), last=(starts[-1], ends[-1]),
+                                                  site=site))
+        elif use_closest_in_time == 'nullify':
+            return None
+        else:
+            raise TCCONTimeSpanError('Could not find information for {} for {}'.format(site, date))
 
-    if site_abbrv is None:
-        return new_site_dict
-    else:
-        return new_site_dict[site_abbrv]
+
+_default_site_index = None
+
+
+def _get_default_site_index():
+    global _default_site_index
+    if _default_site_index is None:
+        _default_site_index = TCCONSiteIndex()
+    return _default_site_index
 
 
 def site_dict_to_flat_json(now_as_null=True, json_file=None, **json_kws):
@@ -11,19 +11,14 @@ point. A command line interface is also provided
 from __future__ import print_function, division
 
 import argparse
-from contextlib import contextmanager
 import datetime as dt
 from dateutil.relativedelta import relativedelta
-from functools import lru_cache
 import h5py
 from itertools import repeat, product
 import logging
 from multiprocessing import Pool
 import numpy as np
-from pathlib import Path
-import pickle
 import os
-import sys
 import traceback
 
 from ..common_utils import mod_utils, mod_constants
@@ -43,6 +38,9 @@ _fill_val = -999999
 # This will be used as a fill value for strings. It must be bytes b/c HDF5s do not accept fixed length unicode strings
 # so we use fixed length ASCII strings.
 _string_fill = b'N/A'
+# The maximum number of soundings whose priors are computed together. This bounds the memory used by the stratospheric
+# lookup, which interpolates the lookup tables to all the overworld levels of the soundings at once.
+_prior_batch_size = 1000
 
 
 class ErrorHandler(object):
@@ -165,6 +163,8 @@ def acos_interface_main(instrument, met_resampled_file, geos_files, output_file,
      is in Aug 2021, the MLO/SMO data will only be used up to June 2021 - but they *must* include data up to that
      month, or an error is raised.
 
+    :param interp_pickle_dir: no longer used, accepted so that existing callers still work.
+
     :return: None, writes results to the HDF5 ``output_file``.
     """
 
@@ -240,11 +240,21 @@ def acos_interface_main(instrument, met_resampled_file, geos_files, output_file,
         truncate_mlo_smo_date = None
         
 
-    eqlat_array = compute_sounding_equivalent_latitudes(sounding_pv=pv_array, sounding_theta=theta_array,
-                                                        sounding_datenums=datenum_array, sounding_qflags=qflag_array,
-                                                        geos_files=geos_files, nprocs=nprocs, prior_flags=prior_flags,
-                                                        eqlat_pickle_dir=interp_pickle_dir,
-                                                        error_handler=error_handler)
+    # Soundings already marked unusable by their met quality flag or an unparseable time are excluded up front, so only
+    # the valid soundings are carried through the eq. lat. and prior calculations. The others keep the fill values.
+    error_handler.set_flag(err_code_name='met_qual_flag', flags=prior_flags, inds=qflag_array != 0)
+    valid_soundings = np.flatnonzero(prior_flags == 0)
+    logger.info('{} of {} soundings are already flagged and will be skipped'.format(
+        prior_flags.size - valid_soundings.size, prior_flags.size))
+
+    valid_prior_flags = prior_flags[valid_soundings]
+    eqlat_array = np.full_like(pv_array, np.nan)
+    eqlat_array[valid_soundings] = compute_sounding_equivalent_latitudes(
+        sounding_pv=pv_array[valid_soundings], sounding_theta=theta_array[valid_soundings],
+        sounding_datenums=datenum_array[valid_soundings], sounding_qflags=qflag_array[valid_soundings],
+        geos_files=geos_files, prior_flags=valid_prior_flags, error_handler=error_handler
+    )
+    prior_flags[valid_soundings] = valid_prior_flags
 
     met_data['el'] = eqlat_array.reshape(orig_shape)
     prior_flags = prior_flags.reshape(flags_orig_shape)
@@ -281,6 +291,8 @@ def acos_interface_main(instrument, met_resampled_file, geos_files, output_file,
         record_class = tccon_priors.gas_records[gas]
         gas_record = record_class(**record_kws)
         gas_prior_flags = prior_flags.copy()
+        # (sounding group, footprint) indices of the soundings not flagged so far
+        prior_inds = [tuple(inds) for inds in np.argwhere(gas_prior_flags == 0)]
 
         # The keys here define the variable names that will be used in the HDF file. The values define the corresponding
         # keys in the output dictionaries from tccon_priors.generate_single_tccon_prior.
@@ -297,11 +309,13 @@ def acos_interface_main(instrument, met_resampled_file, geos_files, output_file,
         if nprocs == 0:
             profiles, units = _prior_serial(orig_shape=orig_shape, var_mapping=var_mapping, var_type_info=var_type_info,
                                             met_data=met_data, gas_record=gas_record, prior_flags=gas_prior_flags,
-                                            use_trop_eqlat=use_trop_eqlat, error_handler=error_handler)
+                                            use_trop_eqlat=use_trop_eqlat, error_handler=error_handler,
+                                            sounding_inds=prior_inds)
         else:
             profiles, units = _prior_parallel(orig_shape=orig_shape, var_mapping=var_mapping, var_type_info=var_type_info,
                                               met_data=met_data, gas_record=gas_record, prior_flags=gas_prior_flags, nprocs=nprocs,
-                                              use_trop_eqlat=use_trop_eqlat, error_handler=error_handler)
+                                              use_trop_eqlat=use_trop_eqlat, error_handler=error_handler,
+                                              sounding_inds=prior_inds)
 
         # Add latitude, longitude, and flags to the priors file
         profiles['sounding_longitude'] = met_data['longitude']
@@ -373,60 +387,118 @@ def _prior_helper(i_sounding, i_foot, qflag, mod_data, gas_record, var_mapping,
      have the same keys as ``var_mapping``
     :rtype: dict, dict
     """
-    obs_date = mod_data['file']['datetime']
-
-    if i_foot == 0:
-        logger.info('Processing set of soundings {}'.format(i_sounding + 1))
-
-    profiles = dict()
-    for k in var_mapping.keys():
-        fill_val = var_type_info[k][1] if k in var_type_info else np.nan
-        profiles[k] = np.full(mod_data['profile']['Height'].shape, fill_val)
-    units = {k: '' for k in var_mapping.keys()}
-
-    if qflag != 0:
-        logger.info('Quality flag != 0 for sounding group/footprint {}/{}. Skipping prior calculation'
-                    .format(i_sounding + 1, i_foot + 1))
-        error_handler.set_flag(err_code_name='met_qual_flag', flags=prior_flags, inds=(i_sounding, i_foot))
-        return profiles, None, prior_flags[i_sounding, i_foot]
-    elif prior_flags is not None and prior_flags[i_sounding, i_foot] != 0:
-        logger.info('Prior flag != 0 for sounding group/footprint {}/{}. Skipping prior calculation'
-                    .format(i_sounding + 1, i_foot + 1))
-        return profiles, None, prior_flags[i_sounding, i_foot]
-    elif obs_date < dt.datetime(1993, 1, 1):
-        # In the test met file I was given, one set of soundings had a date set to 20 Dec 1992, while the rest
-        # where on 14 May 2017. Since the 1992 date is close to 999999 seconds before 1 Jan 1993 and the dates
-        # are in TAI93 time, I assume these are fill values.
-        logger.important('Date before 1993 ({}) found, assuming this is a fill value and skipping '
-                         '(sounding group/footprint {}/{})'.format(obs_date, i_sounding + 1, i_foot + 1))
-        error_handler.set_flag(err_code_name='out_of_range_date', flags=prior_flags, inds=(i_sounding, i_foot))
-        return profiles, None, prior_flags[i_sounding, i_foot]
-    elif np.all(np.isnan(mod_data['profile']['Height'])):
-        logger.important('Profile at sounding group/footprint {}/{} is all fill values, not calculating prior'
-                         .format(i_sounding + 1, i_foot + 1))
-        error_handler.set_flag(err_code_name='no_data', flags=prior_flags, inds=(i_sounding, i_foot))
-        return profiles, None, prior_flags[i_sounding, i_foot]
+    return _prior_helper_batch([i_sounding], [i_foot], [qflag], [mod_data], gas_record, var_mapping, var_type_info,
+                               use_trop_eqlat=use_trop_eqlat, prior_flags=prior_flags, error_handler=error_handler)[0]
+
+
+def _prior_helper_batch(sounding_inds, footprint_inds, qflags, mod_dicts, gas_record, var_mapping, var_type_info,
+                        use_trop_eqlat=False, prior_flags=None, error_handler=_def_errh):
+    """
+    Generate the prior profiles for several soundings, in serial and parallel mode
+
+    The soundings that pass the quality checks are computed together with
+    :func:`tccon_priors.generate_tccon_priors_for_profiles`. If that fails, they are retried one at a time so that
+    only the soundings that caused the failure are flagged.
+
+    :param sounding_inds: the sounding group index of each sounding.
+    :type sounding_inds: sequence(int)
+
+    :param footprint_inds: the footprint index of each sounding.
+    :type footprint_inds: sequence(int)
+
+    :param qflags: the quality flag of each sounding.
+    :type qflags: sequence(int)
+
+    :param mod_dicts: the model data dictionary of each sounding.
+    :type mod_dicts: sequence(dict)
+
+    See :func:`_prior_helper` for the other inputs.
+
+    :return: a list with the outputs of :func:`_prior_helper` for each sounding.
+    :rtype: list(tuple)
+    """
+    results = []
+    valid_soundings = []
+    for i_sounding, i_foot, qflag, mod_data in zip(sounding_inds, footprint_inds, qflags, mod_dicts):
+        obs_date = mod_data['file']['datetime']
+
+        if i_foot == 0:
+            logger.info('Processing set of soundings {}'.format(i_sounding + 1))
+
+        profiles = dict()
+        for k in var_mapping.keys():
+            fill_val = var_type_info[k][1] if k in var_type_info else np.nan
+            profiles[k] = np.full(mod_data['profile']['Height'].shape, fill_val)
+        result = [profiles, None, None]
+        results.append(result)
+
+        if qflag != 0:
+            logger.info('Quality flag != 0 for sounding group/footprint {}/{}. Skipping prior calculation'
+                        .format(i_sounding + 1, i_foot + 1))
+            error_handler.set_flag(err_code_name='met_qual_flag', flags=prior_flags, inds=(i_sounding, i_foot))
+        elif prior_flags is not None and prior_flags[i_sounding, i_foot] != 0:
+            logger.info('Prior flag != 0 for sounding group/footprint {}/{}. Skipping prior calculation'
+                        .format(i_sounding + 1, i_foot + 1))
+        elif obs_date < dt.datetime(1993, 1, 1):
+            # In the test met file I was given, one set of soundings had a date set to 20 Dec 1992, while the rest
+            # where on 14 May 2017. Since the 1992 date is close to 999999 seconds before 1 Jan 1993 and the dates
+            # are in TAI93 time, I assume these are fill values.
+            logger.important('Date before 1993 ({}) found, assuming this is a fill value and skipping '
+                             '(sounding group/footprint {}/{})'.format(obs_date, i_sounding + 1, i_foot + 1))
+            error_handler.set_flag(err_code_name='out_of_range_date', flags=prior_flags, inds=(i_sounding, i_foot))
+        elif np.all(np.isnan(mod_data['profile']['Height'])):
+            logger.important('Profile at sounding group/footprint {}/{} is all fill values, not calculating prior'
+                             .format(i_sounding + 1, i_foot + 1))
+            error_handler.set_flag(err_code_name='no_data', flags=prior_flags, inds=(i_sounding, i_foot))
+        else:
+            valid_soundings.append((i_sounding, i_foot, mod_data, result))
+            continue
+        result[2] = prior_flags[i_sounding, i_foot]
+
+    _compute_sounding_priors(valid_soundings, gas_record, var_mapping, use_trop_eqlat=use_trop_eqlat,
+                             prior_flags=prior_flags, error_handler=error_handler)
+    return [tuple(r) for r in results]
+
+
+def _compute_sounding_priors(soundings, gas_record, var_mapping, use_trop_eqlat, prior_flags, error_handler):
+    # Fill in the [profiles, units, flag] result lists for the soundings (given as (i_sounding, i_foot, mod_data,
+    # result) tuples) that passed the checks in _prior_helper_batch.
+    if len(soundings) == 0:
+        return
 
     try:
         # 2021-11-08: adjusting the altitude grid caused undesired behavior in granule 210902202558s.
         # Specifially, altitude grids in one part of the world had their first level set to altitude = 0,
         # which significantly overestimated the seasonal drawdown. The simple fix for now is to turn off
         # that adjustment.
-        priors_dict, priors_units, priors_constants = tccon_priors.generate_single_tccon_prior(
-            mod_data, dt.timedelta(hours=0), gas_record, use_eqlat_trop=use_trop_eqlat, use_adjusted_zgrid=False
+        batch_results = tccon_priors.generate_tccon_priors_for_profiles(
+            [mod_data for _, _, mod_data, _ in soundings], dt.timedelta(hours=0), gas_record,
+            use_eqlat_trop=use_trop_eqlat, use_adjusted_zgrid=False
         )
     except Exception as err:
-        new_err = err.__class__(err.args[0] + ' Occurred at sounding = {}, footprint = {}'.format(i_sounding+1, i_foot+1))
-        error_handler.handle_err(new_err, err_code_name='prior_failure', flags=prior_flags, inds=(i_sounding, i_foot))
-        return profiles, None, prior_flags[i_sounding, i_foot]
-
-    for h5_var, tccon_var in var_mapping.items():
-        # The TCCON code returns profiles ordered surface-to-space. ACOS expects space-to-surface
-        profiles[h5_var] = np.flipud(priors_dict[tccon_var])
-        # Yes this will get set every time but only needs set once. Can optimize later if it's slow.
-        units[h5_var] = priors_units[tccon_var]
-
-    return profiles, units, prior_flags[i_sounding, i_foot]
+        if len(soundings) == 1:
+            i_sounding, i_foot, _, result = soundings[0]
+            new_err = err.__class__(err.args[0] + ' Occurred at sounding = {}, footprint = {}'.format(i_sounding+1, i_foot+1))
+            error_handler.handle_err(new_err, err_code_name='prior_failure', flags=prior_flags, inds=(i_sounding, i_foot))
+            result[2] = prior_flags[i_sounding, i_foot]
+            return
+        batch_results = None
+
+    if batch_results is None:
+        # At least one sounding made the whole batch fail, retry them one at a time to flag only the failing ones
+        for sounding in soundings:
+            _compute_sounding_priors([sounding], gas_record, var_mapping, use_trop_eqlat=use_trop_eqlat,
+                                     prior_flags=prior_flags, error_handler=error_handler)
+        return
+
+    for (i_sounding, i_foot, _, result), (priors_dict, priors_units, _) in zip(soundings, batch_results):
+        units = dict()
+        for h5_var, tccon_var in var_mapping.items():
+            # The TCCON code returns profiles ordered surface-to-space. ACOS expects space-to-surface
+            result[0][h5_var] = np.flipud(priors_dict[tccon_var])
+            units[h5_var] = priors_units[tccon_var]
+        result[1] = units
+        result[2] = prior_flags[i_sounding, i_foot]
 
 
 def _make_output_profiles_dict(orig_shape, var_mapping, var_type_info):
@@ -477,7 +549,7 @@ def _make_output_profiles_dict(orig_shape, var_mapping, var_type_info):
 
 
 def _prior_serial(orig_shape, var_mapping, var_type_info, met_data, gas_record, prior_flags=None, use_trop_eqlat=False,
-                  error_handler=_def_errh):
+                  error_handler=_def_errh, sounding_inds=None):
     """
     Generate the priors, running in serial mode.
 
@@ -487,22 +559,32 @@ def _prior_serial(orig_shape, var_mapping, var_type_info, met_data, gas_record,
      "el" variable.
     :type met_data: dict
 
+    :param sounding_inds: the (sounding group, footprint) indices of the soundings to generate priors for. The others
+     are left as fill values. If not given, all soundings are attempted.
+    :type sounding_inds: list(tuple(int, int))
+
     :return: profiles and units dictionaries; profiles contains the actual data, units strings describing the units of
      each array.
     :rtype: dict, dict
     """
     profiles, units = _make_output_profiles_dict(orig_shape, var_mapping, var_type_info)
     units_set = False
+    if sounding_inds is None:
+        sounding_inds = product(range(orig_shape[0]), range(orig_shape[1]))
 
-    for i_sounding in range(orig_shape[0]):
-        for i_foot in range(orig_shape[1]):
+    sounding_inds = list(sounding_inds)
 
-            mod_data = _construct_mod_dict(met_data, i_sounding, i_foot)
-            qflag = met_data['quality_flags'][i_sounding, i_foot]
+    # Soundings are computed in batches, see _prior_helper_batch
+    for ibatch in range(0, len(sounding_inds), _prior_batch_size):
+        batch_inds = sounding_inds[ibatch:ibatch + _prior_batch_size]
+        mod_dicts = [_construct_mod_dict(met_data, i_sounding, i_foot) for i_sounding, i_foot in batch_inds]
+        qflags = [met_data['quality_flags'][i_sounding, i_foot] for i_sounding, i_foot in batch_inds]
+        batch_sounding_inds, batch_footprint_inds = zip(*batch_inds)
 
-            this_profiles, this_units, _ = _prior_helper(i_sounding, i_foot, qflag, mod_data, gas_record,
-                                                         var_mapping, var_type_info, prior_flags=prior_flags,
-                                                         use_trop_eqlat=use_trop_eqlat, error_handler=error_handler)
+        batch_results = _prior_helper_batch(batch_sounding_inds, batch_footprint_inds, qflags, mod_dicts, gas_record,
+                                            var_mapping, var_type_info, prior_flags=prior_flags,
+                                            use_trop_eqlat=use_trop_eqlat, error_handler=error_handler)
+        for (i_sounding, i_foot), (this_profiles, this_units, _) in zip(batch_inds, batch_results):
             for h5_var, h5_array in profiles.items():
                 h5_array[i_sounding, i_foot, :] = this_profiles[h5_var]
             if not units_set and this_units is not None:
@@ -513,7 +595,7 @@ def _prior_serial(orig_shape, var_mapping, var_type_info, met_data, gas_record,
 
 
 def _prior_parallel(orig_shape, var_mapping, var_type_info, met_data, gas_record, nprocs, prior_flags=None,
-                    use_trop_eqlat=False, error_handler=_def_errh):
+                    use_trop_eqlat=False, error_handler=_def_errh, sounding_inds=None):
     """
     Generate the priors, running in parallel mode.
 
@@ -526,6 +608,10 @@ def _prior_parallel(orig_shape, var_mapping, var_type_info, met_data, gas_record
     :param nprocs: the number of processors to use to run the code.
     :type nprocs: int
 
+    :param sounding_inds: the (sounding group, footprint) indices of the soundings to generate priors for. The others
+     are left as fill values. If not given, all soundings are attempted.
+    :type sounding_inds: list(tuple(int, int))
+
     :return: profiles and units dictionaries; profiles contains the actual data, units strings describing the units of
      each array.
     :rtype: dict, dict
@@ -535,14 +621,25 @@ def _prior_parallel(orig_shape, var_mapping, var_type_info, met_data, gas_record
     # Need to prepare iterators of the sounding and footprint indices, as well as the individual met dictionaries
     # and observation dates. We only want to pass the individual dictionary and date to each worker, not the whole
     # met data, because that would probably be slow due to overhead. (Not tested however.)
-    sounding_inds, footprint_inds = [x for x in zip(*product(range(orig_shape[0]), range(orig_shape[1])))]
-    mod_dicts = map(_construct_mod_dict, repeat(met_data), sounding_inds, footprint_inds)
+    if sounding_inds is None:
+        sounding_inds = product(range(orig_shape[0]), range(orig_shape[1]))
+    sounding_inds = list(sounding_inds)
+    if len(sounding_inds) == 0:
+        return _make_output_profiles_dict(orig_shape, var_mapping, var_type_info)
+    sounding_inds, footprint_inds = [x for x in zip(*sounding_inds)]
+    mod_dicts = list(map(_construct_mod_dict, repeat(met_data), sounding_inds, footprint_inds))
     qflags = [met_data['quality_flags'][isound, ifoot] for isound, ifoot in zip(sounding_inds, footprint_inds)]
 
+    # Each worker computes batches of soundings (see _prior_helper_batch), small enough to give each worker several
+    batch_size = min(_prior_batch_size, max(1, len(sounding_inds) // (4 * nprocs)))
+    batches = [slice(i, i + batch_size) for i in range(0, len(sounding_inds), batch_size)]
     with Pool(processes=nprocs) as pool:
-        result = pool.starmap(_prior_helper, zip(sounding_inds, footprint_inds, qflags, mod_dicts,
-                                                 repeat(gas_record), repeat(var_mapping), repeat(var_type_info),
-                                                 repeat(use_trop_eqlat), repeat(prior_flags), repeat(error_handler)))
+        batch_results = pool.starmap(_prior_helper_batch, zip(
+            [sounding_inds[b] for b in batches], [footprint_inds[b] for b in batches], [qflags[b] for b in batches],
+            [mod_dicts[b] for b in batches], repeat(gas_record), repeat(var_mapping), repeat(var_type_info),
+            repeat(use_trop_eqlat), repeat(prior_flags), repeat(error_handler)
+        ))
+    result = [res for batch_result in batch_results for res in batch_result]
 
     # At this point, result will be a list of tuples of pairs of dicts, the first dict the profiles dict, the second
     # the units dict or None if the prior calculation did not run. We need to combine the profiles into one array per
@@ -561,7 +658,7 @@ def _prior_parallel(orig_shape, var_mapping, var_type_info, met_data, gas_record
 
 
 def compute_sounding_equivalent_latitudes(sounding_pv, sounding_theta, sounding_datenums, sounding_qflags, geos_files,
-                                          nprocs=0, prior_flags=None, eqlat_pickle_dir='.', error_handler=_def_errh):
+                                          prior_flags=None, error_handler=_def_errh):
     """
     Compute equivalent latitudes for a collection of OCO soundings
 
@@ -582,10 +679,6 @@ def compute_sounding_equivalent_latitudes(sounding_pv, sounding_theta, sounding_
      paths, but must be paths that resolve correctly from the current working directory.
     :type geos_files: list(str)
 
-    :param nprocs: number of processors to use to compute the equivalent latitudes. 0 will run in serial mode, anything
-     greater will use parallel mode.
-    :type nprocs: int
-
     :param prior_flags: an integer array used to store numeric codes indicating why a particular prior failed to
      generate.
     :type prior_flags: :class:`numpy.ndarray`
@@ -613,94 +706,130 @@ def compute_sounding_equivalent_latitudes(sounding_pv, sounding_theta, sounding_
     # it will be easier to work with this as a list of the interpolators in the right order.
     eqlat_fxns = [eqlat_fxns[k] for k in geos_utc_times]
 
-    # This part is going to be slow. We need to use the interpolators to get equivalent latitude profiles for each
-    # sounding for the two times on either side of the sounding time, then do a further linear interpolation to
-    # the actual sounding time.
+    return _eqlat_vectorized(sounding_pv, sounding_theta, sounding_datenums, sounding_qflags, geos_datenums,
+                             eqlat_fxns, prior_flags=prior_flags, error_handler=error_handler)
 
-    if nprocs == 0:
-        return _eqlat_serial(sounding_pv, sounding_theta, sounding_datenums, sounding_qflags, geos_datenums, eqlat_fxns,
-                             prior_flags=prior_flags, error_handler=error_handler)
-    else:
-        return _eqlat_parallel(sounding_pv, sounding_theta, sounding_datenums, sounding_qflags, geos_datenums, eqlat_fxns, 
-                               prior_flags=prior_flags, error_handler=error_handler, nprocs=nprocs, eqlat_pickle_dir=eqlat_pickle_dir)
 
-
-def _eqlat_helper(idx, pv_vec, theta_vec, datenum, quality_flag, eqlat_fxns, geos_datenums, prior_flags=None,
-                  error_handler=_def_errh):
+def _eqlat_vectorized(sounding_pv, sounding_theta, sounding_datenums, sounding_qflags, geos_datenums, eqlat_fxns,
+                      prior_flags=None, error_handler=_def_errh):
     """
-    Internal function that carries out the equivalent latitude calculation while running in either serial or parallel
+    Calculate equivalent latitude for all soundings at once.
 
-    :param idx: the sounding index (assuming the 3D met arrays were reshaped to soundings-by-levels)
-    :type idx: int
+    The soundings are grouped by the pair of GEOS times that bracket them. For each group, the equivalent latitude
+    tables of the two GEOS times are evaluated on all of the group's PV and theta values in one call, then the two sets
+    of profiles are interpolated to the sounding times.
 
-    :param pv_vec: the potential vorticity vector for this sounding, in PVU (10^-6 K m^2 kg^-1 s^-1)
-    :type pv_vec: 1D :class:`numpy.ndarray`
+    :param sounding_pv: the array of potential vorticity in PVU (10^-6 K m^2 kg^-1 s^-1). Must have dimensions
+     soundings-by-levels.
+    :type sounding_pv: :class:`numpy.ndarray`
+
+    :param sounding_theta: the array of potential temperature in K. Must have same dimensions as ``sounding_theta``.
+    :type sounding_theta: :class:`numpy.ndarray`
 
-    :param theta_vec: the potential temperature vector for this sounding, in K
-    :type theta_vec: 1D :class:`numpy.ndarray`
+    :param sounding_datenums: the vector of date numbers for each sounding. Must be 1D with length equal to the number
+     of soundings. Datenumbers may be any representation of date as an in or float, as long as it is consistent with
+     ``geos_datenums``, however typically this is the result of :func:`datetime2datenum`.
+    :type sounding_datenums: 1D :class:`numpy.ndarray` or equivalent
 
-    :param datenum: a numeric representation of the date/time of this sounding, typically created by
-     :func:`datetime2datenum`.
-    :type datenum: int or float
+    :param sounding_qflags: the vector of met quality flags for each sounding. Soundings with a nonzero flag are not
+     computed.
+    :type sounding_qflags: 1D :class:`numpy.ndarray` or equivalent
 
-    :param quality_flag: a scalar number that is the quality flag for this profile.
-    :type quality_flag: int
+    :param geos_datenums: a vector of date numbers corresponding to the GEOS files that provided the ``eqlat_fxns``.
+     Must have the same order as ``eqlat_fxns``.
+    :type geos_datenums: 1D :class:`numpy.ndarray` or equivalent.
 
-    :param eqlat_fxns: the collection of equivalent latitude interpolators, must be in the same order as
-     ``geos_datenums``.
+    :param eqlat_fxns: a list of equivalent latitude interpolators for the date/times specified by ``geos_datenums``.
     :type eqlat_fxns: list(:class:`scipy.interpolate.interpolate.interp2d`)
 
-    :param geos_datenums: the date numbers (see ``datenum``) for the GEOS FP files that bracket this sounding. Should
-     be >= 2 and must be ordered the same as ``eqlat_fxns``, so that ``eqlat_fxns[0]`` the the equivalent latitude
-     interpolator for ``geos_datenums[0]`` and so on.
-    :type geos_datenums: list(float)
+    :param prior_flags: the integer array of prior failure flags, one per sounding. Soundings with a nonzero flag are
+     not computed, and the flags for soundings that fail are set.
+    :type prior_flags: :class:`numpy.ndarray`
 
-    :return: the equivalent latitude profile, interpolated in time and space to the sounding
+    :return: an array of equivalent latitudes for the soundings (dimensions soundings-by-levels).
     :rtype: :class:`numpy.ndarray`
     """
-    default_return = np.full_like(pv_vec, np.nan)
-
-    if quality_flag != 0:
-        logger.info('Sounding {}: quality flag != 0. Skipping eq. lat. calculation.'.format(idx))
-        error_handler.set_flag(err_code_name='met_qual_flag', flags=prior_flags, inds=idx)
-        return default_return, prior_flags[idx]
-    elif prior_flags is not None and prior_flags[idx] != 0:
-        logger.info('Sounding {}: prior flag != 0. Skipping eq. lat. calculation.'.format(idx))
-        return default_return, prior_flags[idx]
-    
-    # Because of a limit on the size of objects that can be sent between threads in Python 3.6,
-    # we need a workaround for big interpolators. If we got strings/paths, then we had to write
-    # those interpolators to files and pass the paths to those files instead. This block can
-    # be removed when we no longer need to support Python 3.6.
-    eqlat_fxns_in = eqlat_fxns
-    eqlat_fxns = []
-    for fxn in eqlat_fxns_in:
-        if isinstance(fxn, (str, Path)):
-            eqlat_fxns.append(_eqlat_pickle_load_cached(fxn))
-        else:
-            eqlat_fxns.append(fxn)
+    logger.info('Running vectorized eq. lat. calculation for {} soundings'.format(sounding_pv.shape[0]))
+    sounding_eqlat = np.full_like(sounding_pv, np.nan)
+    sounding_datenums = np.asarray(sounding_datenums)
+
+    bad_qual = np.asarray(sounding_qflags) != 0
+    if np.any(bad_qual):
+        logger.info('{} soundings have quality flag != 0. Skipping their eq. lat. calculation.'.format(bad_qual.sum()))
+        error_handler.set_flag(err_code_name='met_qual_flag', flags=prior_flags, inds=bad_qual)
+    to_compute = ~bad_qual
+    if prior_flags is not None:
+        prev_flagged = to_compute & (prior_flags != 0)
+        if np.any(prev_flagged):
+            logger.info('{} soundings have prior flag != 0. Skipping their eq. lat. calculation.'
+                        .format(prev_flagged.sum()))
+        to_compute &= ~prev_flagged
+
+    # For each sounding, find the first GEOS time after it; the one before that is the last GEOS time at or before it.
+    # Soundings outside the GEOS times (or with fill value times) have no bracketing pair.
+    geos_order = np.argsort(geos_datenums, kind='stable')
+    sorted_geos_datenums = np.asarray(geos_datenums)[geos_order]
+    i_next_sorted = np.searchsorted(sorted_geos_datenums, sounding_datenums, side='right')
+    no_geos = to_compute & ((i_next_sorted == 0) | (i_next_sorted == sorted_geos_datenums.size))
+    if np.any(no_geos):
+        logger.important('{} soundings: could not find GEOS files bracketing their times. Assuming fill value for '
+                         'time'.format(no_geos.sum()))
+        error_handler.set_flag(err_code_name='cannot_find_geos', flags=prior_flags, inds=no_geos)
+    to_compute &= ~no_geos
+
+    eqlat_tables = dict()
+    for i_next_group in np.unique(i_next_sorted[to_compute]):
+        inds = np.flatnonzero(to_compute & (i_next_sorted == i_next_group))
+        i_last_geos = geos_order[i_next_group - 1]
+        i_next_geos = geos_order[i_next_group]
+        logger.debug('Calculating eq. lat. for {} soundings between GEOS files {} and {}'
+                     .format(inds.size, i_last_geos, i_next_geos))
+        try:
+            for i_geos in (i_last_geos, i_next_geos):
+                if i_geos not in eqlat_tables:
+                    eqlat_tables[i_geos] = _eqlat_table(eqlat_fxns[i_geos])
+        except Exception as err:
+            # Without the tables none of the soundings in this group can be computed
+            error_handler.handle_err(err, err_code_name='eqlat_failure', flags=prior_flags, inds=inds)
+            continue
 
-    logger.debug('Calculating eq. lat. {}'.format(idx))
-    try:
-        i_last_geos = _find_helper(geos_datenums <= datenum, order='last')
-        i_next_geos = _find_helper(geos_datenums > datenum, order='first')
-    except IndexError as err:
-        logger.important('Sounding {}: could not find GEOS file by time. Assuming fill value for time'.format(idx))
-        error_handler.set_flag(err_code_name='cannot_find_geos', flags=prior_flags, inds=idx)
-        return default_return, prior_flags[idx]
+        def eval_tables(eval_inds):
+            # The profiles are held in the met data's precision before the time interpolation, as they always were
+            return tuple(_eval_eqlat_table(sounding_pv[eval_inds], sounding_theta[eval_inds], *eqlat_tables[i_geos])
+                         .astype(sounding_eqlat.dtype, copy=False) for i_geos in (i_last_geos, i_next_geos))
 
-    try:
-        last_el_profile = _make_el_profile(pv_vec, theta_vec, eqlat_fxns[i_last_geos])
-        next_el_profile = _make_el_profile(pv_vec, theta_vec, eqlat_fxns[i_next_geos])
-    except Exception as err:
-        error_handler.handle_err(err, err_code_name='eqlat_failure', flags=prior_flags, inds=idx)
-        return default_return, prior_flags[idx]
+        try:
+            last_el_profiles, next_el_profiles = eval_tables(inds)
+        except Exception:
+            # Go back through the group one sounding at a time so that only the soundings that fail are flagged
+            last_el_profiles, next_el_profiles = [], []
+            ok = np.ones(inds.shape, dtype=bool)
+            for i, i_sounding in enumerate(inds):
+                try:
+                    last_el, next_el = eval_tables(inds[i:i+1])
+                except Exception as err:
+                    error_handler.handle_err(err, err_code_name='eqlat_failure', flags=prior_flags, inds=i_sounding)
+                    ok[i] = False
+                else:
+                    last_el_profiles.append(last_el)
+                    next_el_profiles.append(next_el)
+            inds = inds[ok]
+            if inds.size == 0:
+                continue
+            last_el_profiles = np.concatenate(last_el_profiles, axis=0)
+            next_el_profiles = np.concatenate(next_el_profiles, axis=0)
+
+        # Interpolate between the two times by calculating a weighted average of the two profiles based on the
+        # sounding times. The weights are cast the way a scalar weight times a profile would be promoted, so the
+        # result is the same as weighting one sounding at a time.
+        weight = time_weight(sounding_datenums[inds], geos_datenums[i_last_geos], geos_datenums[i_next_geos])
+        weight_dtype = np.result_type(weight[0], last_el_profiles)
+        last_weight = weight.astype(weight_dtype)[:, np.newaxis]
+        next_weight = (1 - weight).astype(weight_dtype)[:, np.newaxis]
+        sounding_eqlat[inds] = last_weight * last_el_profiles + next_weight * next_el_profiles
 
-    # Interpolate between the two times by calculating a weighted average of the two profiles based on the sounding
-    # time. This avoids another for loop over all levels.
-    weight = time_weight(datenum, geos_datenums[i_last_geos], geos_datenums[i_next_geos])
-    # Need to return the flags for parallel mode
-    return weight * last_el_profile + (1 - weight) * next_el_profile, prior_flags[idx]
+    _eqlat_clip(sounding_eqlat)
+    return sounding_eqlat
 
 
 def _eqlat_clip(el):
@@ -734,115 +863,6 @@ def _eqlat_clip(el):
                        .format(n_outside, max(max_below, max_above))) 
 
 
-def _eqlat_serial(sounding_pv, sounding_theta, sounding_datenums, sounding_qflags, geos_datenums, eqlat_fxns,
-                  prior_flags=None, error_handler=_def_errh):
-    """
-    Calculate equivalent latitude running in serial mode.
-
-    :param sounding_pv: the array of potential vorticity in PVU (10^-6 K m^2 kg^-1 s^-1). Must have dimensions
-     soundings-by-levels.
-    :type sounding_pv: :class:`numpy.ndarray`
-
-    :param sounding_theta: the array of potential temperature in K. Must have same dimensions as ``sounding_theta``.
-    :type sounding_theta: :class:`numpy.ndarray`
-
-    :param sounding_datenums: the vector of date numbers for each sounding. Must be 1D with length equal to the number
-     of soundings. Datenumbers may be any representation of date as an in or float, as long as it is consistent with
-     ``geos_datenums``, however typically this is the result of :func:`datetime2datenum`.
-    :type sounding_datenums: 1D :class:`numpy.ndarray` or equivalent
-
-    :param geos_datenums: a vector of date numbers corresponding to the GEOS files that provided the ``eqlat_fxns``.
-     Must have the same order as ``eqlat_fxns``.
-    :type geos_datenums: 1D :class:`numpy.ndarray` or equivalent.
-
-    :param eqlat_fxns: a list of equivalent latitude interpolators for the date/times specified by ``geos_datenums``.
-    :type eqlat_fxns: list(:class:`scipy.interpolate.interpolate.interp2d`)
-
-    :return: an array of equivalent latitudes for the soundings (dimensions soundings-by-levels).
-    :rtype: :class:`numpy.ndarray`
-    """
-    sounding_eqlat = np.full_like(sounding_pv, np.nan)
-
-    # This part is going to be slow. We need to use the interpolators to get equivalent latitude profiles for each
-    # sounding for the two times on either side of the sounding time, then do a further linear interpolation to
-    # the actual sounding time.
-    logger.info('Running eq. lat. calculation in serial')
-    for idx, (pv_vec, theta_vec, datenum, qflag) in enumerate(zip(sounding_pv, sounding_theta, sounding_datenums, sounding_qflags)):
-        sounding_eqlat[idx], _ = _eqlat_helper(idx, pv_vec, theta_vec, datenum, qflag, eqlat_fxns, geos_datenums,
-                                               prior_flags=prior_flags, error_handler=error_handler)
-
-    _eqlat_clip(sounding_eqlat)
-    return sounding_eqlat
-
-
-def _eqlat_parallel(sounding_pv, sounding_theta, sounding_datenums, sounding_qflags, geos_datenums, eqlat_fxns, nprocs,
-                    prior_flags=None, error_handler=_def_errh, eqlat_pickle_dir='.'):
-    """
-    Calculate equivalent latitude running in parallel mode.
-
-    :param nprocs: the number of processors to use.
-    :type nprocs: int
-
-    See :func:`_eqlat_serial` for the other parameters and return type.
-    """
-    logger.info('Running eq. lat. calculation in parallel with {} processes'.format(nprocs))
-    with Pool(processes=nprocs) as pool, _eqlat_pickle_manager(eqlat_fxns, eqlat_pickle_dir) as eqlat_pickles:
-        result = pool.starmap(_eqlat_helper, zip(range(sounding_pv.shape[0]), sounding_pv, sounding_theta,
-                                                 sounding_datenums, sounding_qflags,
-                                                 repeat(eqlat_pickles), repeat(geos_datenums), repeat(prior_flags),
-                                                 repeat(error_handler)))
-
-    eqlats, flags = zip(*result)
-    sounding_eqlat = np.array(eqlats)
-    _eqlat_clip(sounding_eqlat)
-    # Copy the flag values from each parallel call into the array
-    for i, flag in enumerate(flags):
-        prior_flags[i] = flag
-    return sounding_eqlat
-
-
-@contextmanager
-def _eqlat_pickle_manager(eqlat_fxns, pickle_dir='.'):
-    if sys.version_info.major <= 3 and sys.version_info.minor >= 10:
-        logger.info("Running under Python 3.10 or greater, assuming support for large inter-thread objects. Not writing pickle files for eqlat interpolators.")
-        yield eqlat_fxns
-        return 
-    
-    logger.info("Running under Python 3.9 or less, not assuming there is support for large inter-thread objects. Writing pickle files for eqlat interpolators.")
-    mypid = os.getpid()
-    eqlat_pickle_files = []
-    
-    for i, fxn in enumerate(eqlat_fxns):
-        pickle_file = os.path.join(pickle_dir, f'ginput_eqlat_interpolator_pickle.{mypid}-{i}.pkl')
-        if os.path.exists(pickle_file):
-            raise IOError(f'Cannot create eqlat interpolator pickle file {pickle_file}, file already exists')
-        eqlat_pickle_files.append(pickle_file)
-        with open(pickle_file, 'wb') as f:
-            pickle.dump(fxn, f)
-    file_basenames = ', '.join(os.path.basename(fname) for fname in eqlat_pickle_files)
-    logger.info(f'Created {len(eqlat_pickle_files)} pickle files in {os.path.abspath(pickle_dir)}: {file_basenames}')
-    
-    try:
-        yield eqlat_pickle_files
-    finally:
-        for pickle_file in eqlat_pickle_files:
-            if os.path.exists(pickle_file):
-                os.remove(pickle_file)
-                logger.debug(f'Removed eqlat interpolator pickle file {os.path.abspath(pickle_file)}')
-        logger.info(f'Removed {len(eqlat_pickle_files)} temporary pickle files')
-
-
-@lru_cache(maxsize=4)
-def _eqlat_pickle_load_cached(pickle_file):
-    # It's important to have this as a cached function rather than loading the pickle directly in _eqlat_helper.
-    # If we do that, then it needs to load the pickles for each sounding it operates on, which is slow.
-    # At least in my testing, using this cache function means that the first sounding in a given thread will
-    # load the pickle, but then it is cached, so all the remaining soundings can access it directly from memory.
-    logger.debug(f'Loading eqlat interpolator from file {pickle_file}')
-    with open(pickle_file, 'rb') as f:
-        return pickle.load(f)
-
-
 def read_oco_resampled_met(met_file, error_handler=_def_errh):
     met_group = 'Meteorology'
     sounding_group = 'SoundingGeometry'
@@ -1160,57 +1180,56 @@ def _convert_to_acos_time_strings(datetime_array):
     return datestring_array.reshape(datetime_array.shape)
 
 
-def _find_helper(bool_vec, order='all'):
+def _eqlat_table(interpolator):
     """
-    Helper function to find indices of true values within a vector of booleans
+    Get the grids and coefficients of the linear spline behind one of the eq. lat. interpolators
 
-    :param bool_vec: the vector to find indices of ``True`` values in.
-    :type bool_vec: :class:`numpy.ndarray`
-
-    :param order: a string indicating which indices to return. "all" returns all indices, "first" returns just the
-     index of the first true value, and "last" returns the index of the last true value.
-    :type order: str
+    :param interpolator: one of the interpolators returned by :func:`mod_utils.calculate_eq_lat`, a linear
+     :class:`scipy.interpolate.interp2d` instance that interpolates equivalent latitude to given PV and theta.
+    :type interpolator: :class:`scipy.interpolate.interp2d`
 
-    :return: the index or indices of the true values
-    :rtype: int or ndarray(int)
+    :return: the PV grid, the theta grid and the spline coefficients (dimensions PV-by-theta).
+    :rtype: 1D :class:`numpy.ndarray`, 1D :class:`numpy.ndarray`, 2D :class:`numpy.ndarray`
     """
-    order = order.lower()
-    inds = np.flatnonzero(bool_vec)
-    if order == 'last':
-        return inds[-1]
-    elif order == 'first':
-        return inds[0]
-    elif order == 'all':
-        return inds
-    else:
-        raise ValueError('"{}" is not an allowed value for order'.format(order))
+    tx, ty, coeffs, kx, ky = interpolator.tck
+    if kx != 1 or ky != 1:
+        raise NotImplementedError('Only linear eq. lat. interpolators are supported')
+    # A linear spline through the gridded data has the end knots doubled and its coefficients on the data grid
+    pv_grid = np.asarray(tx[1:-1])
+    theta_grid = np.asarray(ty[1:-1])
+    return pv_grid, theta_grid, np.asarray(coeffs).reshape(pv_grid.size, theta_grid.size)
 
 
-def _make_el_profile(pv, theta, interpolator):
+def _eval_eqlat_table(pv, theta, pv_grid, theta_grid, coeffs):
     """
-    Create an equivalent latitude profile from profiles of PV, theta, and one of the eq. lat. intepolators
+    Evaluate an equivalent latitude table from :func:`_eqlat_table` at many PV and theta values at once
 
-    This function will create each level of the eq. lat. profile separately. This is safer than calling the interpolator
-    with the PV and theta vectors because the latter returns a 2D array of eq. lat., and occasionally the profile is
-    not the diagonal of that array. Since I have not figured out under what conditions that happens, I find this
-    approach of calculating each level in a loop, safer.
+    This gives the same result as calling the interpolator the table came from separately with each PV/theta pair,
+    without looping over the levels (calling the interpolator with vectors returns a grid, not the profile). It
+    follows the FITPACK evaluation of the spline step for step: values outside the grid are clamped to its edges, the
+    last grid point belongs to the last interval, and the terms are summed in the same order.
 
-    :param pv: the profile of potential vorticity in PVU (1e-6 K * m2 * kg^-1 * s^-1).
-    :type pv: 1D :class:`numpy.ndarray`
+    :param pv: potential vorticity in PVU (1e-6 K * m2 * kg^-1 * s^-1), any shape.
+    :type pv: :class:`numpy.ndarray`
 
-    :param theta: the profile of potential temperature in K
-    :type theta: 1D :class:`numpy.ndarray`
+    :param theta: potential temperature in K, same shape as ``pv``.
+    :type theta: :class:`numpy.ndarray`
 
-    :param interpolator: one of the interpolators returned by :func:`mod_utils.equivalent_latitude_functions_from_geos_files`
-     that interpolates equivalent latitude to given PV and theta.
-    :type interpolator: :class:`scipy.interpolate.interp2d`
-
-    :return: the equivalent latitude profile
-    :rtype: 1D :class:`numpy.ndarray`
+    :return: the equivalent latitudes, same shape as ``pv``.
+    :rtype: :class:`numpy.ndarray`
     """
-    el = np.full_like(pv, np.nan)
-    for i in range(el.size):
-        el[i] = interpolator(pv[i], theta[i])
+    def weights(x, grid):
+        x = np.clip(x, grid[0], grid[-1])
+        i = np.clip(np.searchsorted(grid, x, side='right') - 1, 0, grid.size - 2)
+        f = 1.0 / (grid[i + 1] - grid[i])
+        return i, f * (grid[i + 1] - x), f * (x - grid[i])
+
+    ix, wx0, wx1 = weights(np.asarray(pv, dtype=np.float64), pv_grid)
+    iy, wy0, wy1 = weights(np.asarray(theta, dtype=np.float64), theta_grid)
+    el = coeffs[ix, iy] * wx0 * wy0
+    el += coeffs[ix, iy + 1] * wx0 * wy1
+    el += coeffs[ix + 1, iy] * wx1 * wy0
+    el += coeffs[ix + 1, iy + 1] * wx1 * wy1
     return el
 
 
@@ -1333,9 +1352,8 @@ def parse_args(parser=None, instrument=None):
                              'not use the standard logger will also not be silenced.')
     parser.add_argument('-n', '--nprocs', default=0, type=int, help='Number of processors to use in parallelization')
     parser.add_argument('--interp-pickle-dir', default='.',
-                        help='Directory in which to write temporary files containing pickles of the EqL interpolators if needed. '
-                             'These files will only be written if running on Python 3.9 or less, and will be cleaned up automatically. '
-                             'Default is "%(default)s"')
+                        help='No longer used: the EqL interpolators are no longer sent to worker processes. Accepted so '
+                             'that existing command lines still work.')
     parser.add_argument('--raise-errors', action='store_true', help='Raise errors normally rather than suppressing and '
                                                                     'logging them.')
 
@@ -1,4 +1,5 @@
 from argparse import ArgumentParser
+import contextlib
 import ctypes
 from datetime import datetime, timedelta
 from glob import glob
@@ -9,7 +10,7 @@ import re
 import sys
 import time
 
-from ..common_utils import mod_utils, writers
+from ..common_utils import ioutils, mod_utils, readers, writers
 from ..common_utils.ggg_logging import logger
 from ..mod_maker import mod_maker
 from . import tccon_priors
@@ -79,6 +80,9 @@ class AutomationArgs:
         self.map_file_format = json_dict['map_file_format'].lower()
 
         self.n_threads = json_dict.get('n_threads', 4)
+        self.n_procs = json_dict.get('n_procs', 0)
+        self.incremental = json_dict.get('incremental', False)
+        self.force = json_dict.get('force', False)
 
 
 def _make_mod_files(all_args: AutomationArgs, force_file_name_fpit: bool = True):
@@ -106,6 +110,7 @@ def _make_mod_files(all_args: AutomationArgs, force_file_name_fpit: bool = True)
                 new_file = mod_file.parent / new_name
                 logger.debug(f'Renaming {mod_file} to {new_file}')
                 mod_file.rename(new_file)
+                readers.move_cached_profile_file(str(mod_file), str(new_file))
 
 def _make_vmr_files(all_args: AutomationArgs):
     subdir = mod_utils.mode_to_product(all_args.ginput_met_key)
@@ -125,7 +130,10 @@ def _make_vmr_files(all_args: AutomationArgs):
         site_abbrevs=mod_sites,
         flat_outdir=False,
         std_vmr_file=all_args.base_vmr_file,
-        zgrid=all_args.zgrid_file
+        zgrid=all_args.zgrid_file,
+        nprocs=all_args.n_procs,
+        incremental=all_args.incremental,
+        force=all_args.force
     )
 
 def _make_map_files(all_args: AutomationArgs):
@@ -151,37 +159,49 @@ def _make_map_files(all_args: AutomationArgs):
     elif map_fmt != 'txtandnc':
         raise ValueError('"{}" is not an allowed value for map_fmt.'.format(map_fmt))
 
+    # The (format, no_cfunits) pairs of the .map files to write for each .mod/.vmr pair
+    if map_fmt == 'txtandnc':
+        map_kinds = [('txt', False), ('nc', True)]
+    else:
+        map_kinds = [(map_fmt, True)]
+    track_maps = all_args.incremental or all_args.force
+
     subdir = mod_utils.mode_to_product(all_args.ginput_met_key)
     sites = sorted(glob(os.path.join(job_dir, subdir, '??')))
     for site_dir in sites:
         site_abbrev = os.path.basename(site_dir.rstrip(os.sep))
-        mod_files = glob(os.path.join(site_dir, 'vertical', '*.mod'))
+        mod_files = mod_utils.iter_profile_files(os.path.join(site_dir, 'vertical'), '.mod')
         mod_files = make_file_dict(mod_files)
-        vmr_files = glob(os.path.join(site_dir, 'vmrs-vertical', '*.vmr'))
+        vmr_files = mod_utils.iter_profile_files(os.path.join(site_dir, 'vmrs-vertical'), '.vmr')
         vmr_files = make_file_dict(vmr_files)
         map_dir = os.path.join(site_dir, 'maps-vertical')
         if not os.path.exists(map_dir):
             os.makedirs(map_dir)
 
-        for key in mod_files.keys():
-            modf = mod_files[key]
-            vmrf = vmr_files[key]
-
-            if map_fmt == 'txtandnc':
-                writers.write_map_from_vmr_mod(
-                    vmr_file=vmrf, mod_file=modf, map_output_dir=map_dir, 
-                    fmt='txt', site_abbrev=site_abbrev
-                )
-
-                writers.write_map_from_vmr_mod(
-                    vmr_file=vmrf, mod_file=modf, map_output_dir=map_dir, 
-                    fmt='nc', site_abbrev=site_abbrev, no_cfunits=True,
-                )
-            else:
-                writers.write_map_from_vmr_mod(
-                    vmr_file=vmrf, mod_file=modf, map_output_dir=map_dir, 
-                    fmt=map_fmt, site_abbrev=site_abbrev, no_cfunits=True
-                )
+        with ioutils.OutputFingerprints(force=all_args.force) as fingerprints:
+            for key in mod_files.keys():
+                modf = mod_files[key]
+                vmrf = vmr_files[key]
+                if track_maps and all(fingerprints.is_current(*writers.map_file_fingerprint(
+                        vmr_file=vmrf, mod_file=modf, map_output_dir=map_dir, fmt=fmt, site_abbrev=site_abbrev,
+                        no_cfunits=no_cfunits)) for fmt, no_cfunits in map_kinds):
+                    logger.debug('.map files for {} are up to date'.format(os.path.basename(modf)))
+                    readers.evict_cached_profile_file(vmrf)
+                    readers.evict_cached_profile_file(modf)
+                    continue
+
+                # Read the inputs once here so that writing both map formats does not parse them twice
+                vmrdat = readers.read_vmr_file(vmrf)
+                moddat = readers.read_mod_file(modf)
+                # This is the last stage that uses the .mod and .vmr files, so free their in-memory copies (if any)
+                readers.evict_cached_profile_file(vmrf)
+                readers.evict_cached_profile_file(modf)
+                for fmt, no_cfunits in map_kinds:
+                    writers.write_map_from_vmr_mod(
+                        vmr_file=vmrf, mod_file=modf, map_output_dir=map_dir,
+                        fmt=fmt, site_abbrev=site_abbrev, no_cfunits=no_cfunits, vmr_data=vmrdat, mod_data=moddat,
+                        fingerprints=fingerprints if track_maps else None
+                    )
             
 def _make_simulated_files(all_args: AutomationArgs, delay_time: float):
     time.sleep(delay_time)
@@ -235,7 +255,22 @@ def _make_simulated_files(all_args: AutomationArgs, delay_time: float):
             
         curr_time += timedelta(hours=3)
 
-def job_driver(json_file, simulate_with_delay=None):
+def job_driver(json_file, simulate_with_delay=None, in_memory=False):
+    """
+    Generate the .mod, .vmr, and (optionally) .map files for an automation job
+
+    :param json_file: path to the JSON file describing the job. If ``None``, the JSON is read from stdin.
+    :type json_file: str or None
+
+    :param simulate_with_delay: if given, write placeholder output files after this many seconds instead of running
+     ginput.
+    :type simulate_with_delay: float or None
+
+    :param in_memory: if ``True``, the .mod and .vmr files are kept in memory as they are written, so that the .vmr and
+     .map stages use them directly instead of reading them back from disk. All files are still written, and are
+     identical to those written without this option.
+    :type in_memory: bool
+    """
     if json_file is None:
         json_dict = json.loads(sys.stdin.read())
     else:
@@ -246,7 +281,9 @@ def job_driver(json_file, simulate_with_delay=None):
     if simulate_with_delay is not None:
         _make_simulated_files(all_args, simulate_with_delay)
     else:
-        with MKLThreads(all_args.n_threads):
+        with MKLThreads(all_args.n_threads), contextlib.ExitStack() as stack:
+            if in_memory:
+                stack.enter_context(readers.profile_file_cache())
             _make_mod_files(all_args)
             _make_vmr_files(all_args)
             _make_map_files(all_args)
@@ -271,6 +308,9 @@ def parse_cl_args(p=None):
     p_run = subp.add_parser('run', help='Run ginput to generate .mod, .vmr, and (optionally) .map files')
     p_run.add_argument('json_file', help='Path to the JSON file containing the information about what priors to generate')
     p_run.add_argument('-s', '--simulate-with-delay', type=float, help='Simulate running ginput, delaying creating output files by the given number of seconds')
+    p_run.add_argument('--in-memory', action='store_true', help='Pass the .mod and .vmr files to the later steps in memory '
+                                                               'rather than reading them back from disk. The output '
+                                                               'files are the same either way.')
     p_run.set_defaults(driver_fxn=job_driver)
 
     p_lut = subp.add_parser('regen-lut', help='Regenerate the chemical lookup tables used by "run"')
@@ -1,8 +1,10 @@
 from argparse import ArgumentParser
+from collections import OrderedDict
+import datetime as dt
 import os
 import pandas as pd
 
-from ..common_utils import mod_utils, writers
+from ..common_utils import ioutils, mod_utils, writers
 from ..mod_maker import tccon_sites
 
 
@@ -21,7 +23,7 @@ def _find_files_in_dirs(mod_dir, vmr_dir, date_range, site_lat, site_lon, produc
     for date in dates:
         mod_file = mod_utils.mod_file_name_for_priors(date, site_lat=site_lat, site_lon_180=site_lon, round_latlon=round_latlon, prefix=product.upper())
         mod_file = os.path.join(mod_dir, mod_file)
-        if not os.path.isfile(mod_file):
+        if not mod_utils.profile_file_exists(mod_file):
             if skip_missing:
                 continue
             else:
@@ -29,7 +31,7 @@ def _find_files_in_dirs(mod_dir, vmr_dir, date_range, site_lat, site_lon, produc
 
         vmr_file = mod_utils.vmr_file_name(date, lon=site_lon, lat=site_lat, keep_latlon_prec=keep_latlon_prec)
         vmr_file = os.path.join(vmr_dir, vmr_file)
-        if not os.path.isfile(vmr_file):
+        if not mod_utils.profile_file_exists(vmr_file):
             if skip_missing:
                 continue
             else:
@@ -106,9 +108,28 @@ def _lookup_site_lat_lon(site_abbrev, date_range):
     return site_info['lat'], site_info['lon_180']
 
 
+def _write_consolidated_maps(mod_files, vmr_files, save_dir, site_abbrev, period, wet_or_dry, no_cfunits):
+    groups = OrderedDict()
+    for modf, vmrf in zip(mod_files, vmr_files):
+        date = mod_utils.find_datetime_substring(os.path.basename(modf), out_type=dt.datetime)
+        period_start = dt.datetime(date.year, date.month, 1 if period == 'month' else date.day)
+        groups.setdefault(period_start, []).append((modf, vmrf))
+
+    for period_start, file_pairs in groups.items():
+        period_mods, period_vmrs = zip(*file_pairs)
+        map_name = mod_utils.consolidated_map_file_name(site_abbrev, period_mods[0], period_start, period)
+        writers.write_consolidated_map_file(os.path.join(save_dir, map_name), vmr_files=period_vmrs,
+                                            mod_files=period_mods, site_abbrevs=site_abbrev, wet_or_dry=wet_or_dry,
+                                            no_cfunits=no_cfunits)
+
+
 def cl_driver(date_range, root_dir=None, mod_dir=None, save_dir=None, vmr_dir=None, map_fmt='nc', dry=False,
               product='fpit', site_lat=None, site_lon=None, site_abbrev='xx', keep_latlon_prec=False,
-              skip_missing=False, req_cfunits=False):
+              skip_missing=False, req_cfunits=False, consolidate=None, incremental=False, force=False):
+    if consolidate is not None and map_fmt != 'nc':
+        raise ValueError('Consolidated .map files are only available in netCDF format')
+    if consolidate is not None and (incremental or force):
+        raise ValueError('Incremental generation is not available for consolidated .map files')
 
     site_abbrev, site_lat, site_lon, _ = mod_utils.check_site_lat_lon_alt(abbrev=site_abbrev, lat=site_lat,
                                                                           lon=site_lon,
@@ -128,9 +149,18 @@ def cl_driver(date_range, root_dir=None, mod_dir=None, save_dir=None, vmr_dir=No
             keep_latlon_prec=keep_latlon_prec, skip_missing=skip_missing
         )
 
-        for modf, vmrf in zip(mod_files, vmr_files):
-            writers.write_map_from_vmr_mod(vmr_file=vmrf, mod_file=modf, map_output_dir=this_save_dir, fmt=map_fmt,
-                                           wet_or_dry=wet_or_dry, site_abbrev=this_abbrev, no_cfunits=not req_cfunits)
+        if consolidate is not None:
+            _write_consolidated_maps(mod_files, vmr_files, save_dir=this_save_dir, site_abbrev=this_abbrev,
+                                     period=consolidate, wet_or_dry=wet_or_dry, no_cfunits=not req_cfunits)
+            continue
+
+        # In incremental mode, .map files already written from the same inputs are skipped
+        with ioutils.OutputFingerprints(force=force) as fingerprints:
+            for modf, vmrf in zip(mod_files, vmr_files):
+                writers.write_map_from_vmr_mod(vmr_file=vmrf, mod_file=modf, map_output_dir=this_save_dir,
+                                               fmt=map_fmt, wet_or_dry=wet_or_dry, site_abbrev=this_abbrev,
+                                               no_cfunits=not req_cfunits,
+                                               fingerprints=fingerprints if incremental or force else None)
 
 
 def parse_cl_args(p: ArgumentParser):
@@ -174,6 +204,9 @@ def parse_cl_args(p: ArgumentParser):
     fmtgrp.add_argument('-f', '--map-fmt', choices=('nc', 'txt'), default='nc',
                         help='Select the output format for the .map files, "nc" for netCDF for "txt" for the legacy '
                              'text format. Default is "%(default)s".')
+    fmtgrp.add_argument('--consolidate', choices=('day', 'month'),
+                        help='Write one netCDF .map file per site and day or month containing all the profiles in '
+                             'that period, instead of one file per profile. Requires --map-fmt=nc.')
     fmtgrp.add_argument('-d', '--dry', action='store_true',
                         help='Save the priors as dry mole fraction instead of wet. Note that TCCON uses wet mole '
                              'fractions in the retrieval. If you have questions about which to use for your '
@@ -190,4 +223,12 @@ def parse_cl_args(p: ArgumentParser):
                                'a C-library incompatibility. Use this flag if following CF unit conventions is '
                                'necessary for your use of the .map files and you do not get a warning about CFUnits '
                                'failing to import.')
+    othergrp.add_argument('--incremental', action='store_true',
+                          help='Only write .map files that do not exist or whose .mod or .vmr files (or the code or '
+                               'options used to write them) have changed since they were last written. The inputs of '
+                               'each .map file are recorded in a hidden file in the output directory. Not available '
+                               'with --consolidate.')
+    othergrp.add_argument('--force', action='store_true',
+                          help='Rewrite all .map files even if --incremental would skip them, but still record their '
+                               'inputs for future incremental runs.')
     p.set_defaults(driver_fxn=cl_driver)
@@ -55,10 +55,11 @@ from __future__ import print_function, division
 
 from abc import abstractmethod
 import argparse
-from collections import OrderedDict
+from collections import OrderedDict, namedtuple
 from copy import deepcopy
 import datetime as dt
 import json
+from multiprocessing import Pool
 from pathlib import Path
 from typing import Optional, Union
 
@@ -66,11 +67,13 @@ from dateutil.relativedelta import relativedelta
 from glob import glob
 import netCDF4 as ncdf
 import numpy as np
+from numpy.lib.stride_tricks import as_strided
 import os
 import pandas as pd
 import re
+import traceback
 
-from scipy.interpolate import LinearNDInterpolator
+from scipy.interpolate import LinearNDInterpolator, interp1d
 import xarray as xr
 
 from ..mod_maker import tccon_sites
@@ -87,6 +90,11 @@ _code_dep_files = {f.__name__.split('.')[-1] + '_sha1': os.path.abspath(f.__file
 # Add this module. Make sure to avoid storing the name as "__main__" so just always use the file name minus the
 # extension
 _code_dep_files[os.path.splitext(os.path.basename(__file__))[0]] = os.path.abspath(__file__)
+# Each dependency's size/modification time signature is stored in the strat LUT under its hash attribute name plus
+# this suffix, so that the hashes only need recomputed if the signature changed.
+_dep_signature_att_suffix = '_signature'
+# Results of _have_strat_array_deps_changed already computed by this process
+_strat_deps_changed_cache = dict()
 
 _data_dir = const.data_dir
 _clams_file = os.path.join(_data_dir, 'clams_age_clim_scaled.nc')
@@ -205,6 +213,17 @@ class TraceGasRecord(object):
     def gas_lat_grad(self):
         return self._gas_lat_grad
 
+    def list_prior_dependent_files(self):
+        """
+        Return the paths to the input files (besides the .mod file) that this record's priors are computed from.
+
+        These are used to decide whether an existing .vmr file is out of date in incremental mode (see
+        :func:`generate_tccon_priors_driver`). Subclasses that read additional files should override this.
+
+        :rtype: list(str)
+        """
+        return []
+
     @abstractmethod
     def add_trop_prior(self, prof_gas, obs_date, obs_lat, mod_data, **kwargs):
         pass
@@ -306,12 +325,21 @@ class MloSmoTraceGasRecord(TraceGasRecord):
     # to ensure that there is strat data over the requested time.
     _age_spectra_length = relativedelta(years=30)
 
+    # The maximum number of dates to keep interpolated concentrations for in each record's cache, see
+    # get_gas_for_dates. Each date takes on the order of 200 bytes.
+    _interp_cache_max_dates = 65536
+
     @classmethod
     def get_strat_lut_file(cls):
         # This needed to be a class method so that the _load_strat_arrays() could be a classmethod. Unfortunately,
         # classproperties aren't a thing yet, so this remains a regular function.
         return os.path.join(_data_dir, '{}_strat_lut.nc'.format(cls._gas_name))
 
+    @staticmethod
+    def _get_strat_lut_mmap_dir(lut_file):
+        # The memory-mappable copy of a strat LUT netCDF file, see _load_strat_arrays
+        return os.path.splitext(lut_file)[0] + '_mmap'
+
     @property
     def strat_has_theta_dep(self):
         no_dep = [np.all(reg_arr.theta == self._no_theta_coord).item() for reg_arr in self.conc_strat.values()]
@@ -335,6 +363,7 @@ class MloSmoTraceGasRecord(TraceGasRecord):
 
     def __init__(self, first_date=None, last_date=None, truncate_date=None, lag=None, mlo_file=None, smo_file=None,
                  strat_age_scale=1.0, recalculate_strat_lut=None, save_strat=None, recalc_if_custom_dates=True):
+        self._init_interp_cache()
         has_custom_dates = first_date is not None or last_date is not None or truncate_date is not None
         first_date, last_date, self.sbc_lag, mlo_file, smo_file = self._init_helper(first_date, last_date, lag, mlo_file, smo_file)
         self.mlo_file = mlo_file
@@ -397,7 +426,8 @@ class MloSmoTraceGasRecord(TraceGasRecord):
         # May enter this if recalculation required by user, dependencies, or dates.
         if recalculate_strat_lut:
             logger.info('Calculating {} strat LUT'.format(self.gas_name))
-            self.conc_strat = self._calc_age_spec_gas(self.conc_seasonal, lag=self.sbc_lag)
+            self.conc_strat = self._calc_age_spec_gas(self.conc_seasonal, lag=self.sbc_lag,
+                                                      **self._age_spec_gas_kwargs())
             if save_strat:
                 try:
                     self._save_strat_arrays()
@@ -538,10 +568,11 @@ class MloSmoTraceGasRecord(TraceGasRecord):
         spectra = _load_helper(agespec_file)
         if normalize_spectra:
             # Ensure that the integral of each age spectrum is 1. Assumes that time has a consistent spacing between
-            # adjacent points, then basically does a midpoint rule integration
-            for i in range(spectra.shape[0]):
-                spec = spectra.iloc[i, :]
-                spectra.iloc[i, :] = (delt * spec) / (np.nansum(spec) * delt)
+            # adjacent points, then basically does a midpoint rule integration. All spectra are normalized at once;
+            # assigning them row by row through pandas took most of the time of the age spectrum convolution.
+            spec_values = np.ascontiguousarray(spectra.to_numpy(dtype=float))
+            spec_integrals = np.nansum(spec_values, axis=1, keepdims=True) * delt
+            spectra = pd.DataFrame((delt * spec_values) / spec_integrals, index=spectra.index, columns=spectra.columns)
         return time, delt, age, spectra
 
     @classmethod
@@ -678,6 +709,28 @@ class MloSmoTraceGasRecord(TraceGasRecord):
         return add_strat_prior_standard(gas_record=self, prof_gas=prof_gas, retrieval_date=retrieval_date,
                                         mod_data=mod_data, **kwargs)
 
+    def add_trop_prior_for_profiles(self, prof_gas, obs_dates, obs_lats, mod_data, use_adjusted_zgrid=True,
+                                    **kwargs):
+        """
+        Add the tropospheric component of many priors at once.
+
+        See the help for :func:`add_trop_prior_standard_for_profiles` in this module. All the inputs and outputs are
+        the same except that ``gas_record`` will be given this instance.
+        """
+        return add_trop_prior_standard_for_profiles(gas_record=self, prof_gas=prof_gas, obs_dates=obs_dates,
+                                                    obs_lats=obs_lats, mod_data=mod_data,
+                                                    use_adjusted_zgrid=use_adjusted_zgrid, **kwargs)
+
+    def add_strat_prior_for_profiles(self, prof_gas, retrieval_dates, mod_data, **kwargs):
+        """
+        Add the stratospheric component of many priors at once.
+
+        See the help for :func:`add_strat_prior_standard_for_profiles` in this module. All the inputs and outputs are
+        the same except that ``gas_record`` will be given this instance.
+        """
+        return add_strat_prior_standard_for_profiles(gas_record=self, prof_gas=prof_gas,
+                                                     retrieval_dates=retrieval_dates, mod_data=mod_data, **kwargs)
+
     def add_extra_column(self, prof_gas, retrieval_date, mod_data, **kwargs):
 
         return prof_gas, dict()
@@ -864,6 +917,18 @@ class MloSmoTraceGasRecord(TraceGasRecord):
 
         return pd.DatetimeIndex(date_times)
 
+    def _age_spec_gas_kwargs(self):
+        """
+        Extra keyword arguments for :meth:`_calc_age_spec_gas` when this record recalculates its strat LUT.
+
+        Subclasses whose stratospheric calculation depends on something besides their own MLO/SMO record can override
+        this to pass it along. The base implementation passes nothing extra.
+
+        :return: the keyword arguments
+        :rtype: dict
+        """
+        return dict()
+
     @classmethod
     def _calc_age_spec_gas(cls, df, lag, requested_dates=None):
         gas_conc = dict()
@@ -904,64 +969,49 @@ class MloSmoTraceGasRecord(TraceGasRecord):
             # 1950 is the year Arlyn Andrews used in her code. That will cause some NaNs at the beginning of the
             # record before our gas records start, but that's fine.
             new_index = np.arange(1950.0, max_dec_year, delt)
-            conv_dates = None
-            old_shape = -1  # will be initialized properly the first time through the loop
-
-            for ispec in range(spectra.shape[0]):
-                for itheta in range(n_theta):
-                    # The first step is to put the trace gas record on the same time resolution as the age spectra. This
-                    # is necessary for the convolution to work. Note that the age spectra aren't assigned to any
-                    # specific date, we just need the adjacent points in the age spectra and gas record to have the same
-                    # spacing in time.
-                    # To handle the reindexing properly, we need to keep the original rows in until we handle the
-                    # interpolation to the new values. For this part we need to use the decimal years as the index
-                    # and (as of 2022-08-30, pandas 1.4.3), remove columns that we don't need to allow the index
-                    # interpolation method to work
-                    tmp_index = np.unique(np.concatenate([df_lagged['dec_year'], new_index]))
-                    df_asi = df_lagged.set_index('dec_year', drop=False)[['dmf_mean']].reindex(tmp_index).interpolate(method='index').reindex(new_index)
-
-                    # Now we can do the convolution. Note: in Arlyn's original R code, she had to flip the age spectrum
-                    # to act as the convolution kernel, but testing showed that in order to get the same answer using
-                    # numpy's convolution function we had to leave the spectrum unflipped.
-                    #
-                    # This is because the numpy convolution operation acts to flip the kernel internally. It is defined
-                    # as
-                    #
-                    # (a * v)[n] = \sum_{m=-\infty}^{\infty} a[m]v[n-m]
-                    #
-                    # Note that v is indexed with n-m. This has the effect of reversing the kernel; for n=10, a[11] gets
-                    # multiplied by v[9], a[12] by v[8] and so on. R's convolve function uses a different indexing
-                    # pattern that does not reverse the kernel.
-                    #
-                    # We want the kernel reversed because the trace gas records are defined from old to new, while the
-                    # age spectra are from new to old. Therefore, we need to reverse the spectra before convolving to
-                    # actually put both in the same direction.
-                    conv_result = np.convolve(df_asi['dmf_mean'].values.squeeze(), spectra.iloc[ispec, :].values,
-                                              mode='valid')
-                    if conv_dates is None:
-                        conv_dates = new_index[(spectra.shape[1] - 1):]
-                        # The call to dec_year_to_dtindex was ~80% of the time for this function when it was being
-                        # called in every loop. There should be no reason to recalculate on every loop; the spectra
-                        # should not be changing size and should therefore always give results on the same dates
-                        conv_dates = cls._dec_year_to_dtindex(conv_dates, force_first_of_month=False)
-                        old_shape = spectra.shape[1]
-                    elif spectra.shape[1] != old_shape:
-                        raise NotImplementedError('Different spectra have different lengths; this is not allowed as '
-                                                  'currently implemented')
-
-                    # Finally we put the age-convolved gas concentration back onto the dates of the input dataframe,
-                    # unless alternate dates were specified.
-                    conv_df = pd.DataFrame(conv_result, index=conv_dates)
-                    tmp_index = np.unique(np.concatenate([out_dates, conv_dates]))
-                    this_out_df = conv_df.reindex(tmp_index).interpolate(method='index').reindex(out_dates)
-
-                    # And store this result in the output data frame, remembering that we added an extra row at the
-                    # beginning for zero age air, and again using broadcasting.
-                    #
-                    # We also deal with adding in any chemical loss here because we determine chemical loss from ACE
-                    # data with respect to the mean age of the air, therefore we need to lookup the fraction remaining
-                    # for that mean age, rather than apply it in the same convolution as the age spectra.
-                    out_array[:, ispec+1, itheta] = this_out_df.reindex(out_dates).to_numpy().squeeze() * fgas.isel(age=ispec, theta=itheta).item()
+
+            # The first step is to put the trace gas record on the same time resolution as the age spectra. This is
+            # necessary for the convolution to work. Note that the age spectra aren't assigned to any specific date, we
+            # just need the adjacent points in the age spectra and gas record to have the same spacing in time. This
+            # does not depend on the spectrum or theta, so is only done once.
+            # To handle the reindexing properly, we need to keep the original rows in until we handle the interpolation
+            # to the new values. For this part we need to use the decimal years as the index and (as of 2022-08-30,
+            # pandas 1.4.3), remove columns that we don't need to allow the index interpolation method to work
+            tmp_index = np.unique(np.concatenate([df_lagged['dec_year'], new_index]))
+            df_asi = df_lagged.set_index('dec_year', drop=False)[['dmf_mean']].reindex(tmp_index).interpolate(method='index').reindex(new_index)
+            gas_on_spec_grid = np.ascontiguousarray(df_asi['dmf_mean'].to_numpy(dtype=float))
+
+            # Now we can do the convolution, for all the spectra at once. This is equivalent to calling
+            # np.convolve(gas_on_spec_grid, spectrum, mode='valid') for each spectrum: each output point is the dot
+            # product of a window of the gas record with the *reversed* spectrum, since the convolution flips the
+            # kernel. Note: in Arlyn's original R code, she had to flip the age spectrum to act as the convolution
+            # kernel, but R's convolve function uses a different indexing pattern that does not reverse the kernel.
+            #
+            # We want the kernel reversed because the trace gas records are defined from old to new, while the
+            # age spectra are from new to old. Therefore, we need to reverse the spectra before convolving to
+            # actually put both in the same direction.
+            #
+            # The convolution does not depend on theta, only the chemical loss applied below does.
+            n_spectra, spectra_length = spectra.shape
+            windows = as_strided(gas_on_spec_grid, shape=(gas_on_spec_grid.size - spectra_length + 1, spectra_length),
+                                 strides=(gas_on_spec_grid.strides[0], gas_on_spec_grid.strides[0]), writeable=False)
+            conv_results = windows.dot(spectra.to_numpy(dtype=float)[:, ::-1].T)
+            conv_dates = cls._dec_year_to_dtindex(new_index[(spectra_length - 1):], force_first_of_month=False)
+
+            # Finally we put the age-convolved gas concentrations back onto the dates of the input dataframe, unless
+            # alternate dates were specified.
+            conv_df = pd.DataFrame(conv_results, index=conv_dates)
+            tmp_index = np.unique(np.concatenate([out_dates, conv_dates]))
+            conv_on_out_dates = conv_df.reindex(tmp_index).interpolate(method='index').reindex(out_dates).to_numpy()
+
+            # And store this result in the output array, remembering that we added an extra row at the beginning for
+            # zero age air, and using broadcasting to expand across theta.
+            #
+            # We also deal with adding in any chemical loss here because we determine chemical loss from ACE data with
+            # respect to the mean age of the air, therefore we need to lookup the fraction remaining for that mean age,
+            # rather than apply it in the same convolution as the age spectra.
+            frac_remaining = fgas.transpose('age', 'theta').data[:n_spectra]
+            out_array[:, 1:(n_spectra+1)] = conv_on_out_dates[:, :, np.newaxis] * frac_remaining[np.newaxis, :, :]
 
             gas_conc[region] = out_array
 
@@ -988,12 +1038,36 @@ class MloSmoTraceGasRecord(TraceGasRecord):
         save_ds.attrs['history'] = ioutils.make_creation_info(self.get_strat_lut_file())
         for att_name, file_path in self.list_strat_dependent_files().items():
             save_ds.attrs[att_name] = ioutils.make_dependent_file_hash(file_path)
+            save_ds.attrs[att_name + _dep_signature_att_suffix] = ioutils.make_dependent_file_signature(file_path)
         save_ds.to_netcdf(self.get_strat_lut_file())
+        self._save_strat_arrays_mmap(self.conc_strat, self.get_strat_lut_file())
+
+    @classmethod
+    def _save_strat_arrays_mmap(cls, strat_dict, lut_file):
+        # Write the memory-mappable copy of the strat LUT. Each region's data is stored as "<region>" and its coordinates
+        # as "<region>_<dimension>", like in the netCDF file. This copy is only an optimization, so failing to write it
+        # (e.g. because the data directory is read-only) is not an error.
+        arrays = OrderedDict()
+        dims = dict()
+        for name, darray in strat_dict.items():
+            arrays[name] = darray.data
+            dims[name] = list(darray.dims)
+            for dim in darray.dims:
+                arrays[name + '_' + dim] = darray.coords[dim].data
+        try:
+            ioutils.write_memmap_arrays(cls._get_strat_lut_mmap_dir(lut_file), arrays, source_file=lut_file, dims=dims)
+        except OSError as err:
+            logger.info('Could not write the memory-mappable copy of {}: {}'.format(lut_file, err))
 
     def _have_strat_array_deps_changed(self, dependent_files=None, lut_file=None):
         """
         Check if dependencies for the strat LUTs have changed.
 
+        A dependency whose size and modification time match those recorded in the LUT file is assumed unchanged;
+        only if they differ (or were not recorded) is the file hashed and compared against the recorded hash. The
+        result is remembered for the rest of the process, as long as neither the LUT file nor the dependencies' sizes
+        and modification times change.
+
         :param dependent_files: dictionary specifying which files need to be checked. Keys must be the root level
          attribute names in the LUT netCDF file that store the SHA1 hashes of the dependency files, values must be the
          paths to those files. If omitted, the dictionary returned by ``cls.list_strat_dependent_files()`` is used.
@@ -1006,14 +1080,27 @@ class MloSmoTraceGasRecord(TraceGasRecord):
          of the expected files is missing), ``False`` otherwise.
         :rtype: bool
         """
-        def check_hash(file_path, hash):
+        dependent_files = self.list_strat_dependent_files() if dependent_files is None else dependent_files
+        lut_file = self.get_strat_lut_file() if lut_file is None else lut_file
+
+        signatures = {att_name: None if file_path is None else ioutils.make_dependent_file_signature(file_path)
+                      for att_name, file_path in dependent_files.items()}
+        cache_key = (os.path.abspath(lut_file), ioutils.make_dependent_file_signature(lut_file),
+                     tuple(sorted((k, v, signatures[k]) for k, v in dependent_files.items())))
+        if cache_key not in _strat_deps_changed_cache:
+            _strat_deps_changed_cache[cache_key] = self._compare_strat_array_deps(dependent_files, signatures, lut_file)
+        return _strat_deps_changed_cache[cache_key]
+
+    @staticmethod
+    def _compare_strat_array_deps(dependent_files, signatures, lut_file):
+        def check_hash(att_name, file_path, attrs):
             if file_path is None:
                 return True
+            elif attrs.get(att_name + _dep_signature_att_suffix) == signatures[att_name]:
+                # Same size and modification time as when the LUT was generated, no need to read the whole file
+                return True
             else:
-                return hash == ioutils.make_dependent_file_hash(file_path)
-
-        dependent_files = self.list_strat_dependent_files() if dependent_files is None else dependent_files
-        lut_file = self.get_strat_lut_file() if lut_file is None else lut_file
+                return attrs[att_name] == ioutils.make_dependent_file_hash(file_path)
 
         with xr.open_dataset(lut_file) as ds:
             # First verify that the SHA1 hashes for the MLO and SMO match. If not, we should recalculate the strat array
@@ -1023,7 +1110,7 @@ class MloSmoTraceGasRecord(TraceGasRecord):
                     logger.important('{dep_file} not listed as an attribute in {lut_file}, assuming strat LUT needs '
                                      'regenerated'.format(dep_file=att_name, lut_file=lut_file))
                     return True
-                if not check_hash(file_path, ds.attrs[att_name]):
+                if not check_hash(att_name, file_path, ds.attrs):
                     logger.important('{dep_file} appears to have changed since the last time the {lut_file} was '
                                      'generated'.format(dep_file=att_name, lut_file=lut_file))
                     return True
@@ -1036,11 +1123,22 @@ class MloSmoTraceGasRecord(TraceGasRecord):
         if lut_file is None:
             lut_file = cls.get_strat_lut_file()
 
+        # Prefer the memory-mappable copy of the LUT: it is opened read-only, so every process using the same LUT
+        # shares one copy in the page cache rather than each loading the netCDF file into its own memory.
+        mmap_arrays, mmap_info = ioutils.read_memmap_arrays(cls._get_strat_lut_mmap_dir(lut_file), source_file=lut_file)
+        if mmap_arrays is not None:
+            for name, dims in mmap_info['dims'].items():
+                new_coords = [(dim, mmap_arrays[name + '_' + dim]) for dim in dims]
+                strat_dict[name] = xr.DataArray(mmap_arrays[name], coords=new_coords)
+            return strat_dict
+
         with xr.open_dataset(lut_file) as ds:
             for name, darray in ds.items():
                 new_coords = [(dim.split('_')[1], coord.data) for dim, coord in darray.coords.items()]
                 strat_dict[name] = xr.DataArray(darray.data, coords=new_coords)
 
+        # Missing or out of date, so create the copy for the next process to use
+        cls._save_strat_arrays_mmap(strat_dict, lut_file)
         return strat_dict
 
     def list_strat_dependent_files(self):
@@ -1060,6 +1158,12 @@ class MloSmoTraceGasRecord(TraceGasRecord):
         file_dict.update({'mlo_sha1': self.mlo_file, 'smo_sha1': self.smo_file})
         return file_dict
 
+    def list_prior_dependent_files(self):
+        # The MLO/SMO files are not always among the strat LUT dependencies (e.g. for HF), but are always read
+        dep_files = set(self.list_strat_dependent_files().values())
+        dep_files.update([self.mlo_file, self.smo_file, self.get_strat_lut_file()])
+        return sorted(os.path.abspath(f) for f in dep_files)
+
     def get_strat_gas(self, date, ages, eqlat, theta=None, as_dataframe=False):
         """
         Get stratospheric gas concentration for a given profile
@@ -1116,12 +1220,11 @@ class MloSmoTraceGasRecord(TraceGasRecord):
         # We only want to interpolate dimensions that an actual effect on the lookup table. So if the theta dimension
         # has length 1, we can't interpolate along that dimension. We used to use xarray.DataArrays for ages and theta
         # to create a dummy dimension "level" so that we could index along that later. However, that stopped working 
-        # with v. 2022.06 of xarray. Now we just use regular interpolation and numpy advanced indexing to extract the
-        # diagonal. A numpy array *should* be fine to return. We use an ordered dictionary to ensure interpolation 
+        # with v. 2022.06 of xarray. Now we interpolate date and age with xarray, then interpolate each age's row to
+        # its own theta, which gives the same values as interpolating to every theta and taking the diagonal without
+        # growing as the square of the number of points. We use an ordered dictionary to ensure interpolation
         # happens in the same order all the time (though shouldn't be an issue for Python versions past ~3.6).
         interp_dims = OrderedDict([('date', date), ('age', ages)])
-        if self.strat_has_theta_dep:
-            interp_dims['theta'] = theta
 
         for region in self.age_spec_regions:
             region_arr = self.conc_strat[region]
@@ -1135,14 +1238,13 @@ class MloSmoTraceGasRecord(TraceGasRecord):
             tmp_arr = region_arr
             for dim_name, dim_coords in interp_dims.items():
                 tmp_arr = tmp_arr.interp(method='linear', kwargs={'fill_value': 'extrapolate'}, **{dim_name: dim_coords})
-            # needed to handle cases without theta dependence - removes theta dimension
-            tmp_arr = tmp_arr.squeeze().data
+            tmp_arr = tmp_arr.transpose('age', 'theta')
 
-            # Interpolating each dimension in sequence like this leaves each dimension that had a non-scalar target for
-            # interpolation, so we need to get the diagonal which is the actual profile.
-            # Also we make diag_inds instead of using np.diag b/c the latter doesn't work in >2 dimensions.
-            diag_inds = tuple([np.arange(tmp_arr.shape[0])]*tmp_arr.ndim)
-            gas_by_region[region] = tmp_arr[diag_inds]
+            if self.strat_has_theta_dep:
+                gas_by_region[region] = _interp_rows_linear(tmp_arr['theta'].data, tmp_arr.data, theta)
+            else:
+                # needed to handle cases without theta dependence - removes theta dimension
+                gas_by_region[region] = tmp_arr.data[:, 0]
 
         gas_conc = gas_by_region['midlat']
         doy = mod_utils.day_of_year(date) + 1  # most of the code from Arlyn Andrews assumes Jan 1 -> DOY = 1
@@ -1162,7 +1264,8 @@ class MloSmoTraceGasRecord(TraceGasRecord):
         Get trace gas concentrations for one or more dates.
 
         This method will lookup concentrations for a specific date or dates, interpolating between the monthly values as
-        necessary.
+        necessary. The interpolated values for recently requested dates are cached, so repeating dates (in the same
+        or a later query) is cheap.
 
         :param dates: the date or dates to get concentrations for. If giving a single date, it may be any time that can
          be converted to a Pandas :class:`~pandas.Timestamp`. If giving a series of dates, it must be a
@@ -1191,42 +1294,83 @@ class MloSmoTraceGasRecord(TraceGasRecord):
             else:
                 dates = pd.DatetimeIndex([timestamp_in])
 
-        start_date = dates.min()
-        end_date = dates.max()
-
-        # Need to make sure we get data that bracket the start and end date, so set them the first days of month
-        start_date_subset = mod_utils.start_of_month(start_date, out_type=pd.Timestamp)
-        end_date_subset = mod_utils.start_of_month(end_date + relativedelta(months=1), out_type=pd.Timestamp)
-
-        # First get just monthly data. freq='MS' gives us monthly data at the start of the month. Use the existing logic
-        # to extrapolate the record for a given month if needed.
-        monthly_idx = pd.date_range(start_date_subset, end_date_subset, freq='MS')
-        monthly_df = pd.DataFrame(index=monthly_idx, columns=['dmf_mean', 'latency'], dtype=float)
-        for timestamp in monthly_df.index:
-            monthly_df.dmf_mean[timestamp], info_dict = self.get_gas_by_month(timestamp.year, timestamp.month, deseasonalize=deseasonalize)
-            monthly_df.latency[timestamp] = info_dict['latency']
-
-        # Now we resample to the dates requested, making sure to keep the values at the start of each month on either
-        # end of the record to ensure interpolation is successful
-        sample_date_idx = dates.copy()
-        sample_date_idx = sample_date_idx.append(monthly_idx)
-        sample_date_idx = sample_date_idx.sort_values()  # is needed for successful interpolation
-        sample_date_idx = pd.unique(sample_date_idx)  # deal with the possibility that one of the requested dates was a month start
-        df_resampled = monthly_df.reindex(sample_date_idx)
+        dmf, latency = self._interp_gas_to_dates(dates.asi8, deseasonalize)
+        if as_dataframe:
+            return pd.DataFrame({'dmf_mean': dmf, 'latency': latency}, index=dates)
+        else:
+            return dmf
+
+    def _init_interp_cache(self):
+        # The cache is per instance so that it does not keep records alive after they are no longer used and so that
+        # each record's cache only holds its own dates. It maps (deseasonalize, date as int64 nanoseconds) to the
+        # interpolated (dmf, latency) and is kept in least-recently-used order.
+        self._interp_cache = OrderedDict()
+
+    def __getstate__(self):
+        # There is no need to send the cache along when pickling (e.g. when sending records to worker processes), so
+        # leave it out and start a fresh one when unpickling.
+        state = self.__dict__.copy()
+        state.pop('_interp_cache', None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._init_interp_cache()
+
+    def _interp_gas_to_dates(self, dates, deseasonalize):
+        # The tropospheric priors ask for the same dates over and over (e.g. for each profile at the same site and
+        # time), so the interpolated values are cached per unique date. Caching whole requests would rarely help the
+        # batch calculations, which ask for many dates at once that are almost never requested together again.
+        unique_dates, inverse = np.unique(dates, return_inverse=True)
+        values = np.empty((unique_dates.size, 2))
+        cache = self._interp_cache
+        missing = []
+        for i, date in enumerate(unique_dates.tolist()):
+            key = (deseasonalize, date)
+            if key in cache:
+                values[i] = cache[key]
+                cache.move_to_end(key)
+            else:
+                missing.append(i)
+
+        if len(missing) > 0:
+            values[missing, 0], values[missing, 1] = self._interp_gas_to_dates_uncached(unique_dates[missing],
+                                                                                        deseasonalize)
+            for i in missing:
+                cache[(deseasonalize, unique_dates[i].item())] = tuple(values[i])
+            while len(cache) > self._interp_cache_max_dates:
+                cache.popitem(last=False)
+
+        return values[inverse, 0], values[inverse, 1]
+
+    def _interp_gas_to_dates_uncached(self, dates, deseasonalize):
+        # Interpolate the record to the dates, given as int64 nanoseconds (see _interp_gas_to_dates for the cache)
+        df = self.conc_trend if deseasonalize else self.conc_seasonal
+        record_dates = df.index.asi8
+
+        # We need the monthly values that bracket the first and last date, so find the start of the first date's month
+        # and the start of the month after the last date's month in the record.
+        start_date_subset = mod_utils.start_of_month(pd.Timestamp(dates.min()), out_type=pd.Timestamp)
+        end_date_subset = mod_utils.start_of_month(pd.Timestamp(dates.max()) + relativedelta(months=1),
+                                                   out_type=pd.Timestamp)
+        istart, iend = np.searchsorted(record_dates, [start_date_subset.value, end_date_subset.value])
+        if iend >= record_dates.size or record_dates[istart] != start_date_subset.value \
+                or record_dates[iend] != end_date_subset.value:
+            raise KeyError('The {} record does not contain the months {} to {}'
+                           .format(self.gas_name, start_date_subset, end_date_subset))
 
         # Verify we have non-NaN values for all monthly reference points
-        if df_resampled['dmf_mean'][monthly_idx].isna().any():
+        dmf_subset = df['dmf_mean'].to_numpy()[istart:iend+1]
+        latency_subset = df['latency'].to_numpy()[istart:iend+1]
+        if np.isnan(dmf_subset).any():
             raise RuntimeError('Failed to resample concentrations for date range {} to {}; first and/or last point is NA'
                                .format(start_date_subset, end_date_subset))
 
-        df_resampled.interpolate(method='index', inplace=True)
-
-        # Return with just the originally requested dates
-        df_resampled = df_resampled.reindex(dates)
-        if as_dataframe:
-            return df_resampled
-        else:
-            return df_resampled['dmf_mean'].values
+        # Interpolate linearly in time between the monthly values, the same as pandas' interpolate(method='index')
+        record_dates = record_dates[istart:iend+1]
+        dmf = np.interp(dates, record_dates, dmf_subset)
+        latency = np.interp(dates, record_dates, latency_subset)
+        return dmf, latency
 
     def avg_gas_in_date_range(self, start_date, end_date, deseasonalize=False):
         """
@@ -1270,8 +1414,8 @@ class MloSmoTraceGasRecord(TraceGasRecord):
         This called :meth:`get_gas_for_dates` internally, so the concentration is interpolated to the specific day just
         as that method does.
 
-        :param ref_date: the date that the ages are relative to.
-        :type ref_date: datetime-like object.
+        :param ref_date: the date that the ages are relative to, or one date per age.
+        :type ref_date: datetime-like object or sequence of them.
 
         :param age: the number of years before the reference date to get the concentration from. May be a non-whole
          number.
@@ -1288,9 +1432,11 @@ class MloSmoTraceGasRecord(TraceGasRecord):
         :return: the concentration data for the requested date(s), as a numpy vector or data frame. The data frame will
          also include the latency (how many years the concentrations had to be extrapolated).
         """
-        gas_dates = [ref_date - dt.timedelta(days=a*365.25) for a in age]
-        return self.get_gas_for_dates(pd.DatetimeIndex(gas_dates), deseasonalize=deseasonalize,
-                                      as_dataframe=as_dataframe)
+        # Round the offsets to whole microseconds, the same as subtracting a datetime.timedelta would
+        age_us = np.round(np.atleast_1d(age) * 365.25 * 86400e6).astype(np.int64)
+        ref_date = pd.Timestamp(ref_date) if np.ndim(ref_date) == 0 else pd.DatetimeIndex(ref_date)
+        gas_dates = ref_date - pd.to_timedelta(age_us, unit='us')
+        return self.get_gas_for_dates(gas_dates, deseasonalize=deseasonalize, as_dataframe=as_dataframe)
 
     def get_gas_by_month(self, year, month, deseasonalize=False):
         """
@@ -1380,10 +1526,11 @@ class MidlatTraceGasRecord(TraceGasRecord):
         if vmr_file is None:
             vmr_file = self._std_vmr_file
 
-        vmr_info = readers.read_vmr_file(vmr_file, as_dataframes=True, style='old')
+        vmr_info = read_std_vmr_file(vmr_file)
         if gas.lower() not in vmr_info['profile'].columns:
             raise ValueError('Gas "{}" not found in the .vmr file {}'.format(gas, vmr_file))
 
+        self._vmr_file = vmr_file
         self._this_gas_name = gas
         gas = gas.lower()
         self._this_gas_unit = 'mol/mol'
@@ -1428,6 +1575,9 @@ class MidlatTraceGasRecord(TraceGasRecord):
         # TODO: add what ancillary data is available.
         return prof_gas, dict(midtrop_theta=midtrop_theta)
 
+    def list_prior_dependent_files(self):
+        return [os.path.abspath(self._vmr_file)]
+
     def add_strat_prior(self, prof_gas, retrieval_date, mod_data, **kwargs):
         z = mod_data['profile']['Height']
         p = mod_data['profile']['Pressure']
@@ -1480,28 +1630,48 @@ class MidlatTraceGasRecord(TraceGasRecord):
         return itcz_lat, itcz_width
 
     def resample_vmrs_at_effective_altitudes(self, z, itcz_lat, itcz_width, ztrop_mod, obslat_mod):
-        ztrop_vmr = self._base_tropopause
+        zeff = self.calc_effective_altitudes(z=z, itcz_lat=itcz_lat, itcz_width=itcz_width, ztrop_mod=ztrop_mod,
+                                             obslat_mod=obslat_mod, ztrop_vmr=self._base_tropopause)
+
+        # Basically what we're doing here is interpolating the gas in the .vmr file to the levels that the .mod file is
+        # defined on, *but* instead of interpolating to them directly, we're calculating effective altitudes that
+        # account for the difference in tropopause height between the .vmr file and the .mod file.
+        return np.interp(zeff, self._base_profile['altitude'].to_numpy(), self._base_profile[self.gas_name.lower()].to_numpy())
+
+    @staticmethod
+    def calc_effective_altitudes(z, itcz_lat, itcz_width, ztrop_mod, obslat_mod, ztrop_vmr):
+        # z may also be an nprofiles-by-nlevels array, in which case the other inputs (except ztrop_vmr) must broadcast
+        # against it, i.e. be arrays the same shape or nprofiles-by-1.
         zeff = np.full_like(z, np.nan)
+        ztrop_mod = np.broadcast_to(ztrop_mod, z.shape)
+        obslat_mod = np.broadcast_to(obslat_mod, z.shape)
+        itcz_lat = np.broadcast_to(itcz_lat, z.shape)
+        itcz_width = np.broadcast_to(itcz_width, z.shape)
+
         # troposphere - just scale to tropopause
         xx_trop = z < ztrop_mod
-        zeff[xx_trop] = z[xx_trop] * ztrop_vmr/ztrop_mod
+        zeff[xx_trop] = z[xx_trop] * ztrop_vmr/ztrop_mod[xx_trop]
 
         # stratosphere - stretch/compress only the bottom levels, also account for the location of the ITCZ
-        zs = z[~xx_trop]
-        zeff[~xx_trop] = zs + np.exp(-(zs - ztrop_mod)/10.0) * (ztrop_vmr - ztrop_mod -
-                                                                3.5*ztrop_mod*(zs/ztrop_mod - 1)**2.0 *
-                                                                np.exp(-((obslat_mod - itcz_lat)/(itcz_width+10))**4.0))
-
-        zeff[zeff > z[-1]] = z[-1]
+        xx = ~xx_trop
+        zs = z[xx]
+        zt = ztrop_mod[xx]
+        zeff[xx] = zs + np.exp(-(zs - zt)/10.0) * (ztrop_vmr - zt - 3.5*zt*(zs/zt - 1)**2.0 *
+                                                   np.exp(-((obslat_mod[xx] - itcz_lat[xx])/(itcz_width[xx]+10))**4.0))
 
-        # Basically what we're doing here is interpolating the gas in the .vmr file to the levels that the .mod file is
-        # defined on, *but* instead of interpolating to them directly, we're calculating effective altitudes that
-        # account for the difference in tropopause height between the .vmr file and the .mod file.
-        return np.interp(zeff, self._base_profile['altitude'].to_numpy(), self._base_profile[self.gas_name.lower()].to_numpy())
+        ztop = np.broadcast_to(z[..., -1:], z.shape)
+        xx_top = zeff > ztop
+        zeff[xx_top] = ztop[xx_top]
+        return zeff
 
     def apply_lat_grad(self, vmrin, lat_obs, z, ztrop_mod):
-        xref = self.gas_lat_grad * (self._ref_lat/15.0)/np.sqrt(1+(self._ref_lat/15)**2)
-        xobs = self.gas_lat_grad * (lat_obs/15.0)/np.sqrt(1+(lat_obs/15)**2)
+        return self._lat_grad_helper(vmrin, self.gas_lat_grad, self._ref_lat, lat_obs, z, ztrop_mod)
+
+    @staticmethod
+    def _lat_grad_helper(vmrin, lat_grad, ref_lat, lat_obs, z, ztrop_mod):
+        # lat_grad may be an ngas x 1 array to apply the gradients of several gases to an ngas x nlevels vmrin at once
+        xref = lat_grad * (ref_lat/15.0)/np.sqrt(1+(ref_lat/15)**2)
+        xobs = lat_grad * (lat_obs/15.0)/np.sqrt(1+(lat_obs/15)**2)
         fr = 1.0 / (1.0 + (z / ztrop_mod)**2)
         return vmrin * (1 + fr*xobs)/(1 + fr*xref)
 
@@ -1509,8 +1679,13 @@ class MidlatTraceGasRecord(TraceGasRecord):
         tdiff = mod_utils.date_to_decimal_year(date_obs) - self._ref_decimal_date
         tdmaoa = tdiff - age_of_air
         vmrout = vmrin * (1 + self.gas_sec_trend * tdmaoa)
+        self._apply_gas_specific_trend(vmrout, self.gas_name, tdmaoa)
+        return vmrout
 
-        name = self.gas_name.lower()
+    @staticmethod
+    def _apply_gas_specific_trend(vmrout, gas_name, tdmaoa):
+        # Modifies vmrout in place
+        name = gas_name.lower()
         if name == 'co2':
             vmrout *= (1.0 + (tdmaoa/155.0)**2)
         elif name == 'ch4':
@@ -1520,7 +1695,200 @@ class MidlatTraceGasRecord(TraceGasRecord):
         elif name == 'f113':
             vmrout *= (1.0 + np.exp((-tdmaoa-4.0)/9.0))
 
-        return vmrout
+    @classmethod
+    def calc_priors_for_records(cls, records, obs_date, obs_lat, mod_data, use_theta_eqlat=True):
+        """
+        Compute the profiles for several gases at once.
+
+        This gives the same profiles as calling :meth:`add_trop_prior` then :meth:`add_strat_prior` for each record in
+        turn, but everything that depends only on the .mod data (tropopause height, tropospheric equivalent latitude,
+        age of air, etc.) is calculated once, and the per-gas adjustments are applied to all gases in single array
+        operations.
+
+        :param records: the records to compute profiles for. All must have been read from the same .vmr file.
+        :type records: list(:class:`MidlatTraceGasRecord`)
+
+        :param obs_date: the UTC date of the observation.
+        :type obs_date: datetime-like
+
+        :param obs_lat: the latitude of the observation.
+        :type obs_lat: float
+
+        :param mod_data: the data read from the .mod file for this observation.
+        :type mod_data: dict
+
+        :param use_theta_eqlat: as in :meth:`add_trop_prior`.
+        :type use_theta_eqlat: bool
+
+        :return: an ngas-by-nlevels array of profiles, in the same order as ``records``, and the same ancillary
+         dictionary as :meth:`add_trop_prior` returns.
+        :rtype: :class:`numpy.ndarray`, dict
+        """
+        stacked_data = {'profile': {k: v[np.newaxis] for k, v in mod_data['profile'].items()},
+                        'scalar': {k: np.array([v]) for k, v in mod_data['scalar'].items()},
+                        'file': {'lon': np.array([mod_data['file']['lon']])}}
+        gas_profs, ancillary = cls.calc_priors_for_profiles(records, [obs_date], [obs_lat], stacked_data,
+                                                            use_theta_eqlat=use_theta_eqlat)
+        return gas_profs[:, 0, :], {k: v[0] for k, v in ancillary.items()}
+
+    @classmethod
+    def calc_priors_for_profiles(cls, records, obs_dates, obs_lats, mod_data, use_theta_eqlat=True):
+        """
+        Compute the profiles for several gases at many locations and times at once.
+
+        This is the multi-profile version of :meth:`calc_priors_for_records`: the tropospheric and stratospheric
+        adjustments are applied to the points of all the profiles in single array operations, and the CLAMS age is
+        looked up once per day of year rather than once per profile.
+
+        :param records: the records to compute profiles for. All must have been read from the same .vmr file.
+        :type records: list(:class:`MidlatTraceGasRecord`)
+
+        :param obs_dates: the UTC dates of the observations, one per profile.
+        :type obs_dates: sequence(datetime-like)
+
+        :param obs_lats: the latitudes of the observations, one per profile.
+        :type obs_lats: array-like
+
+        :param mod_data: the stacked .mod data, in the form returned by :func:`readers.read_mod_files`. The "profile"
+         variables must be nprofiles-by-nlevels arrays without fill values (i.e. all profiles must have the same
+         number of levels), the "scalar" variables and the "lon" in the "file" group nprofiles-long vectors.
+        :type mod_data: dict
+
+        :param use_theta_eqlat: as in :meth:`add_trop_prior`.
+        :type use_theta_eqlat: bool
+
+        :return: an ngas-by-nprofiles-by-nlevels array of profiles, with the gases in the same order as ``records``,
+         and an ancillary dictionary like that :meth:`add_trop_prior` returns, but with nprofiles-long vectors as
+         values.
+        :rtype: :class:`numpy.ndarray`, dict
+        """
+        ref_record = records[0]
+        if any(r._vmr_file != ref_record._vmr_file for r in records):
+            raise ValueError('All records must come from the same .vmr file')
+        ref_lat = ref_record._ref_lat
+
+        # Per-gas coefficients as column vectors so that they broadcast against the points
+        lat_grads = np.array([r.gas_lat_grad for r in records], dtype=float).reshape(-1, 1)
+        sec_trends = np.array([r.gas_sec_trend for r in records], dtype=float).reshape(-1, 1)
+        seas_cyc = _SeasonalCycleCoefficients(gas_name='', gas_seas_cyc_coeff=np.array(
+            [r.gas_seas_cyc_coeff for r in records], dtype=float).reshape(-1, 1))
+        is_co2 = [r.gas_name.lower() == 'co2' for r in records]
+
+        def seasonal_cycle_factors(lat, z_sub, ztrop_sub, fyr_sub):
+            factors = mod_utils.seasonal_cycle_factor(lat=lat, z=z_sub, ztrop=ztrop_sub, fyr=fyr_sub,
+                                                      species=seas_cyc, ref_lat=ref_lat)
+            factors = np.broadcast_to(factors, (len(records), np.size(z_sub))).copy()
+            for i in np.flatnonzero(is_co2):
+                # CO2 has its own parameterization of the seasonal cycle
+                factors[i] = mod_utils.seasonal_cycle_factor(lat=lat, z=z_sub, ztrop=ztrop_sub, fyr=fyr_sub,
+                                                             species=records[i], ref_lat=ref_lat)
+            return factors
+
+        def secular_trends(vmrin, tdmaoa):
+            vmrout = vmrin * (1 + sec_trends * tdmaoa)
+            for i, r in enumerate(records):
+                cls._apply_gas_specific_trend(vmrout[i], r.gas_name, tdmaoa)
+            return vmrout
+
+        z = mod_data['profile']['Height']
+        p = mod_data['profile']['Pressure']
+        prof_theta = mod_data['profile']['PT']
+        prof_eqlat = mod_data['profile']['EqL']
+        if np.isnan(z).any():
+            raise ValueError('All profiles must have the same number of levels')
+        nprof = z.shape[0]
+        obs_lats = np.asarray(obs_lats, dtype=float)
+        ptrop = mod_data['scalar']['TROPPB']
+        ztrop = np.array([mod_utils.interp_tropopause_height_from_pressure(p_trop_met=ptrop[i], p_met=p[i], z_met=z[i])
+                          for i in range(nprof)])
+        fyr = np.array([mod_utils.date_to_frac_year(d) for d in obs_dates])
+        tdiff = np.array([mod_utils.date_to_decimal_year(d) - ref_record._ref_decimal_date for d in obs_dates])
+
+        def per_level(values):
+            # Broadcast a per-profile quantity to every level, so that it can be subset with the same 2D masks as the
+            # profile variables
+            return np.broadcast_to(np.reshape(values, (-1, 1)), z.shape)
+
+        # Base profiles, resampled to the effective altitudes (see resample_vmrs_at_effective_altitudes)
+        itcz = np.array([cls.calc_itcz(lon_obs=lon, doy_obs=mod_utils.day_of_year(d))
+                         for lon, d in zip(mod_data['file']['lon'], obs_dates)]).reshape(nprof, 2)
+        zeff = cls.calc_effective_altitudes(z=z, itcz_lat=itcz[:, :1], itcz_width=itcz[:, 1:],
+                                            ztrop_mod=per_level(ztrop), obslat_mod=per_level(obs_lats),
+                                            ztrop_vmr=ref_record._base_tropopause)
+        gas_profs = np.array([np.interp(zeff, r._base_profile['altitude'].to_numpy(),
+                                        r._base_profile[r.gas_name.lower()].to_numpy()) for r in records])
+
+        # Troposphere, see add_trop_prior
+        if use_theta_eqlat:
+            midtrop_theta = _compute_midtrop_theta(p_levels=p, prof_theta=prof_theta)
+            trop_eqlat = get_trop_eq_lats(midtrop_theta=midtrop_theta, obs_lats=obs_lats, obs_dates=obs_dates)
+        else:
+            trop_eqlat = obs_lats
+            midtrop_theta = np.full(nprof, np.nan)
+
+        xx_trop = z < per_level(ztrop)
+        z_trop = z[xx_trop]
+        ztrop_trop = per_level(ztrop)[xx_trop]
+        eqlat_trop = per_level(trop_eqlat)[xx_trop]
+        trop_aoa = mod_utils.age_of_air(lat=eqlat_trop, z=z_trop, ztrop=ztrop_trop, ref_lat=ref_lat)
+        trop_profs = cls._lat_grad_helper(gas_profs[:, xx_trop], lat_grads, ref_lat, eqlat_trop, z_trop, ztrop_trop)
+        trop_profs = secular_trends(trop_profs, per_level(tdiff)[xx_trop] - trop_aoa)
+        trop_profs *= seasonal_cycle_factors(eqlat_trop, z_trop, ztrop_trop, per_level(fyr)[xx_trop])
+        gas_profs[:, xx_trop] = trop_profs
+
+        # Stratosphere, see add_strat_prior. The CLAMS lookup is the expensive part, so do it for all the profiles on
+        # the same day at once.
+        xx_strat = ~xx_trop
+        age_of_air_years = np.full(z.shape, np.nan)
+        retrieval_doys = np.array([int(mod_utils.clams_day_of_year(d)) for d in obs_dates])
+        for doy in np.unique(retrieval_doys):
+            xx_doy = xx_strat & per_level(retrieval_doys == doy)
+            age_of_air_years[xx_doy] = get_clams_age(prof_theta[xx_doy], prof_eqlat[xx_doy], doy, as_timedelta=False)
+        xx_middleworld = xx_strat & np.isnan(age_of_air_years)
+
+        z_strat = z[xx_strat]
+        ztrop_strat = per_level(ztrop)[xx_strat]
+        eqlat_strat = prof_eqlat[xx_strat]
+        strat_profs = cls._lat_grad_helper(gas_profs[:, xx_strat], lat_grads, ref_lat, eqlat_strat, z_strat,
+                                           ztrop_strat)
+        strat_profs = secular_trends(strat_profs, per_level(tdiff)[xx_strat] - age_of_air_years[xx_strat])
+        strat_profs *= seasonal_cycle_factors(eqlat_strat, z_strat, ztrop_strat, per_level(fyr)[xx_strat])
+        gas_profs[:, xx_strat] = strat_profs
+
+        for iprof in np.flatnonzero(xx_middleworld.any(axis=1)):
+            xx_mw = xx_middleworld[iprof]
+            for prof_gas in gas_profs[:, iprof]:
+                prof_gas[xx_mw] = np.interp(prof_theta[iprof, xx_mw], prof_theta[iprof, ~xx_mw], prof_gas[~xx_mw])
+
+        return gas_profs, dict(midtrop_theta=np.array(midtrop_theta, dtype=float))
+
+
+# Stands in for a trace gas record in mod_utils.seasonal_cycle_factor to compute the factors for several gases at once
+_SeasonalCycleCoefficients = namedtuple('_SeasonalCycleCoefficients', ('gas_name', 'gas_seas_cyc_coeff'))
+
+# Standard .vmr files already parsed by this process, see read_std_vmr_file
+_std_vmr_file_cache = dict()
+
+
+def read_std_vmr_file(vmr_file, lowercase_names=True):
+    """
+    Read an old-style standard .vmr file (e.g. summer_35N.vmr), parsing it only once per process.
+
+    :param vmr_file: the path to the .vmr file.
+    :type vmr_file: str
+
+    :param lowercase_names: whether the header and gas names are converted to lower case.
+    :type lowercase_names: bool
+
+    :return: the .vmr data as returned by :func:`readers.read_vmr_file` with ``as_dataframes=True``. This is shared by
+     every caller in the process, so it must not be modified. If the file is modified, it will be read again.
+    :rtype: dict
+    """
+    key = (os.path.abspath(vmr_file), os.path.getmtime(vmr_file), lowercase_names)
+    if key not in _std_vmr_file_cache:
+        _std_vmr_file_cache[key] = readers.read_vmr_file(vmr_file, as_dataframes=True, lowercase_names=lowercase_names,
+                                                         style='old')
+    return _std_vmr_file_cache[key]
 
 
 class HFTropicsRecord(MloSmoTraceGasRecord):
@@ -1530,6 +1898,21 @@ class HFTropicsRecord(MloSmoTraceGasRecord):
 
     ch4_hf_slopes_file = os.path.join(_data_dir, 'ch4_hf_slopes.nc')
 
+    def __init__(self, *args, ch4_record=None, **kwargs):
+        """
+        Takes the same arguments as :class:`MloSmoTraceGasRecord` plus:
+
+        :param ch4_record: optional, an existing CH4 record to derive the stratospheric HF from if the strat LUT needs
+         recalculated. If not given, a new :class:`CH4TropicsRecord` is created in that case. Passing the record
+         already used for the CH4 priors avoids setting up a second one; it must cover the same dates as this record.
+        :type ch4_record: :class:`CH4TropicsRecord`
+        """
+        self._ch4_record = ch4_record
+        super(HFTropicsRecord, self).__init__(*args, **kwargs)
+
+    def _age_spec_gas_kwargs(self):
+        return {'ch4_record': self._ch4_record}
+
     @classmethod
     def get_mlo_smo_mean(cls, mlo_file, smo_file, first_date, last_date, truncate_date):
         """
@@ -1614,39 +1997,48 @@ class HFTropicsRecord(MloSmoTraceGasRecord):
         return bin_names, slopes, fit_params
 
     @classmethod
-    def _calc_hf_from_ch4(cls, ch4_concs, ch4_record, year, ch4_hf_slopes, ch4_hf_fit_params, lag, use_ace_specific_slopes=False):
+    def _calc_hf_from_ch4(cls, ch4_concs, ch4_record, ch4_hf_slopes, ch4_hf_fit_params, lag,
+                          use_ace_specific_slopes=False):
         # We need to calculate the strat. bdy. cond. for each data point in ch4_concs because it's important to have the
-        # correct boundary condition since that is the intercept for the HF:CH4 slope. Originally I tried to use just an
-        #
-        sbc_ch4 = xr.DataArray(np.zeros_like(ch4_concs.data), coords=ch4_concs.coords)
+        # correct boundary condition since that is the intercept for the HF:CH4 slope. This is done for the whole
+        # date x age grid at once.
 
         # Holy incompatible types: ch4_concs.date is a numpy datetime64 which can't be added to a relativedelta. It is
         # easiest to convert to a datetime index, but that *also* can't be added to a relativedelta, so we have to
         # convert it further to an array of standard Python datetime objects.
-        ch4_date_as_pydt = pd.DatetimeIndex(ch4_concs.coords['date'].data).to_pydatetime()
-        for age in ch4_concs.coords['age'].data:
-            # Since the CH4 record seasonal dataframe isn't lagged, to get the strat. bdy. cond. for the right dates, we
-            # need to subtract the age from the ch4_concs date coordinate (to get back to the date when air of that age
-            # entered the stratosphere) and subtract the lag (to get back to when air entering the stratosphere was at
-            # the tropical surface).
-            ch4_sbc_dates = ch4_date_as_pydt - mod_utils.frac_years_to_reldelta(age) - lag
-            ch4_sbc_dates = pd.DatetimeIndex(ch4_sbc_dates).unique()
-            # Get the CH4 record on the required dates and broadcast into the date/theta slice for this age in the
-            # sbc_ch4
-            tmp_index = ch4_record.conc_seasonal.index.append(ch4_sbc_dates).unique()
-            ch4_sbc_vec = ch4_record.conc_seasonal.reindex(tmp_index).interpolate(method='index').reindex(ch4_sbc_dates).dmf_mean
-            sbc_ch4.loc[{'age': age}] = ch4_sbc_vec.to_numpy().reshape(-1, 1)
-
-        if use_ace_specific_slopes and year in ch4_hf_slopes.coords['year']:
-            slope = ch4_hf_slopes.sel(year=year)
-        else:
-            slope = mod_utils.hf_ch4_slope_fit(year, *ch4_hf_fit_params)
+        ch4_dates = pd.DatetimeIndex(ch4_concs.coords['date'].data)
+        ch4_date_as_pydt = ch4_dates.to_pydatetime()
+        ch4_ages = ch4_concs.coords['age'].data
+
+        # Since the CH4 record seasonal dataframe isn't lagged, to get the strat. bdy. cond. for the right dates, we
+        # need to subtract the age from the ch4_concs date coordinate (to get back to the date when air of that age
+        # entered the stratosphere) and subtract the lag (to get back to when air entering the stratosphere was at
+        # the tropical surface).
+        ch4_sbc_dates = pd.DatetimeIndex(np.concatenate([
+            ch4_date_as_pydt - mod_utils.frac_years_to_reldelta(age) - lag for age in ch4_ages
+        ]))
+
+        # Get the CH4 record on all the required dates at once, then put each back in its place in the date x age grid
+        unique_sbc_dates = ch4_sbc_dates.unique()
+        tmp_index = ch4_record.conc_seasonal.index.append(unique_sbc_dates).unique()
+        ch4_sbc_vec = ch4_record.conc_seasonal.reindex(tmp_index).interpolate(method='index').reindex(unique_sbc_dates).dmf_mean
+        ch4_sbc_vec = ch4_sbc_vec.to_numpy()[unique_sbc_dates.get_indexer(ch4_sbc_dates)]
+        sbc_ch4 = xr.DataArray(ch4_sbc_vec.reshape(ch4_ages.size, ch4_dates.size).T,
+                               coords=[('date', ch4_concs.coords['date'].data), ('age', ch4_ages)])
+
+        years = ch4_dates.year
+        slope = mod_utils.hf_ch4_slope_fit(years.to_numpy(), *[param.item() for param in ch4_hf_fit_params])
+        if use_ace_specific_slopes:
+            for year in np.unique(years):
+                if year in ch4_hf_slopes.coords['year']:
+                    slope[years == year] = ch4_hf_slopes.sel(year=year).item()
+        slope = xr.DataArray(slope, coords=[('date', ch4_concs.coords['date'].data)])
 
         # The slope is CH4 vs. HF. We want HF as a function of CH4 so
         #    CH4 - sbc = m * HF
         # => HF = (CH4 - sbc)/m
 
-        return (ch4_concs - sbc_ch4) / slope
+        return ((ch4_concs - sbc_ch4) / slope).transpose(*ch4_concs.dims)
 
     @classmethod
     def _calc_age_spec_gas(cls, df, lag, requested_dates=None, ch4_record=None):
@@ -1679,11 +2071,8 @@ class HFTropicsRecord(MloSmoTraceGasRecord):
             region_ch4_hf_fits_params = ch4_hf_fit_params.isel(latitude_bins=iregion)
 
             ch4_concentrations = ch4_record.conc_strat[region]
-            hf_concentrations = xr.DataArray(np.full_like(ch4_concentrations, np.nan), coords=ch4_concentrations.coords)
-            for year in np.unique(hf_concentrations.coords['date'].dt.year):
-                xx_date = slice(pd.Timestamp(year, 1, 1), pd.Timestamp(year, 12, 31))
-                ch4_subset = ch4_concentrations.sel(date=xx_date)
-                hf_concentrations.loc[{'date': xx_date}] = cls._calc_hf_from_ch4(ch4_subset, ch4_record, year, region_ch4_hf_slopes, region_ch4_hf_fits_params, lag)
+            hf_concentrations = cls._calc_hf_from_ch4(ch4_concentrations, ch4_record, region_ch4_hf_slopes,
+                                                      region_ch4_hf_fits_params, lag)
 
             # Occasionally the slope calculation will give negative values. Set them to 0
             # xarray does not support multidimensional boolean indexing, so we must work on the underlying
@@ -1742,9 +2131,7 @@ class N2OTropicsRecord(MloSmoTraceGasRecord):
             row[nans] = np.interp(row_age[nans], row_age[~nans], row[~nans])
             return row
 
-        with xr.open_dataset(cls._ace_fn2o_file) as dset:
-            fn2o_lut = dset['fn2o']
-
+        def fill_lut(fn2o_lut):
             # Yes, this is filling in a different direction than the CH4 method. There it makes sense to extend along
             # theta, because (a) we don't expect much data beyond the available theta range from ACE and (b) plotted
             # against theta, the curves are flat parabolas, so a constant extrapolation is reasonable. Here, it makes
@@ -1753,12 +2140,12 @@ class N2OTropicsRecord(MloSmoTraceGasRecord):
             for i in range(fn2o_lut.theta.size):
                 fn2o_lut[{'theta': i}] = fill_nans(fn2o_lut.age, fn2o_lut.isel(theta=i))
 
-            # ages is assumed to be a simple numpy array. We'll extrapolate in order to get the very youngest and oldest
-            # ages that might be just outside the bin centers. Just in case, fill in any NaNs along the theta dimension
-            # (was necessary for CH4, might not be here).
-            fn2o_lut = fn2o_lut.interp(age=ages, kwargs={'fill_value': 'extrapolate'}).interpolate_na('theta')
+        fn2o_lut = get_filled_static_lut(cls._ace_fn2o_file, 'fn2o', fill_lut)
 
-        return fn2o_lut
+        # ages is assumed to be a simple numpy array. We'll extrapolate in order to get the very youngest and oldest
+        # ages that might be just outside the bin centers. This interpolates every theta bin at once. Just in case, fill
+        # in any NaNs along the theta dimension (was necessary for CH4, might not be here).
+        return fn2o_lut.interp(age=ages, kwargs={'fill_value': 'extrapolate'}).interpolate_na('theta')
 
     def list_strat_dependent_files(self):
         dep_dict = super(N2OTropicsRecord, self).list_strat_dependent_files()
@@ -1796,11 +2183,7 @@ class CH4TropicsRecord(MloSmoTraceGasRecord):
         # First get the fraction of N2O remaining for the given ages
         fn2o = N2OTropicsRecord.get_frac_remaining_by_age(ages).squeeze()
 
-        # Then get the relationship between F(N2O) and F(CH4) derived from ACE-FTS data. This lookup table was created
-        # using `backend_analysis/ace_fts_analysis.make_fch4_fn2o_lookup_table()`.
-        with xr.open_dataset(cls._fn2o_fch4_lut_file) as dset:
-            fch4_lut = dset['fch4']
-
+        def fill_lut(fch4_lut):
             # Extrapolate out to all thetas before interpolating to F(N2O). If we don't do this first, then we'll lose
             # information at higher thetas. Say we need to interpolate to F(N2O) = 0.03 and the F(N2O) = 0.025 bin goes
             # out to theta = 3500, but the F(N2O) = 0.075 bin only goes to theta = 2500. Then F(N2O) = 0.03 will get
@@ -1809,24 +2192,25 @@ class CH4TropicsRecord(MloSmoTraceGasRecord):
             for j in range(fch4_lut.shape[0]):
                 fch4_lut[j, :] = replace_end_nans(fch4_lut[j, :])
 
-            # Now that F(N2O) has both age and theta as axes, we need to deal with that. Unfortunately, we can't handle
-            # the interpolation along both axes in one shot, so we need to iterate over the theta values that we want
-            # the F(CH4) LUT to have, interpolate F(N2O) to those to get a vector with the same length as ages, then
-            # interpolate each theta row of F(CH4) to the F(N2O) values for each age.
-            fch4_lut_final = xr.DataArray(np.full([np.size(ages), np.size(fch4_lut.theta)], np.nan),
-                                          coords=[ages, fch4_lut.theta], dims=('age', 'theta'))
-            for itheta, this_theta in enumerate(fch4_lut.theta):
-                this_fn2o = fn2o.interp(theta=this_theta, kwargs={'fill_value': 'extrapolate'})
-                this_fch4 = fch4_lut[{'theta': itheta}]
-                # Use constant value extrapolation past the edge of the FN2O values in the LUT. Doing this rather than
-                # linear extrapolation prevents undershooting the F(CH4) at high theta.
-                fill_values = (this_fch4[0], this_fch4[-1])
-                fch4_lut_final[{'theta': itheta}] = this_fch4.interp(fn2o=this_fn2o, kwargs={'fill_value': fill_values})
-
-            # Fill in NaNs along each theta line
-            fch4_lut_final = fch4_lut_final.interpolate_na('theta')
-
-        return fch4_lut_final
+        # Then get the relationship between F(N2O) and F(CH4) derived from ACE-FTS data. This lookup table was created
+        # using `backend_analysis/ace_fts_analysis.make_fch4_fn2o_lookup_table()`.
+        fch4_lut = get_filled_static_lut(cls._fn2o_fch4_lut_file, 'fch4', fill_lut).transpose('fn2o', 'theta')
+
+        # Now that F(N2O) has both age and theta as axes, we need to deal with that. First interpolate F(N2O) to the
+        # theta values that we want the F(CH4) LUT to have, giving an age-by-theta array, then interpolate each theta
+        # column of F(CH4) to the F(N2O) values for each age. Interpolating all the columns to all the F(N2O) values
+        # then taking the matching column of the result does that in one shot.
+        this_fn2o = fn2o.interp(theta=fch4_lut.theta.data, kwargs={'fill_value': 'extrapolate'}).transpose('age', 'theta')
+        # Use constant value extrapolation past the edge of the FN2O values in the LUT. Doing this rather than linear
+        # extrapolation prevents undershooting the F(CH4) at high theta.
+        fch4_interpolator = interp1d(fch4_lut.fn2o.data, fch4_lut.data, axis=0, bounds_error=False,
+                                     fill_value=(fch4_lut.data[0], fch4_lut.data[-1]))
+        itheta = np.arange(fch4_lut.theta.size)
+        fch4_values = fch4_interpolator(this_fn2o.data)[:, itheta, itheta]
+        fch4_lut_final = xr.DataArray(fch4_values, coords=[ages, fch4_lut.theta], dims=('age', 'theta'))
+
+        # Fill in NaNs along each theta line
+        return fch4_lut_final.interpolate_na('theta')
 
     def lat_bias_correction(self, obs_date, obs_lat, mod_data, prior_data):
         if obs_lat < 0:
@@ -1850,6 +2234,18 @@ class CH4TropicsRecord(MloSmoTraceGasRecord):
             prof_gas[prof_gas < 0] = 0
         return prof_gas, ancillary_dict
 
+    def add_strat_prior_for_profiles(self, prof_gas, retrieval_dates, mod_data, **kwargs):
+        prof_gas, ancillary_dict = super(CH4TropicsRecord, self).add_strat_prior_for_profiles(
+            prof_gas=prof_gas, retrieval_dates=retrieval_dates, mod_data=mod_data, **kwargs
+        )
+        # As in add_strat_prior, replace negative concentrations (logged per profile)
+        for single_prof in prof_gas:
+            if np.any(single_prof < 0):
+                inds = np.flatnonzero(single_prof < 0)
+                logger.info('Replacing negative CH4 value(s) at level(s) {}'.format(', '.join(str(v) for v in inds)))
+                single_prof[single_prof < 0] = 0
+        return prof_gas, ancillary_dict
+
 
 class CORecord(TraceGasRecord):
     _gas_name = 'co'
@@ -1964,6 +2360,9 @@ class CORecord(TraceGasRecord):
         trop_eff_lat, midtrop_theta = get_trop_eq_lat(theta, pres, obs_lat, obs_date)
         return prof_gas, dict(midtrop_theta=midtrop_theta, trop_lat=trop_eff_lat)
 
+    def list_prior_dependent_files(self):
+        return [os.path.abspath(_excess_co_file)]
+
     def add_strat_prior(self, prof_gas, retrieval_date, mod_data, **kwargs):
         """
         Add the stratospheric CO prior.
@@ -2117,6 +2516,20 @@ def regenerate_gas_strat_lut_files():
         record(force_strat_calculation=True, save_strat=True)
 
 
+def _interp_rows_linear(x, y, x_new):
+    # Linearly interpolate row i of the 2D array y (defined on the coordinate x) to x_new[i], extrapolating outside
+    # x. This does the same arithmetic as scipy.interpolate.interp1d(x, y, fill_value='extrapolate')(x_new) (which
+    # xarray uses for extrapolation) for the diagonal elements only.
+    order = np.argsort(x, kind='mergesort')
+    x = x[order]
+    y = y[:, order]
+    rows = np.arange(y.shape[0])
+    i_hi = np.clip(np.searchsorted(x, x_new), 1, x.size - 1)
+    i_lo = i_hi - 1
+    slope = (y[rows, i_hi] - y[rows, i_lo]) / (x[i_hi] - x[i_lo])
+    return slope * (x_new - x[i_lo]) + y[rows, i_lo]
+
+
 def get_clams_age(theta, eq_lat, day_of_year, as_timedelta=False, clams_dat=dict()):
     """
     Get the age of air predicted by the CLAMS model for points defined by potential temperature and equivalent latitude.
@@ -2191,26 +2604,115 @@ def _read_pres_range(nc_handle):
 
 
 def _compute_midtrop_theta(p_levels, prof_theta, pres_range=None):
+    # Works on one profile or on several profiles at once (one per row). Each row is averaged separately so that the
+    # result is the same whether or not a profile is computed as part of a batch.
     if pres_range is None:
-        with ncdf.Dataset(_theta_v_lat_file) as nch:
-            pres_range = _read_pres_range(nch)
+        pres_range = _load_trop_eqlat_lut()['pres_range']
     zz = (p_levels >= pres_range[0]) & (p_levels <= pres_range[1])
-    return np.mean(prof_theta[zz])
+    if np.ndim(prof_theta) == 1:
+        return np.mean(prof_theta[zz])
+    return np.array([np.mean(theta[z]) for theta, z in zip(prof_theta, zz)])
+
+
+def _load_trop_eqlat_lut(_lut=dict()):
+    """
+    Load the mid-tropospheric theta vs. latitude climatology, interpolated to daily resolution.
+
+    The climatology file has one curve every two weeks. Those are interpolated once to midnight of each day of the year
+    the climatology was made for (plus midnight on 1 Jan of the following year), so that looking up the curve for any
+    date only needs a linear interpolation between two consecutive days. Since the two week curves are also at
+    midnight, this gives the same result as interpolating the two week curves directly. As with the CLAMS data, the
+    mutable default argument caches the table for future calls.
+
+    :return: a dictionary with the daily "theta" and "lat" climatology curves (ndays+1 by nbins arrays), the "year" the
+     climatology was made for, and the "pres_range" that the mid-tropospheric theta is averaged over.
+    :rtype: dict
+    """
+    if len(_lut) == 0:
+        with ncdf.Dataset(_theta_v_lat_file, 'r') as nch:
+            theta = nch.variables['theta_mean'][:].squeeze().filled(np.nan)
+            lat = nch.variables['latitude_mean'][:].squeeze().filled(np.nan)
+            # Sometimes lats near 0 get read in as very small non-zero numbers. This causes a
+            # problem later when we select all lats in one hemisphere since the equator needs
+            # to be in both hemispheres for this to work
+            lat[np.abs(lat) < 0.001] = 0.0
+            times = nch.variables['times'][:].filled(np.nan)
+            times_units = nch.variables['times'].units
+            times_calendar = nch.variables['times'].calendar
+            pres_range = _read_pres_range(nch)
+
+        # Append the first time slice (which will be the first two weeks of the year) to the end so that we can
+        # intepolate past the last date, assuming that the changes are cyclical. The times are converted to days since
+        # 1 Jan of the year the climatology was made for.
+        first_time = ncdf.num2date(times[0], times_units, times_calendar)
+        year = first_time.year
+        start_num = ncdf.date2num(dt.datetime(year, 1, 1), times_units, times_calendar)
+        day_length = ncdf.date2num(dt.datetime(year, 1, 2), times_units, times_calendar) - start_num
+        times = np.append(times, ncdf.date2num(first_time.replace(year=year+1), times_units, times_calendar))
+        times = (times - start_num) / day_length
+        theta = np.concatenate([theta, theta[0:1, :]], axis=0)
+        lat = np.concatenate([lat, lat[0:1, :]], axis=0)
+
+        days = np.arange(0, (dt.datetime(year+1, 1, 1) - dt.datetime(year, 1, 1)).days + 1)
+        _lut['theta'] = np.array([np.interp(days, times, theta[:, i]) for i in range(theta.shape[1])]).T
+        _lut['lat'] = np.array([np.interp(days, times, lat[:, i]) for i in range(lat.shape[1])]).T
+        _lut['year'] = year
+        _lut['pres_range'] = pres_range
 
+    return _lut
 
-def get_trop_eq_lat(prof_theta, p_levels, obs_lat, obs_date, theta_wt=1.0, lat_wt=1.0, dtheta_cutoff=0.25,
-                    _theta_v_lat=dict()):
+
+def get_trop_eq_lat(prof_theta, p_levels, obs_lat, obs_date, theta_wt=1.0, lat_wt=1.0, dtheta_cutoff=0.25):
     """
     Compute the tropospheric equivalent latitude for an observation based on its mid-tropospheric potential temperature
 
+    This is the single profile version of :func:`get_trop_eq_lats`, see that function for how the equivalent latitude
+    is found. Exactly what is defined as mid-troposphere is set by the pressure range in the climatology file,
+    currently it is 700-500 hPa.
+
+    :param prof_theta: the profile of potential temperature values associated with this observation
+    :type prof_theta: :class:`numpy.ndarray`
+
+    :param p_levels: the profile of pressure levels that ``prof_theta`` is defined on
+    :type p_levels: :class:`numpy.ndarray`
+
+    :param obs_lat: the geographic latitude of the observation
+    :type obs_lat: float
+
+    :param obs_date: the date of the observation
+    :type obs_date: datetime-lik
+
+    :param theta_wt: see :func:`get_trop_eq_lats`.
+    :type theta_wt: float
+
+    :param lat_wt: see :func:`get_trop_eq_lats`.
+    :type lat_wt: float
+
+    :param dtheta_cutoff: see :func:`get_trop_eq_lats`.
+    :type dtheta_cutoff: float
+
+    :return: the equivalent latitude derived from mid-tropospheric potential temperature and the mid-tropospheric
+     potential temperature itself
+    :rtype: float, float
+    """
+    midtrop_theta = _compute_midtrop_theta(p_levels, prof_theta)
+    eqlat = get_trop_eq_lats(midtrop_theta, obs_lat, [obs_date], theta_wt=theta_wt, lat_wt=lat_wt,
+                             dtheta_cutoff=dtheta_cutoff)
+    return eqlat.item(), midtrop_theta
+
+
+def get_trop_eq_lats(midtrop_theta, obs_lats, obs_dates, theta_wt=1.0, lat_wt=1.0, dtheta_cutoff=0.25):
+    """
+    Compute the tropospheric equivalent latitude for many observations from their mid-tropospheric potential temperature
+
     The rationale for using this approach is described in the module help for backend_analysis/geos_theta_lat.py. This
     function relies on a climatology created by that module, which should contain the zonal mean relationship between
     mid-tropospheric potential temperature and latitude at 2 week intervals.
 
     This function finds the equivalent latitude for an observation by looking for the point in the same hemisphere that
-    has the closest mid-tropospheric potential temperature in the climatology as does the profile given as input.
-    Exactly what is defined as mid-troposphere is set by the pressure range in the climatology file, currently it is
-    700-500 hPa.
+    has the closest mid-tropospheric potential temperature in the climatology as does the observation. The
+    mid-tropospheric potential temperature must be averaged over the pressure range in the climatology file (currently
+    700-500 hPa), :func:`get_trop_eq_lat` takes care of that for a single profile.
 
     This function checks both north and south of the observation latitude for the climatology latitude with the closest
     potential temperature. As long as one is sufficiently closer to the observation's potential temperature, that one
@@ -2219,19 +2721,19 @@ def get_trop_eq_lat(prof_theta, p_levels, obs_lat, obs_date, theta_wt=1.0, lat_w
 
     .. math::
 
-       |(el_s - l) - (el_n - l)| < d\theta
+       |(el_s - l) - (el_n - l)| < d\\theta
 
     where :math:`el_s` and :math:`el_n` are the southern and northern latitudes in the climatology with the closest
-    potential temperature to the observations, :math:`l` is the observation latitude, and :math:`d\theta` is
+    potential temperature to the observations, :math:`l` is the observation latitude, and :math:`d\\theta` is
     ``dtheta_cutoff``.  If this condition is met, then rather than just choosing whichever one has the closer
     potential temperature, the algorithm uses a cost function:
 
     .. math:
 
-       |w_t * d\theta| + |w_l * dl|
+       |w_t * d\\theta| + |w_l * dl|
 
     where :math:`w_t` and :math:`w_l` are the weights for potential temperature (``theta_wt``) and latitude (``lat_wt``)
-    respectively, and :math:`d\theta` and :math:`dl` are the difference in potential temperature and latitude,
+    respectively, and :math:`d\\theta` and :math:`dl` are the difference in potential temperature and latitude,
     respectively, between the observation and the point chosen on the climatology curve.
 
     The goal of this approach is to deal with two cases:
@@ -2250,17 +2752,17 @@ def get_trop_eq_lat(prof_theta, p_levels, obs_lat, obs_date, theta_wt=1.0, lat_w
     further position, but without a second tracer to differentiate that in the meteorology data, or information on
     prevailing north/south transport for a given lat/lon, the best assumption is to favor shorter transport.
 
-    :param prof_theta: the profile of potential temperature values associated with this observation
-    :type prof_theta: :class:`numpy.ndarray`
+    In the tropics (|lat| < 20) the theta/latitude relationship doesn't hold, so the geographic latitude is returned.
+    Between 20 and 25 degrees, the result is a linear blend of the geographic and equivalent latitudes.
 
-    :param p_levels: the profile of pressure levels that ``prof_theta`` is defined on
-    :type p_levels: :class:`numpy.ndarray`
+    :param midtrop_theta: the mid-tropospheric potential temperature for each observation
+    :type midtrop_theta: array-like
 
-    :param obs_lat: the geographic latitude of the observation
-    :type obs_lat: float
+    :param obs_lats: the geographic latitude of each observation
+    :type obs_lats: array-like
 
-    :param obs_date: the date of the observation
-    :type obs_date: datetime-lik
+    :param obs_dates: the date of each observation
+    :type obs_dates: sequence of datetime-like
 
     :param theta_wt: a weight to use when deciding between two different latitudes with similar theta values. Increasing
      this relative to ``lat_wt`` will increase the cost for choosing the point with a greater difference in potential
@@ -2274,114 +2776,63 @@ def get_trop_eq_lat(prof_theta, p_levels, obs_lat, obs_date, theta_wt=1.0, lat_w
      mid-troposphere potential temperature have to be to take into account which one is closer. See above.
     :type dtheta_cutoff: float
 
-    :param _theta_v_lat: not intended to pass in; this is a dictionary that will be given the values read in from the
-     climatology file to cache them for future function calls.
-
-    :return: the equivalent latitude derived from mid-tropospheric potential temperature
-    :rtype: float
+    :return: the equivalent latitude for each observation
+    :rtype: :class:`numpy.ndarray`
     """
-
-    def theta_lat_cost(dtheta, dlat):
-        return dtheta*theta_wt + dlat*lat_wt
-
-    def find_closest_theta(theta, lat, obs_theta):
-        # Find which index our obs_lat is closest to
-        start = np.argmin(np.abs(lat - obs_lat))
-
-        # Find the locations both north and south of the observation lat that have the smallest difference in theta
-        theta_diff = np.abs(theta - obs_theta)
-        south_min_ind = np.argmin(theta_diff[:start+1])
-        south_dtheta = theta_diff[south_min_ind]
-        south_dlat = np.abs(lat[south_min_ind] - obs_lat)
-        north_min_ind = np.argmin(theta_diff[start:]) + start
-        north_dtheta = theta_diff[north_min_ind]
-        north_dlat = np.abs(lat[north_min_ind] - obs_lat)
-
-        # In most cases, one or the other should have a much closer match. However, if both are similarly good, we need
-        # a way to break the tie. What we want is to pick the one that is closer geographically. To do that, we'll use
-        # basically a simple cost function that adds the difference in theta and latitude together. Eyeballing the plots
-        # of theta vs. latitude from the above file, the typical gradient in the NH is between 0.5 and 1 K/deg. To me
-        # that says that we can weight theta and latitude equally in the cost function.
-        if np.abs(south_dtheta - north_dtheta) > dtheta_cutoff:
-            if south_dtheta < north_dtheta:
-                return lat[south_min_ind]
-            else:
-                return lat[north_min_ind]
-        else:
-            if theta_lat_cost(south_dtheta, south_dlat) < theta_lat_cost(north_dtheta, north_dlat):
-                return lat[south_min_ind]
-            else:
-                return lat[north_min_ind]
-
-    if len(_theta_v_lat) == 0:
-        with ncdf.Dataset(_theta_v_lat_file, 'r') as nch:
-            _theta_v_lat['theta'] = nch.variables['theta_mean'][:].squeeze()
-            lat_tmp = nch.variables['latitude_mean'][:].squeeze()
-            # Sometimes lats near 0 get read in as very small non-zero numbers. This causes a 
-            # problem later when we select all lats in one hemisphere since the equator needs
-            # to be in both hemispheres for this to work
-            lat_tmp[np.abs(lat_tmp) < 0.001] = 0.0
-            _theta_v_lat['lat'] = lat_tmp
-            _theta_v_lat['times'] = nch.variables['times'][:]
-            _theta_v_lat['times_units'] = nch.variables['times'].units
-            _theta_v_lat['times_calendar'] = nch.variables['times'].calendar
-
-            # Read the pressure range that we're using
-            _theta_v_lat['pres_range'] = _read_pres_range(nch)
-
-            # Append the first time slice (which will be the first two weeks of the year) to the end so that we can
-            # intepolate past the last date, assuming that the changes are cyclical. At the same time, let's record the
-            # year used in the dates
-            new_time = ncdf.num2date(_theta_v_lat['times'][0], _theta_v_lat['times_units'], _theta_v_lat['times_calendar'])
-            _theta_v_lat['year'] = year = new_time.year
-            new_time = ncdf.date2num(new_time.replace(year=year+1), _theta_v_lat['times_units'], _theta_v_lat['times_calendar'])
-            _theta_v_lat['times'] = np.concatenate([_theta_v_lat['times'], [new_time]], axis=0)
-            for k in ('theta', 'lat'):
-                _theta_v_lat[k] = np.concatenate([_theta_v_lat[k], _theta_v_lat[k][0:1, :]], axis=0)
-
-    # First we need to get the lat vs. theta curve for this particular date
-    ntimes, nbins = _theta_v_lat['theta'].shape
-    if obs_date.month == 2 and obs_date.day == 29:
-        # The lookup table was made for 2018, which has no leap day. Therefore when we try to convert a Feb 29th date
-        # to a date number it fails. Since the difference in the theta table between Feb 28 and 29 should be minor,
-        # the simplest fix is to just set the date to Feb 28th.
-        lut_date = obs_date.replace(year=_theta_v_lat['year'], day=28)
-    else:
-        lut_date = obs_date.replace(year=_theta_v_lat['year'])
-
-    this_datenum = ncdf.date2num(lut_date, _theta_v_lat['times_units'], _theta_v_lat['times_calendar'])
-    this_theta_clim = np.full((nbins,), np.nan)
-    this_lat_clim = np.full((nbins,), np.nan)
-    for i in range(nbins):
-        this_theta_clim[i] = np.interp(this_datenum, _theta_v_lat['times'], _theta_v_lat['theta'][:, i])
-        this_lat_clim[i] = np.interp(this_datenum, _theta_v_lat['times'], _theta_v_lat['lat'][:, i])
-
-    # Then we find the theta for this profile
-    midtrop_theta = _compute_midtrop_theta(p_levels, prof_theta, _theta_v_lat['pres_range'])
-
-    # Last we find the part on the lookup curve that has the same mid-tropospheric theta as our profile. We have to be
+    lut = _load_trop_eqlat_lut()
+    midtrop_theta = np.atleast_1d(np.asarray(midtrop_theta, dtype=float))
+    obs_lats = np.atleast_1d(np.asarray(obs_lats, dtype=float))
+    obs_dates = pd.DatetimeIndex(obs_dates)
+
+    # First we need to get the lat vs. theta curve for each date. The lookup table was made for 2018, which has no
+    # leap day, so dates in leap years after 28 Feb are shifted back one day. That puts 29 Feb on 28 Feb; the difference
+    # in the theta table between Feb 28 and 29 should be minor.
+    lut_days = obs_dates.dayofyear.to_numpy() - 1 + (obs_dates - obs_dates.normalize()).total_seconds().to_numpy() / 86400
+    if lut['theta'].shape[0] == 366:
+        lut_days -= obs_dates.is_leap_year & (obs_dates.dayofyear >= 60)
+    iday = np.clip(np.floor(lut_days).astype(int), 0, lut['theta'].shape[0] - 2)
+    wt = (lut_days - iday)[:, None]
+    theta_clim = (1 - wt) * lut['theta'][iday] + wt * lut['theta'][iday+1]
+    lat_clim = (1 - wt) * lut['lat'][iday] + wt * lut['lat'][iday+1]
+
+    # Last we find the part on the lookup curve that has the same mid-tropospheric theta as each profile. We have to be
     # careful because we will have the same theta in both the NH and SH. The way we'll handle this is to require that we
     # stay in the same hemisphere if we're in the extra tropics (|lat| > 20) and just use the geographic latitude in
-    # the tropics since this theta/latitude relationship doesn't hold.
+    # the tropics since this theta/latitude relationship doesn't hold. Points on the curve in the other hemisphere are
+    # excluded by making their differences infinite.
+    obs_lats_col = obs_lats[:, None]
+    in_hemisphere = np.where(obs_lats_col > 0, lat_clim > 0.0, lat_clim < 0.0)
+    bin_inds = np.arange(lat_clim.shape[1])
+
+    # Find which index the obs lat is closest to
+    start = np.argmin(np.where(in_hemisphere, np.abs(lat_clim - obs_lats_col), np.inf), axis=1)[:, None]
+
+    # Find the locations both north and south of the observation lat that have the smallest difference in theta
+    theta_diff = np.abs(theta_clim - midtrop_theta[:, None])
+    south_min_ind = np.argmin(np.where(in_hemisphere & (bin_inds <= start), theta_diff, np.inf), axis=1)[:, None]
+    north_min_ind = np.argmin(np.where(in_hemisphere & (bin_inds >= start), theta_diff, np.inf), axis=1)[:, None]
+    south_dtheta = np.take_along_axis(theta_diff, south_min_ind, axis=1)
+    north_dtheta = np.take_along_axis(theta_diff, north_min_ind, axis=1)
+    south_lat = np.take_along_axis(lat_clim, south_min_ind, axis=1)
+    north_lat = np.take_along_axis(lat_clim, north_min_ind, axis=1)
+
+    # In most cases, one or the other should have a much closer match. However, if both are similarly good, we need
+    # a way to break the tie. What we want is to pick the one that is closer geographically. To do that, we'll use
+    # basically a simple cost function that adds the difference in theta and latitude together. Eyeballing the plots
+    # of theta vs. latitude from the above file, the typical gradient in the NH is between 0.5 and 1 K/deg. To me
+    # that says that we can weight theta and latitude equally in the cost function.
+    south_cost = south_dtheta * theta_wt + np.abs(south_lat - obs_lats_col) * lat_wt
+    north_cost = north_dtheta * theta_wt + np.abs(north_lat - obs_lats_col) * lat_wt
+    choose_south = np.where(np.abs(south_dtheta - north_dtheta) > dtheta_cutoff,
+                            south_dtheta < north_dtheta, south_cost < north_cost)
+    eqlat = np.where(choose_south, south_lat, north_lat)[:, 0]
+
+    blend_wt = np.minimum((np.abs(obs_lats) - 20)/5.0, 1.0)
+    eqlat = np.where(np.abs(obs_lats) < 25, (1 - blend_wt) * obs_lats + blend_wt * eqlat, eqlat)
 
     # is_tropics doesn't actually use the age & doy arguments, they are just there for consistency with is_vortex, so
     # we can pass them None.
-    if mod_utils.is_tropics(obs_lat, None, None):
-        return obs_lat, midtrop_theta
-    elif obs_lat > 0:
-        yy = this_lat_clim > 0.0
-    else:
-        yy = this_lat_clim < 0.0
-
-    this_lat_clim = this_lat_clim[yy]
-    this_theta_clim = this_theta_clim[yy]
-
-    eqlat = find_closest_theta(this_theta_clim, this_lat_clim, midtrop_theta)
-    if np.abs(obs_lat) < 25:
-        wt = min((np.abs(obs_lat) - 20)/5.0, 1.0)
-        eqlat = (1 - wt) * obs_lat + wt * eqlat
-
-    return eqlat, midtrop_theta
+    return np.where(mod_utils.is_tropics(obs_lats, None, None), obs_lats, eqlat)
 
 
 def adjust_zgrid(z_grid, z_trop, z_obs):
@@ -2611,6 +3062,205 @@ def add_strat_prior_standard(prof_gas, retrieval_date, gas_record, mod_data,
                       'stratum': prof_world_flag}
 
 
+def _tropopause_heights(mod_data):
+    # The tropopause altitude of each profile in stacked .mod data, computed as in add_trop_prior_standard
+    pres = mod_data['profile']['Pressure']
+    z = mod_data['profile']['Height']
+    return np.array([mod_utils.interp_tropopause_height_from_pressure(p_trop, p, zz)
+                     for p_trop, p, zz in zip(mod_data['scalar']['TROPPB'], pres, z)])
+
+
+def add_trop_prior_standard_for_profiles(prof_gas, obs_dates, obs_lats, gas_record, mod_data, ref_lat=45.0,
+                                         use_theta_eqlat=True, profs_latency=None, prof_aoa=None,
+                                         prof_world_flag=None, prof_gas_date=None, use_adjusted_zgrid=True,
+                                         co_source=None):
+    """
+    Add the troposphere concentrations to many prior profiles at once using the standard approach.
+
+    This gives the same result as calling :func:`add_trop_prior_standard` for each profile, but the age of air,
+    record lookup and seasonal cycle are computed for the tropospheric levels of all the profiles in single array
+    operations.
+
+    :param prof_gas: the nprofiles-by-nlevels array of trace gas mixing ratios. Will be modified in-place.
+    :type prof_gas: :class:`numpy.ndarray`
+
+    :param obs_dates: the UTC dates of the retrievals, one per profile.
+    :type obs_dates: sequence(:class:`datetime.datetime`)
+
+    :param obs_lats: the latitudes of the retrievals, one per profile.
+    :type obs_lats: array-like
+
+    :param gas_record: the Mauna Loa-Samoa record for the desired gas.
+    :type gas_record: :class:`MloSmoTraceGasRecord`
+
+    :param mod_data: the .mod data for each profile, as dictionaries like those returned by
+     :func:`readers.read_mod_file`. All must have the same number of levels.
+    :type mod_data: sequence(dict)
+
+    ``profs_latency``, ``prof_aoa``, ``prof_world_flag``, and ``prof_gas_date`` are nprofiles-by-nlevels versions of
+    the same inputs to :func:`add_trop_prior_standard`; the other parameters are the same as for that function.
+
+    :return: the updated profiles and a dictionary of the ancillary profiles, like :func:`add_trop_prior_standard`
+     but with nprofiles-by-nlevels arrays for the profiles and nprofiles-long vectors for the scalars.
+    """
+    stacked_data = readers.stack_mod_data(mod_data)
+    z_grid = stacked_data['profile']['Height']
+    if np.isnan(z_grid).any():
+        raise ValueError('All profiles must have the same number of levels')
+    nprof = z_grid.shape[0]
+    obs_lats = np.asarray(obs_lats, dtype=float)
+    z_trop = _tropopause_heights(stacked_data)
+    if use_adjusted_zgrid:
+        logger.debug('Adjusting z-grid')
+        z_grid = np.array([adjust_zgrid(z, zt, z_obs)
+                           for z, zt, z_obs in zip(z_grid, z_trop, stacked_data['scalar']['Height'])])
+    else:
+        logger.debug('Not adjusting z-grid')
+
+    for arr in (prof_gas, profs_latency, prof_aoa, prof_world_flag, prof_gas_date):
+        if arr is not None and np.shape(arr) != z_grid.shape:
+            raise ValueError('The profile arrays must be nprofiles-by-nlevels')
+    profs_latency = np.full(z_grid.shape, np.nan) if profs_latency is None else profs_latency
+    prof_aoa = np.full(z_grid.shape, np.nan) if prof_aoa is None else prof_aoa
+    prof_world_flag = np.full(z_grid.shape, np.nan) if prof_world_flag is None else prof_world_flag
+    prof_gas_date = np.full(z_grid.shape, None) if prof_gas_date is None else prof_gas_date
+
+    def per_level(values):
+        # Broadcast a per-profile quantity to every level, so that it can be subset with the same 2D masks as the
+        # profile variables
+        return np.broadcast_to(np.reshape(values, (-1, 1)), z_grid.shape)
+
+    # See add_trop_prior_standard for the reasoning behind each step
+    if use_theta_eqlat:
+        midtrop_theta = _compute_midtrop_theta(stacked_data['profile']['Pressure'], stacked_data['profile']['PT'])
+        obs_lats = get_trop_eq_lats(midtrop_theta, obs_lats, obs_dates)
+    else:
+        logger.debug('Using geographic latitude, not deriving from potential temperature')
+        midtrop_theta = np.full(nprof, np.nan)
+
+    xx_trop = z_grid <= per_level(z_trop)
+    trop_lats = per_level(obs_lats)[xx_trop]
+    trop_z = z_grid[xx_trop]
+    trop_ztrop = per_level(z_trop)[xx_trop]
+    obs_air_age = mod_utils.age_of_air(trop_lats, trop_z, trop_ztrop, ref_lat=ref_lat)
+    mlo_smo_air_age = mod_utils.age_of_air(np.zeros(nprof), np.full(nprof, 0.01), z_trop, ref_lat=ref_lat)
+    air_age = obs_air_age - per_level(mlo_smo_air_age)[xx_trop]
+    prof_aoa[xx_trop] = air_age
+    prof_world_flag[xx_trop] = const.trop_flag
+
+    gas_df = gas_record.get_gas_by_age(per_level(np.array(obs_dates, dtype=object))[xx_trop], air_age,
+                                       deseasonalize=True, as_dataframe=True)
+
+    lifetime_adj = np.exp(-air_age / gas_record.gas_trop_lifetime_yrs)
+    # The latitude correction may need the individual .mod data, so it is computed one profile at a time. The levels
+    # of each profile are contiguous in the flattened troposphere arrays.
+    lat_correction = []
+    trop_ends = np.cumsum(xx_trop.sum(axis=1), dtype=int)
+    for iprof, (start, end) in enumerate(zip(np.concatenate([[0], trop_ends[:-1]]), trop_ends)):
+        prior_data = {'age_of_air': air_age[start:end], 'adj_zgrid': trop_z[start:end], 'z_trop': z_trop[iprof]}
+        correction = gas_record.lat_bias_correction(obs_date=obs_dates[iprof], obs_lat=obs_lats[iprof],
+                                                    mod_data=mod_data[iprof], prior_data=prior_data)
+        lat_correction.append(np.broadcast_to(correction, (end - start,)))
+    lat_correction = np.concatenate(lat_correction)
+
+    prof_gas[xx_trop] = gas_df['dmf_mean'].values * lifetime_adj + lat_correction
+    profs_latency[xx_trop] = gas_df['latency'].values
+    prof_gas_date[xx_trop] = gas_df.index
+
+    year_fractions = np.array([mod_utils.date_to_frac_year(d) for d in obs_dates])
+    prof_gas[xx_trop] *= mod_utils.seasonal_cycle_factor(trop_lats, trop_z, trop_ztrop, per_level(year_fractions)[xx_trop],
+                                                         species=gas_record, ref_lat=ref_lat)
+
+    return prof_gas, {'co2_latency': profs_latency, 'co2_date': prof_gas_date, 'age_of_air': prof_aoa,
+                      'midtrop_theta': np.array(midtrop_theta, dtype=float), 'stratum': prof_world_flag,
+                      'ref_lat': ref_lat, 'trop_lat': obs_lats, 'tropopause_alt': z_trop}
+
+
+def add_strat_prior_standard_for_profiles(prof_gas, retrieval_dates, gas_record, mod_data, profs_latency=None,
+                                          prof_aoa=None, prof_world_flag=None, gas_record_dates=None):
+    """
+    Add the stratospheric trace gas to many TCCON prior profiles at once using the standard approach.
+
+    This gives the same result as calling :func:`add_strat_prior_standard` for each profile, but the CLAMS age is
+    looked up once per day of year and the stratospheric concentrations once per retrieval date.
+
+    :param prof_gas: the nprofiles-by-nlevels array of trace gas mixing ratios. Will be modified in-place.
+    :type prof_gas: :class:`numpy.ndarray`
+
+    :param retrieval_dates: the UTC dates of the retrievals, one per profile.
+    :type retrieval_dates: sequence(:class:`datetime.datetime`)
+
+    :param gas_record: the Mauna Loa-Samoa record for the desired gas.
+    :type gas_record: :class:`MloSmoTraceGasRecord`
+
+    :param mod_data: the .mod data for each profile, as dictionaries like those returned by
+     :func:`readers.read_mod_file`. All must have the same number of levels.
+    :type mod_data: sequence(dict)
+
+    ``profs_latency``, ``prof_aoa``, ``prof_world_flag``, and ``gas_record_dates`` are nprofiles-by-nlevels versions of
+    the same inputs to :func:`add_strat_prior_standard`.
+
+    :return: the updated profiles and a dictionary of the ancillary profiles, like :func:`add_strat_prior_standard` but
+     with nprofiles-by-nlevels arrays.
+    """
+    stacked_data = readers.stack_mod_data(mod_data)
+    prof_theta = stacked_data['profile']['PT']
+    prof_eqlat = stacked_data['profile']['EqL']
+    prof_pres = stacked_data['profile']['Pressure']
+    prof_z = stacked_data['profile']['Height']
+    if np.isnan(prof_z).any():
+        raise ValueError('All profiles must have the same number of levels')
+    tropopause_pres = np.asarray(stacked_data['scalar']['TROPPB'], dtype=float)
+
+    for arr in (prof_gas, profs_latency, prof_aoa, prof_world_flag, gas_record_dates):
+        if arr is not None and np.shape(arr) != prof_z.shape:
+            raise ValueError('The profile arrays must be nprofiles-by-nlevels')
+    profs_latency = np.full(prof_z.shape, np.nan) if profs_latency is None else profs_latency
+    prof_aoa = np.full(prof_z.shape, np.nan) if prof_aoa is None else prof_aoa
+    prof_world_flag = np.full(prof_z.shape, np.nan) if prof_world_flag is None else prof_world_flag
+    gas_record_dates = np.full(prof_z.shape, None) if gas_record_dates is None else gas_record_dates
+
+    def per_level(values):
+        return np.broadcast_to(np.reshape(values, (-1, 1)), prof_z.shape)
+
+    # See add_strat_prior_standard for the reasoning behind each step
+    xx_overworld = mod_utils.is_overworld(prof_theta, prof_pres, per_level(tropopause_pres))
+    if not xx_overworld.any(axis=1).all():
+        raise NotImplementedError('No overworld levels found')
+
+    prof_world_flag[xx_overworld] = const.overworld_flag
+    age_of_air_years = np.full(prof_z.shape, np.nan)
+    retrieval_doys = np.array([int(mod_utils.clams_day_of_year(d)) for d in retrieval_dates])
+    for doy in np.unique(retrieval_doys):
+        xx_doy = xx_overworld & per_level(retrieval_doys == doy)
+        age_of_air_years[xx_doy] = get_clams_age(prof_theta[xx_doy], prof_eqlat[xx_doy], doy, as_timedelta=False)
+    prof_aoa[xx_overworld] = age_of_air_years[xx_overworld]
+
+    retrieval_dates = np.array(retrieval_dates, dtype=object)
+    for date in pd.unique(retrieval_dates):
+        xx_date = xx_overworld & per_level(retrieval_dates == date)
+        prof_gas[xx_date], strat_extra_info = gas_record.get_strat_gas(date, age_of_air_years[xx_date],
+                                                                       prof_eqlat[xx_date], prof_theta[xx_date])
+        profs_latency[xx_date] = strat_extra_info['latency']
+        gas_record_dates[xx_date] = strat_extra_info['gas_record_dates']
+
+    # The middleworld interpolation is between two levels of each profile, so is done one profile at a time
+    z_trop = _tropopause_heights(stacked_data)
+    xx_trop = prof_z <= per_level(z_trop)
+    xx_middleworld = ~xx_trop & ~xx_overworld
+    for iprof in np.flatnonzero(xx_middleworld.any(axis=1)):
+        uw1 = np.argwhere(xx_trop[iprof])[-1].item()
+        ow1 = np.argwhere(xx_overworld[iprof])[0].item()
+        gas_endpoints = prof_gas[iprof, [uw1, ow1]]
+        theta_endpoints = prof_theta[iprof, [uw1, ow1]]
+        xx_mw = xx_middleworld[iprof]
+        prof_gas[iprof, xx_mw] = np.interp(prof_theta[iprof, xx_mw], theta_endpoints, gas_endpoints)
+    prof_world_flag[xx_middleworld] = const.middleworld_flag
+
+    return prof_gas, {'latency': profs_latency, 'gas_record_dates': gas_record_dates, 'age_of_air': prof_aoa,
+                      'stratum': prof_world_flag}
+
+
 def _load_co_lut(lut_file):
     with xr.open_dataset(lut_file) as ds:
         co_lut = ds['co_excess']
@@ -2625,6 +3275,94 @@ def _load_co_lut(lut_file):
     return xr.concat([co_last_slice, co_lut, co_first_slice], dim='doy')
 
 
+# Static data tables already read by this process, see get_static_lut and get_filled_static_lut
+_static_lut_cache = dict()
+_filled_static_lut_cache = dict()
+
+
+def get_static_lut(lut_file):
+    """
+    Get a static lookup table (e.g. one of the netCDF files in ginput/data), reading it only once per process.
+
+    The table is read completely into memory and the file closed, so no file handles are kept open. That makes the
+    cached tables safe to inherit in forked worker processes, which share the parent's copy.
+
+    :param lut_file: the path to the netCDF file.
+    :type lut_file: str
+
+    :return: the table. This is shared by every caller in the process, so its arrays are made read-only. If the file is
+     modified, it will be read again.
+    :rtype: :class:`xarray.Dataset`
+    """
+    key = (os.path.abspath(lut_file), os.path.getmtime(lut_file))
+    if key not in _static_lut_cache:
+        with xr.open_dataset(lut_file) as ds:
+            lut = ds.load()
+        for var in lut.data_vars.values():
+            var.values.flags.writeable = False
+        _static_lut_cache[key] = lut
+    return _static_lut_cache[key]
+
+
+def get_filled_static_lut(lut_file, variable, fill_fxn):
+    """
+    Get a variable from a static lookup table after filling in its missing values, doing the filling once per process.
+
+    :param lut_file: the path to the netCDF file, see :func:`get_static_lut`.
+    :type lut_file: str
+
+    :param variable: the variable in the file to return.
+    :type variable: str
+
+    :param fill_fxn: a function that fills in the missing values in the variable. It receives a writeable copy of the
+     variable as a :class:`xarray.DataArray` and must modify it in place. It is only called the first time a given
+     variable in a given file is requested, so should always do the same thing for that variable.
+    :type fill_fxn: callable
+
+    :return: the filled variable, shared by every caller in the process. Its data are read-only.
+    :rtype: :class:`xarray.DataArray`
+    """
+    key = (os.path.abspath(lut_file), os.path.getmtime(lut_file), variable)
+    if key not in _filled_static_lut_cache:
+        lut_var = get_static_lut(lut_file)[variable].copy(deep=True)
+        fill_fxn(lut_var)
+        lut_var.values.flags.writeable = False
+        _filled_static_lut_cache[key] = lut_var
+    return _filled_static_lut_cache[key]
+
+
+def interp_excess_co_lut(variable, doy, lat, plev, excess_co_lut=_excess_co_file):
+    """
+    Interpolate a variable in the excess CO lookup table to many points at once.
+
+    :param variable: which variable in the table to interpolate, e.g. "co" (mixing ratio) or "co_nd" (number density).
+    :type variable: str
+
+    :param doy: the day of year of each point.
+    :type doy: array-like
+
+    :param lat: the latitude (or equivalent latitude) of each point.
+    :type lat: array-like
+
+    :param plev: the pressure of each point, in hPa.
+    :type plev: array-like
+
+    :param excess_co_lut: the path to the lookup table, see :func:`modify_strat_co`.
+    :type excess_co_lut: str
+
+    :return: the interpolated values. ``doy``, ``lat`` and ``plev`` are broadcast together, so points from any number of
+     profiles can be looked up in one call; the output has the broadcast shape.
+    :rtype: :class:`numpy.ndarray`
+    """
+    co_lut = get_static_lut(excess_co_lut)[variable]
+    doy, lat, plev = np.broadcast_arrays(doy, lat, plev)
+    point_coords = [('point', np.arange(doy.size))]
+    values = co_lut.interp(doy=xr.DataArray(doy.ravel(), coords=point_coords),
+                           lat=xr.DataArray(lat.ravel(), coords=point_coords),
+                           plev=xr.DataArray(plev.ravel(), coords=point_coords))
+    return values.data.reshape(doy.shape)
+
+
 def modify_strat_co(base_co_profile, pres_profile, eqlat_profile, pt_profile, trop_pres, prof_date,
                     model_transition_pressures=(30.0, 10.0), excess_co_lut=_excess_co_file, keep_orig_nans=False):
     """
@@ -2663,34 +3401,30 @@ def modify_strat_co(base_co_profile, pres_profile, eqlat_profile, pt_profile, tr
         raise ValueError('model_transition_pressures must be a two element tuple with the second element less than '
                          'the first.')
 
-    with xr.open_dataset(excess_co_lut) as ds:
-        co_lut = ds['co'][:]
+    co_lat = get_static_lut(excess_co_lut)['lat']
 
     # Let's first get the CMAM CO profile for the right day of year and latitude
     xx_overworld = mod_utils.is_overworld(pt_profile, pres_profile, trop_pres)
     base_overworld_co = base_co_profile[xx_overworld]
-    level_ind = np.arange(np.size(base_co_profile))[xx_overworld]
-    level_coords = [('idx', level_ind)]
 
     prof_doy = mod_utils.day_of_year(prof_date)
 
-    pres_profile = xr.DataArray(pres_profile[xx_overworld], coords=level_coords)
-    eqlat_profile = xr.DataArray(eqlat_profile[xx_overworld], coords=level_coords)
-    doy_grid = xr.DataArray(np.full(eqlat_profile.shape, prof_doy), coords=level_coords)
+    pres_profile = np.asarray(pres_profile)[xx_overworld]
+    eqlat_profile = np.asarray(eqlat_profile)[xx_overworld]
 
     # Eq. lat. can get outside the range of the CMAM model's latitude, we clip the eqlat profile so that
     # effectively we use the last CMAM lat bin for any out-of-range latitudes. We add a little extra buffer
     # with the 0.9995 b/c in testing with the GeoCARB mock met data, strictly limited to the min/max
     # caused some points to still be outside the allowed range.
-    eqlat_profile = eqlat_profile.clip(co_lut.lat.min().item()*0.9995, co_lut.lat.max().item()*0.9995)
-    cmam_co_prof = co_lut.interp(doy=doy_grid, lat=eqlat_profile, plev=pres_profile).data
+    eqlat_profile = np.clip(eqlat_profile, co_lat.min().item()*0.9995, co_lat.max().item()*0.9995)
+    cmam_co_prof = interp_excess_co_lut('co', doy=prof_doy, lat=eqlat_profile, plev=pres_profile,
+                                        excess_co_lut=excess_co_lut)
 
     # Rather than mess with calculating "excess" CO concentrations for the lookup table, we just averaged the CMAM model
     # and will transition between the GEOS CO and CMAM CO between the transition range pressures. I chose the default
     # of 30 and 10 hPa based on looking at comparisions of GEOS and ACE CO, generally it seems like 30 hPa is the
     # pressure where we first start seeing excess CO that GEOS doesn't capture.
     xx_trans = (pres_profile <= model_transition_pressures[0]) & (pres_profile >= model_transition_pressures[1])
-    xx_trans = xx_trans.data
     prior_plog = np.log(pres_profile[xx_trans])
     trans_plog = [np.log(p) for p in model_transition_pressures]
     cmam_weights = (prior_plog - trans_plog[0])/(trans_plog[1] - trans_plog[0])
@@ -2698,7 +3432,6 @@ def modify_strat_co(base_co_profile, pres_profile, eqlat_profile, pt_profile, tr
 
     # Above the transition regime, just replace GEOS with the CMAM model
     xx_cmam = pres_profile < model_transition_pressures[1]
-    xx_cmam = xx_cmam.data
     base_overworld_co[xx_cmam] = cmam_co_prof[xx_cmam]
     orig_nans = np.isnan(base_co_profile)
     base_co_profile[xx_overworld] = base_overworld_co
@@ -2714,24 +3447,20 @@ def calculate_meso_co(alt_profile, eqlat_profile, pres_profile, temp_profile, pr
     top_pres = pres_profile[-1]
     top_temp = temp_profile[-1]
 
-    with xr.open_dataset(excess_co_lut) as ds:
-        co_nd = ds['co_nd'][:]
-        co_nair = ds['nair'][:]
-        co_alts = ds['altitude'][:]
+    co_lut = get_static_lut(excess_co_lut)
+    co_nair = co_lut['nair'].data
+    co_alts = co_lut['altitude'].data
 
     # In the LUT, nair is assumed to be the same for every profile (because pressure is) so we don't need to interpolate
     # anything before we calculate the effective vertical path we'll use to integrate the CO profiles.
     # Since we only care about the mesosphere, we'll just use zmin = 0 for all calculations (it won't affect anything
     # except the level about the surface).
-    vpath = mod_utils.effective_vertical_path(co_alts.data, zmin=0.0, nair=co_nair.data)
-    plev = co_nd.plev
+    vpath = mod_utils.effective_vertical_path(co_alts, zmin=0.0, nair=co_nair)
     prof_doy = mod_utils.day_of_year(prof_date)
     # Unlike the extra strat CO, we don't need the CO on the same levels as any existing profile, we want it on its
-    # original levels, so we need to make the interpolation coordinates have the same vertical coordinates as the
-    # CO table.
-    eqlat_profile = xr.DataArray(np.full(plev.shape, top_eqlat), coords=[plev], dims=['plev'])
-    doy_profile = xr.DataArray(np.full(plev.shape, prof_doy), coords=[plev], dims=['plev'])
-    cmam_co_prof = co_nd.interp(lat=eqlat_profile, doy=doy_profile, plev=plev)
+    # original levels, so we interpolate to the pressure levels of the CO table.
+    cmam_co_prof = interp_excess_co_lut('co_nd', doy=prof_doy, lat=top_eqlat, plev=co_lut['plev'].data,
+                                        excess_co_lut=excess_co_lut)
 
     xx_meso = co_alts > top_alt
     # vpath will be in kilometers, since co_alts is in kilometers. This will be a column density (molec. cm^-2) of the
@@ -2897,6 +3626,310 @@ def generate_single_tccon_prior(mod_file_data, utc_offset, concentration_record,
     return map_dict, units_dict, map_constants
 
 
+def generate_midlat_tccon_priors(mod_file_data, utc_offset, concentration_records, zgrid=None,
+                                 use_eqlat_trop=True, use_eqlat_strat=True, use_adjusted_zgrid=True):
+    """
+    Generate the TCCON prior profiles for several secondary gases for a single observation.
+
+    This gives the same profiles as calling :func:`generate_single_tccon_prior` for each record, but is much faster
+    because the .mod file is read once and the calculations shared by all the gases are done once (see
+    :meth:`MidlatTraceGasRecord.calc_priors_for_records`).
+
+    :param concentration_records: the records for the gases to generate. All must have been read from the same .vmr
+     file.
+    :type concentration_records: list(:class:`MidlatTraceGasRecord`)
+
+    See :func:`generate_single_tccon_prior` for the other parameters; ``use_adjusted_zgrid`` is not used by these gases.
+
+    :return: dictionaries of profiles, units, and constants like :func:`generate_single_tccon_prior`. The profiles
+     dictionary contains the met variables ("Height", "Temp", "Pressure", "PT", and "EqL") and one profile per gas,
+     but not the debugging profiles (age of air, latency, etc.) that are undefined for these gases.
+    :rtype: dict, dict, dict
+    """
+    if isinstance(mod_file_data, str):
+        mod_file_data = readers.read_mod_file(mod_file_data)
+    elif not isinstance(mod_file_data, dict):
+        raise TypeError('mod_file_data must be a string (path pointing to a .mod file) or a dictionary')
+
+    return _generate_midlat_priors_for_profiles([mod_file_data], [utc_offset], concentration_records, zgrid=zgrid,
+                                                use_eqlat_trop=use_eqlat_trop, use_eqlat_strat=use_eqlat_strat)[0]
+
+
+def _generate_midlat_priors_for_profiles(mod_data, utc_offsets, concentration_records, zgrid, use_eqlat_trop,
+                                         use_eqlat_strat):
+    # The multi-profile implementation of generate_midlat_tccon_priors; returns a list of its outputs, one per profile.
+    stacked_data = readers.stack_mod_data(mod_data)
+    obs_lats = stacked_data['constants']['obs_lat']
+    # Make the UTC dates datetime objects that are rounded to a date (hour/minute/etc = 0)
+    obs_utc_dates = [dt.datetime.combine((data['file']['datetime'] - offset).date(), dt.time())
+                     for data, offset in zip(mod_data, utc_offsets)]
+
+    gas_profs, ancillary = MidlatTraceGasRecord.calc_priors_for_profiles(
+        concentration_records, obs_utc_dates, obs_lats, stacked_data, use_theta_eqlat=use_eqlat_trop
+    )
+    if np.any(np.isnan(gas_profs)):
+        raise RuntimeError('Some levels were not assigned a value in the gas profile')
+
+    map_stack = {'Height': stacked_data['profile']['Height'],
+                 'Temp': stacked_data['profile']['Temperature'],
+                 'Pressure': stacked_data['profile']['Pressure'],
+                 'PT': stacked_data['profile']['PT'],
+                 'EqL': stacked_data['profile']['EqL']}
+    units_dict = {'Height': 'km',
+                  'Temp': 'K',
+                  'Pressure': 'hPa',
+                  'PT': 'K',
+                  'EqL': 'degrees'}
+    for record, prof_gas in zip(concentration_records, gas_profs):
+        map_stack[record.gas_name] = prof_gas
+        units_dict[record.gas_name] = record.gas_unit
+
+    # Regrid all the profiles at once if they have the same number of levels, otherwise one at a time with the padding
+    # from stacking removed.
+    if not np.isnan(map_stack['Height']).any():
+        map_stack = mod_utils.interp_to_zgrid(map_stack, zgrid, gas_extrap_method='const')
+        map_dicts = [{k: v[iprof] for k, v in map_stack.items()} for iprof in range(len(mod_data))]
+    else:
+        nlevels = [np.size(data['profile']['Height']) for data in mod_data]
+        map_dicts = [mod_utils.interp_to_zgrid({k: v[iprof, :nlev] for k, v in map_stack.items()}, zgrid,
+                                               gas_extrap_method='const')
+                     for iprof, nlev in enumerate(nlevels)]
+
+    results = []
+    for iprof, (mod_file_data, map_dict) in enumerate(zip(mod_data, map_dicts)):
+        co_source = mod_file_data['constants'].get('co_source', const.COSource.UNKNOWN.value)
+        map_constants = {'site_lon': mod_file_data['file']['lon'],
+                         'site_lat': mod_file_data['file']['lat'],
+                         'datetime': mod_file_data['file']['datetime'],
+                         'trop_eqlat': np.nan,
+                         'midtrop_theta': ancillary['midtrop_theta'][iprof],
+                         'prof_ref_lat': np.nan,
+                         'surface_alt': mod_file_data['scalar']['Height'],
+                         'tropopause_alt': np.nan,
+                         'strat_used_eqlat': use_eqlat_strat,
+                         'co_source': co_source}
+        results.append((map_dict, units_dict.copy(), map_constants))
+
+    return results
+
+
+def _generate_mlosmo_priors_for_profiles(mod_data, utc_offsets, concentration_record, zgrid, use_eqlat_trop,
+                                         use_eqlat_strat, use_adjusted_zgrid):
+    # The multi-profile implementation of generate_single_tccon_prior for the gases that use the standard troposphere
+    # and stratosphere approach; returns a list of its outputs, one per profile. All profiles must have the same
+    # number of levels.
+    stacked_data = readers.stack_mod_data(mod_data)
+    obs_lats = stacked_data['constants']['obs_lat']
+    obs_utc_dates = [dt.datetime.combine((data['file']['datetime'] - offset).date(), dt.time())
+                     for data, offset in zip(mod_data, utc_offsets)]
+    shape = stacked_data['profile']['Height'].shape
+
+    gas_prof = np.full(shape, np.nan)
+    gas_date_prof = np.full(shape, None)
+    latency_profs = np.full(shape, np.nan)
+    stratum_flag = np.full(shape, -1)
+
+    # As in generate_single_tccon_prior, gas_prof is modified in-place
+    _, ancillary_trop = concentration_record.add_trop_prior_for_profiles(
+        gas_prof, obs_utc_dates, obs_lats, mod_data, use_theta_eqlat=use_eqlat_trop,
+        use_adjusted_zgrid=use_adjusted_zgrid, profs_latency=latency_profs, prof_world_flag=stratum_flag,
+        prof_gas_date=gas_date_prof
+    )
+    _, ancillary_strat = concentration_record.add_strat_prior_for_profiles(
+        gas_prof, obs_utc_dates, mod_data, profs_latency=latency_profs, prof_world_flag=stratum_flag,
+        gas_record_dates=gas_date_prof
+    )
+
+    gas_name = concentration_record.gas_name
+    map_stack = {'Height': stacked_data['profile']['Height'],
+                 'Temp': stacked_data['profile']['Temperature'],
+                 'Pressure': stacked_data['profile']['Pressure'],
+                 'PT': stacked_data['profile']['PT'],
+                 'EqL': stacked_data['profile']['EqL'],
+                 gas_name: gas_prof,
+                 'mean_latency': latency_profs,
+                 'trop_age_of_air': ancillary_trop['age_of_air'],
+                 'strat_age_of_air': ancillary_strat['age_of_air'],
+                 'atm_stratum': stratum_flag,
+                 'gas_date': gas_date_prof}
+    map_stack = mod_utils.interp_to_zgrid(map_stack, zgrid, gas_extrap_method='const')
+    map_dicts = [{k: v[iprof] for k, v in map_stack.items()} for iprof in range(len(mod_data))]
+    for map_dict, obs_utc_date, mod_file_data in zip(map_dicts, obs_utc_dates, mod_data):
+        concentration_record.add_extra_column(map_dict[gas_name], retrieval_date=obs_utc_date, mod_data=mod_file_data)
+
+    if np.any(np.isnan(gas_prof)):
+        raise RuntimeError('Some levels were not assigned a value in the gas profile')
+
+    units_dict = {'Height': 'km',
+                  'Temp': 'K',
+                  'Pressure': 'hPa',
+                  'PT': 'K',
+                  'EqL': 'degrees',
+                  gas_name: concentration_record.gas_unit,
+                  'mean_latency': 'yr',
+                  'trop_age_of_air': 'yr',
+                  'strat_age_of_air': 'yr',
+                  'atm_stratum': 'flag',
+                  'gas_date': 'yr',
+                  'gas_date_width': 'yr'}
+
+    results = []
+    for iprof, (mod_file_data, map_dict) in enumerate(zip(mod_data, map_dicts)):
+        map_constants = {'site_lon': mod_file_data['file']['lon'],
+                         'site_lat': mod_file_data['file']['lat'],
+                         'datetime': mod_file_data['file']['datetime'],
+                         'trop_eqlat': ancillary_trop['trop_lat'][iprof].item(),
+                         'midtrop_theta': ancillary_trop['midtrop_theta'][iprof],
+                         'prof_ref_lat': ancillary_trop['ref_lat'],
+                         'surface_alt': mod_file_data['scalar']['Height'],
+                         'tropopause_alt': ancillary_trop['tropopause_alt'][iprof],
+                         'strat_used_eqlat': use_eqlat_strat,
+                         'co_source': mod_file_data['constants'].get('co_source', const.COSource.UNKNOWN.value)}
+        results.append((map_dict, units_dict.copy(), map_constants))
+
+    return results
+
+
+def _generate_species_priors_for_profiles(mod_data, utc_offsets, records, zgrid=None, use_eqlat_trop=True,
+                                          use_eqlat_strat=True, use_adjusted_zgrid=True):
+    # Generate the priors for one batch of records from _batch_species_records for many profiles, returning a list of
+    # (profiles, units, constants) tuples like generate_single_tccon_prior, one per profile. The midlatitude gases and
+    # the MLO/SMO gases are computed for all the profiles with the same number of levels at once; the other records
+    # (CO, H2O, etc.) do not share enough work between profiles to benefit and are computed one profile at a time.
+    prior_kwargs = dict(zgrid=zgrid, use_eqlat_trop=use_eqlat_trop, use_eqlat_strat=use_eqlat_strat)
+
+    def single_fxn(data, offset):
+        return generate_single_tccon_prior(data, offset, records[0], use_adjusted_zgrid=use_adjusted_zgrid,
+                                           **prior_kwargs)
+
+    if isinstance(records[0], MidlatTraceGasRecord):
+        def batch_fxn(data, offsets):
+            return _generate_midlat_priors_for_profiles(data, offsets, records, **prior_kwargs)
+    elif isinstance(records[0], MloSmoTraceGasRecord):
+        def batch_fxn(data, offsets):
+            return _generate_mlosmo_priors_for_profiles(data, offsets, records[0],
+                                                        use_adjusted_zgrid=use_adjusted_zgrid, **prior_kwargs)
+    else:
+        return [single_fxn(data, offset) for data, offset in zip(mod_data, utc_offsets)]
+
+    results = [None] * len(mod_data)
+    nlevels = np.array([np.size(data['profile']['Height']) for data in mod_data])
+    if isinstance(records[0], MloSmoTraceGasRecord):
+        # Profiles with fill values in the altitude cannot be computed with the others (e.g. satellite soundings
+        # with missing levels), so they are computed on their own as generate_single_tccon_prior always has.
+        for i, data in enumerate(mod_data):
+            if np.isnan(data['profile']['Height']).any():
+                results[i] = single_fxn(data, utc_offsets[i])
+                nlevels[i] = -1
+
+    for nlev in np.unique(nlevels[nlevels >= 0]):
+        inds = np.flatnonzero(nlevels == nlev)
+        batch_results = batch_fxn([mod_data[i] for i in inds], [utc_offsets[i] for i in inds])
+        for i, res in zip(inds, batch_results):
+            results[i] = res
+    return results
+
+
+def generate_tccon_priors_for_profiles(mod_data, utc_offsets, concentration_record, zgrid=None, use_eqlat_trop=True,
+                                       use_eqlat_strat=True, use_adjusted_zgrid=True):
+    """
+    Generate the TCCON prior profiles for one gas for many observations at once.
+
+    This gives the same output as calling :func:`generate_single_tccon_prior` for each observation, but for the gases
+    with Mauna Loa/Samoa records and the secondary gases the observations with the same number of levels are computed
+    together (see :func:`generate_tccon_priors_batch`).
+
+    :param mod_data: the .mod data for each observation, as paths to .mod files or dictionaries like those returned by
+     :func:`readers.read_mod_file`.
+    :type mod_data: sequence(str or dict)
+
+    :param utc_offsets: the difference between the .mod file dates and UTC time, either one value used for all the
+     observations or one per observation. See :func:`generate_single_tccon_prior`.
+    :type utc_offsets: :class:`datetime.timedelta` or sequence(:class:`datetime.timedelta`)
+
+    See :func:`generate_single_tccon_prior` for the other parameters.
+
+    :return: a list with the profiles, units, and constants dictionaries returned by
+     :func:`generate_single_tccon_prior` for each observation.
+    :rtype: list(tuple(dict, dict, dict))
+    """
+    mod_data, utc_offsets = _prepare_batch_inputs(mod_data, utc_offsets)
+    return _generate_species_priors_for_profiles(mod_data, utc_offsets, [concentration_record], zgrid=zgrid,
+                                                 use_eqlat_trop=use_eqlat_trop, use_eqlat_strat=use_eqlat_strat,
+                                                 use_adjusted_zgrid=use_adjusted_zgrid)
+
+
+def _prepare_batch_inputs(mod_data, utc_offsets):
+    mod_data = [readers.read_mod_file(data) if isinstance(data, str) else data for data in mod_data]
+    if isinstance(utc_offsets, dt.timedelta):
+        utc_offsets = [utc_offsets] * len(mod_data)
+    elif len(utc_offsets) != len(mod_data):
+        raise ValueError('utc_offsets must be a single timedelta or have one element per profile')
+    return mod_data, utc_offsets
+
+
+def generate_tccon_priors_batch(mod_data, utc_offsets, species, zgrid=None, use_eqlat_trop=True,
+                                use_eqlat_strat=True, use_adjusted_zgrid=True):
+    """
+    Generate the TCCON prior profiles for several gases for many observations at once.
+
+    This gives the same profiles as calling :func:`generate_single_tccon_prior` for each observation and gas.
+    Consecutive secondary gases read from the same .vmr file are computed for all the observations together (see
+    :meth:`MidlatTraceGasRecord.calc_priors_for_profiles`), as are the gases with Mauna Loa/Samoa records (see
+    :func:`add_trop_prior_standard_for_profiles` and :func:`add_strat_prior_standard_for_profiles`). The other
+    records (e.g. CO) are still computed one observation at a time.
+
+    :param mod_data: the .mod data for each observation, as paths to .mod files or dictionaries like those returned by
+     :func:`readers.read_mod_file`. All must have the same number of levels.
+    :type mod_data: sequence(str or dict)
+
+    :param utc_offsets: the difference between the .mod file dates and UTC time, either one value used for all the
+     observations or one per observation. See :func:`generate_single_tccon_prior`.
+    :type utc_offsets: :class:`datetime.timedelta` or sequence(:class:`datetime.timedelta`)
+
+    :param species: the records for the gases to generate.
+    :type species: sequence(:class:`TraceGasTropicsRecord`)
+
+    See :func:`generate_single_tccon_prior` for the other parameters.
+
+    :return: a dictionary with the met variables ("Height", "Temp", "Pressure", "PT", and "EqL") and one profile per
+     gas as nobservations-by-nlevels arrays, a dictionary of units, and a list with the constants dictionary (as from
+     :func:`generate_single_tccon_prior`) for each observation.
+    :rtype: dict, dict, list(dict)
+    """
+    mod_data, utc_offsets = _prepare_batch_inputs(mod_data, utc_offsets)
+    nprof = len(mod_data)
+
+    ancillary_variables = ('Height', 'Temp', 'Pressure', 'PT', 'EqL')
+    prior_kwargs = dict(zgrid=zgrid, use_eqlat_trop=use_eqlat_trop, use_eqlat_strat=use_eqlat_strat,
+                        use_adjusted_zgrid=use_adjusted_zgrid)
+    profiles = dict()
+    units = dict()
+    map_constants = [None] * nprof
+    for records in _batch_species_records(species):
+        batch_results = _generate_species_priors_for_profiles(mod_data, utc_offsets, records, **prior_kwargs)
+
+        gas_names = [r.gas_name for r in records]
+        batch_profiles = {k: np.array([res[0][k] for res in batch_results])
+                          for k in ancillary_variables + tuple(gas_names)}
+        if len(profiles) == 0:
+            profiles.update({k: batch_profiles[k] for k in ancillary_variables})
+        elif not all(np.allclose(batch_profiles[k], profiles[k], equal_nan=True) for k in ancillary_variables):
+            raise RuntimeError('Got different vectors for the met variables for different species')
+
+        for gas_name in gas_names:
+            profiles[gas_name] = batch_profiles[gas_name]
+            units[gas_name] = batch_results[0][1][gas_name]
+        units.update({k: batch_results[0][1][k] for k in ancillary_variables})
+
+        # As in generate_tccon_priors_driver, the constants come from the first species that defines the tropopause
+        for iprof, (_, _, specie_constants) in enumerate(batch_results):
+            if map_constants[iprof] is None or np.isnan(map_constants[iprof]['tropopause_alt']):
+                map_constants[iprof] = specie_constants
+
+    return profiles, units, map_constants
+
+
 def _get_std_vmr_file(std_vmr_file):
     """
     Get the path to the standard .vmr file
@@ -2986,21 +4019,23 @@ def generate_full_tccon_vmr_file(mod_data, utc_offsets, save_dir, product='fpit'
 
     std_vmr_file = _get_std_vmr_file(std_vmr_file)
     if std_vmr_file:
-        std_vmr_gases = readers.read_vmr_file(std_vmr_file, lowercase_names=False, style='old')
-        std_vmr_gases = list(std_vmr_gases['profile'].keys())
+        std_vmr_gases = read_std_vmr_file(std_vmr_file, lowercase_names=False)
+        std_vmr_gases = list(std_vmr_gases['profile'].columns)
         std_vmr_gases.remove('Altitude')
     else:
         std_vmr_gases = list(gas_records.keys())
 
-    species = []
     if use_existing_luts:
         mlo_smo_kwargs = {'recalculate_strat_lut': False, 'save_strat': False}
     else:
         mlo_smo_kwargs = dict()
 
-    for gas in std_vmr_gases:
+    # Build CH4 before HF so that, if the HF strat LUT needs recalculated, it can be derived from this CH4 record
+    # rather than setting up a second one. That is only valid when the CH4 record uses the default MLO/SMO files.
+    built_records = dict()
+    for gas in sorted(std_vmr_gases, key=lambda g: g.lower() == 'hf'):
         if gas.lower() not in gas_records:
-            species.append(MidlatTraceGasRecord(gas, vmr_file=std_vmr_file))
+            built_records[gas] = MidlatTraceGasRecord(gas, vmr_file=std_vmr_file)
             continue
 
         rec = gas_records[gas.lower()]
@@ -3010,9 +4045,14 @@ def generate_full_tccon_vmr_file(mod_data, utc_offsets, save_dir, product='fpit'
             if these_mlo_smo_files:
                 these_kws.update(these_mlo_smo_files)
                 extra_header[f'{gas}_mlo_smo_files'] = ', '.join(str(v) for v in these_mlo_smo_files.values())
-            species.append(rec(**these_kws))
+            if rec is HFTropicsRecord and not mlo_smo_files.get('ch4'):
+                these_kws['ch4_record'] = next((r for r in built_records.values() if isinstance(r, CH4TropicsRecord)),
+                                               None)
+            built_records[gas] = rec(**these_kws)
         else:
-            species.append(rec())
+            built_records[gas] = rec()
+
+    species = [built_records[gas] for gas in std_vmr_gases]
 
     generate_tccon_priors_driver(mod_data=mod_data, utc_offsets=utc_offsets, species=species, site_abbrevs=site_abbrevs,
                                  write_vmrs=save_dir, keep_latlon_prec=keep_latlon_prec, gas_name_order=std_vmr_gases,
@@ -3021,7 +4061,8 @@ def generate_full_tccon_vmr_file(mod_data, utc_offsets, save_dir, product='fpit'
 
 def generate_tccon_priors_driver(mod_data, utc_offsets, species, site_abbrevs='xx', write_vmrs=False,
                                  gas_name_order=None, keep_latlon_prec=False, flat_outdir=True, product='fpit',
-                                 special_header_info: Optional[dict] = None, **prior_kwargs):
+                                 special_header_info: Optional[dict] = None, consolidate_vmrs=False, nprocs=0,
+                                 chunksize=None, incremental=False, force=False, **prior_kwargs):
     """
     Generate multiple TCCON priors or a file containing multiple gas concentrations
 
@@ -3061,9 +4102,39 @@ def generate_tccon_priors_driver(mod_data, utc_offsets, species, site_abbrevs='x
     :param special_header_info: A dictionary giving extra lines to write in the header of the .vmr file. The pairs
      will be written as "key: value" in the header. 
 
+    :param consolidate_vmrs: if ``True``, the .vmr profiles are written to one netCDF file per site per month (see
+     :func:`mod_utils.consolidated_file_name`) instead of individual .vmr files.
+    :type consolidate_vmrs: bool
+
+    :param nprocs: number of worker processes to use. 0 (default) generates the profiles serially in this process. In
+     parallel mode, each worker receives the ``species`` records once when it starts and writes the .vmr files for the
+     profiles it generates. The output list is in the same order as the inputs either way; if any profiles fail, all
+     failures are logged in profile order and a :class:`RuntimeError` listing them is raised once all profiles have
+     been attempted.
+    :type nprocs: int
+
+    :param chunksize: how many profiles to compute together (see :func:`generate_tccon_priors_batch`). In parallel
+     mode, this is also how many profiles are sent to a worker at once and the default gives each worker about four
+     chunks; if a chunk fails, its profiles are retried one at a time so that only the failing ones are reported. In
+     serial mode, the default computes all the profiles together.
+    :type chunksize: int or None
+
+    :param incremental: if ``True`` and writing .vmr files, only generate the profiles whose .vmr files do not exist or
+     were generated from different inputs. The inputs are the .mod file, the files the gas records read (see
+     :meth:`TraceGasRecord.list_prior_dependent_files`), the prior code and the options to this function; their
+     fingerprint (see :func:`ioutils.make_output_fingerprint`) is recorded for each .vmr file in a hidden manifest
+     (see :class:`ioutils.OutputFingerprints`) in its output directory. Profiles given as dictionaries rather than
+     paths to .mod files are always generated.
+    :type incremental: bool
+
+    :param force: if ``True``, generate all profiles even if ``incremental`` is ``True``, but still record the inputs of
+     the .vmr files written so that later incremental runs can skip them.
+    :type force: bool
+
     :param prior_kwargs: additional keyword arguments passed on to `generate_single_tccon_priors`.
 
-    :return: a list of dataframes containing the trace gas profiles for each requested profile.
+    :return: a list of dataframes containing the trace gas profiles for each requested profile. In incremental mode,
+     the elements for profiles that were skipped because their .vmr files were up to date are ``None``.
     :rtype: Sequence[pandas.DataFrame]
     """
     num_profiles = max(np.size(inpt) for inpt in [mod_data, utc_offsets, site_abbrevs])
@@ -3095,17 +4166,6 @@ def generate_tccon_priors_driver(mod_data, utc_offsets, species, site_abbrevs='x
         else:
             return '', False
 
-    def get_scale_factor(unit):
-        unit = unit.lower()
-        if unit == 'ppm':
-            return 1e-6
-        elif unit == 'ppb':
-            return 1e-9
-        elif unit == 'mol/mol':
-            return 1.0
-        else:
-            raise ValueError('No conversion factor defined for "{}"'.format(unit))
-
     # Input checking. Make sure these are the right type and either the same size as each other or a single value. In
     # the latter case, replicate it. These will have one
     mod_data = check_input(mod_data, 'mod_data', (str, dict))
@@ -3121,68 +4181,285 @@ def generate_tccon_priors_driver(mod_data, utc_offsets, species, site_abbrevs='x
 
     vmrs_dir, write_vmrs = parse_boollike_input(write_vmrs)
 
+    profile_kws = dict(vmrs_dir=vmrs_dir, write_vmrs=write_vmrs, gas_name_order=gas_name_order,
+                       keep_latlon_prec=keep_latlon_prec, flat_outdir=flat_outdir, product=product,
+                       special_header_info=special_header_info, consolidate_vmrs=consolidate_vmrs,
+                       prior_kwargs=prior_kwargs)
+
+    # Fingerprints are only checked in incremental mode, but are also recorded when forcing so that later incremental
+    # runs know the .vmr files written now are up to date. The manifests are saved even if some profiles fail.
+    with ioutils.OutputFingerprints(force=force, exists_fxn=mod_utils.profile_file_exists) as fingerprints:
+        if write_vmrs and (incremental or force):
+            vmr_outputs = _vmr_output_fingerprints(mod_data, utc_offsets, site_abbrevs, species, profile_kws)
+            todo_profiles = [i for i, (vmr_file, fingerprint) in enumerate(vmr_outputs)
+                             if not fingerprints.is_current(vmr_file, fingerprint)]
+            logger.info('{} of {} .vmr files are up to date and will not be regenerated'.format(
+                num_profiles - len(todo_profiles), num_profiles))
+        else:
+            vmr_outputs = None
+            todo_profiles = list(range(num_profiles))
+
+        output_dfs = [None] * num_profiles
+        failures = _generate_priors_for_profiles(todo_profiles, mod_data, utc_offsets, site_abbrevs, species,
+                                                 profile_kws, nprocs, chunksize, output_dfs, fingerprints, vmr_outputs)
+
+    if len(failures) > 0:
+        for iprofile, err_msg in failures:
+            logger.error('Prior generation failed for profile {} ({}):\n{}'.format(
+                iprofile, _profile_description(mod_data[iprofile]), err_msg))
+        raise RuntimeError('Prior generation failed for {} of {} profiles: {}'.format(
+            len(failures), num_profiles, ', '.join(_profile_description(mod_data[i]) for i, _ in failures)
+        ))
+
+    return output_dfs
+
+
+def _generate_priors_for_profiles(profile_inds, mod_data, utc_offsets, site_abbrevs, species, profile_kws, nprocs,
+                                  chunksize, output_dfs, fingerprints, vmr_outputs):
     # MAIN LOOP #
-    # Loop over the requested profiles, creating a prior for each gas requested. Check that the other variables are all
-    # the same for each gas, then combine them to make a single .map file or dict for each profile
-    ancillary_variables = ('Height', 'Temp', 'Pressure', 'PT', 'EqL')
-    output_dfs = []
-    for iprofile in range(num_profiles):
-        vmr_gases = dict()
-        var_order = list(ancillary_variables)
-        for ispecie, specie_record in enumerate(species):
-            gas_name = specie_record.gas_name
-            var_order.append(specie_record.gas_name)
-            specie_profile, specie_units, specie_constants = \
-                generate_single_tccon_prior(mod_data[iprofile], utc_offsets[iprofile],
-                                            specie_record, **prior_kwargs)
-
-            if ispecie == 0 or np.isnan(map_constants['tropopause_alt']):
-                profile_dict = specie_profile
-                units_dict = specie_units
-                map_constants = specie_constants
-            else:
-                for ancvar in ancillary_variables:
-                    if not np.allclose(specie_profile[ancvar], profile_dict[ancvar], equal_nan=True):
-                        raise RuntimeError('Got different vectors for {} for difference species'.format(ancvar))
+    # Loop over the requested profiles, creating a prior for each gas requested. In parallel mode, each worker
+    # receives the gas records once when it starts, then generates (and writes the .vmr files for) chunks of profiles.
+    # The dataframes are put in output_dfs and the list of (profile index, traceback) for failed profiles is returned.
+    def profile_done(iprofile, this_df):
+        output_dfs[iprofile] = this_df
+        if vmr_outputs is not None:
+            fingerprints.record(*vmr_outputs[iprofile])
+
+    def chunk_args(chunk):
+        return (chunk, [mod_data[i] for i in chunk], [utc_offsets[i] for i in chunk], [site_abbrevs[i] for i in chunk])
+
+    if len(profile_inds) == 0:
+        return []
+
+    if nprocs == 0:
+        if chunksize is None:
+            chunksize = len(profile_inds)
+        for chunk in _chunk_profile_inds(profile_inds, chunksize):
+            _, chunk_mod_data, chunk_offsets, chunk_abbrevs = chunk_args(chunk)
+            outputs = _generate_profile_priors(chunk_mod_data, chunk_offsets, chunk_abbrevs, species, **profile_kws)
+            for iprofile, (this_df, _) in zip(chunk, outputs):
+                profile_done(iprofile, this_df)
+        return []
+
+    logger.info('Generating priors for {} profiles in parallel with {} processes'.format(len(profile_inds), nprocs))
+    # Several workers writing to the same consolidated file would clobber each other, so in that case the workers hand
+    # the .vmr contents back and they are written here, in profile order. The same is done if a profile file cache is
+    # active, since files written in the workers would not be added to this process's cache.
+    return_vmr_kws = profile_kws['consolidate_vmrs'] or readers.profile_file_cache_active()
+    profile_kws = dict(profile_kws, return_vmr_kws=return_vmr_kws)
+    if chunksize is None:
+        chunksize = max(1, len(profile_inds) // (4 * nprocs))
+
+    worker_args = (chunk_args(chunk) for chunk in _chunk_profile_inds(profile_inds, chunksize))
+    failures = []
+    with Pool(processes=nprocs, initializer=_init_priors_worker, initargs=(species, profile_kws)) as pool:
+        # imap returns results in input order regardless of which worker finishes first
+        for chunk_results in pool.imap(_priors_worker, worker_args):
+            for iprofile, this_df, vmr_kws, err_msg in chunk_results:
+                if err_msg is not None:
+                    failures.append((iprofile, err_msg))
+                    continue
+                if vmr_kws is not None:
+                    writers.write_vmr_file(consolidate=profile_kws['consolidate_vmrs'], **vmr_kws)
+                profile_done(iprofile, this_df)
+
+    return failures
+
+
+def _chunk_profile_inds(profile_inds, chunksize):
+    return [profile_inds[i:i+chunksize] for i in range(0, len(profile_inds), chunksize)]
+
+
+def _vmr_output_fingerprints(mod_data, utc_offsets, site_abbrevs, species, profile_kws):
+    # The inputs shared by all profiles: the files the records read, the code that computes and writes the priors and
+    # the options that affect the .vmr files.
+    common_files = [os.path.abspath(_clams_file), os.path.abspath(_theta_v_lat_file)]
+    for record in species:
+        common_files.extend(f for f in record.list_prior_dependent_files() if f not in common_files)
+    common_files.extend(sorted(_code_dep_files.values()))
+    common_files.extend(os.path.abspath(m.__file__) for m in (readers, writers))
+
+    prior_kwargs = dict(profile_kws['prior_kwargs'])
+    zgrid = prior_kwargs.get('zgrid')
+    if isinstance(zgrid, str):
+        common_files.append(zgrid)
+    elif zgrid is not None:
+        prior_kwargs['zgrid'] = np.asarray(zgrid).tolist()
+
+    settings = dict(species=[(type(r).__name__, r.gas_name) for r in species], prior_kwargs=prior_kwargs,
+                    priors_version=const.priors_version, gas_name_order=profile_kws['gas_name_order'],
+                    special_header_info=profile_kws['special_header_info'],
+                    consolidate_vmrs=profile_kws['consolidate_vmrs'])
+
+    vmr_outputs = []
+    for this_mod_data, utc_offset, site_abbrev in zip(mod_data, utc_offsets, site_abbrevs):
+        if isinstance(this_mod_data, str):
+            mod_name = os.path.basename(this_mod_data)
+            vmr_file = _vmr_output_file(mod_utils.find_datetime_substring(mod_name, out_type=dt.datetime),
+                                        mod_utils.find_lat_substring(mod_name, to_float=True),
+                                        mod_utils.find_lon_substring(mod_name, to_float=True),
+                                        site_abbrev, **profile_kws)
+            fingerprint = ioutils.make_output_fingerprint([readers.profile_source_file(this_mod_data)] + common_files,
+                                                          utc_offset=str(utc_offset), **settings)
+        else:
+            # .mod data passed in directly cannot be checked, so these profiles are always regenerated
+            vmr_file = _vmr_output_file(this_mod_data['file']['datetime'], this_mod_data['file']['lat'],
+                                        this_mod_data['file']['lon'], site_abbrev, **profile_kws)
+            fingerprint = None
+        vmr_outputs.append((vmr_file, fingerprint))
+
+    return vmr_outputs
 
-                # All good? Add the current specie concentration to the dicts
-                profile_dict[gas_name] = specie_profile[gas_name]
-                units_dict[gas_name] = specie_units[gas_name]
 
-            # Record the profiles for the .vmr files, converted to dry mole fraction
-            vmr_gases[gas_name] = specie_profile[gas_name] * get_scale_factor(specie_units[gas_name])
+def _vmr_output_file(site_date, site_lat, site_lon, site_abbrev, vmrs_dir, keep_latlon_prec, flat_outdir, product,
+                     **_):
+    vmr_name = mod_utils.vmr_file_name(obs_date=site_date, lon=site_lon, lat=site_lat,
+                                       keep_latlon_prec=keep_latlon_prec)
+    if flat_outdir:
+        return os.path.join(vmrs_dir, vmr_name)
+    else:
+        return os.path.join(mod_utils.vmr_output_subdir(vmrs_dir, site_abbrev, product=product), vmr_name)
 
-        # Write the combined .vmr file for all the requested species
-        site_lat = map_constants['site_lat']
-        site_lon = map_constants['site_lon']
-        site_date = map_constants['datetime']
 
-        this_df = pd.DataFrame(vmr_gases, index=profile_dict['Height'])
-        output_dfs.append(this_df)
+# Set in each worker process by _init_priors_worker
+_priors_worker_state = dict()
 
-        if write_vmrs:
-            vmr_name = mod_utils.vmr_file_name(obs_date=site_date, lon=site_lon, lat=site_lat,
-                                               keep_latlon_prec=keep_latlon_prec)
-            if flat_outdir:
-                vmr_name = os.path.join(vmrs_dir, vmr_name)
-            else:
-                this_vmr_dir = mod_utils.vmr_output_subdir(vmrs_dir, site_abbrevs[iprofile], product=product)
-                if not os.path.exists(this_vmr_dir):
-                    os.makedirs(this_vmr_dir)
-                vmr_name = os.path.join(this_vmr_dir, vmr_name)
-            extra_header_info = {
-                'EFF_LAT_TROP': map_constants['trop_eqlat'],
-                'MIDTROP_THETA': '{:.2f}'.format(map_constants['midtrop_theta']),
-                'CO_SOURCE': map_constants['co_source'].value
-            }
-            extra_header_info.update(special_header_info)
-            writers.write_vmr_file(vmr_name, tropopause_alt=map_constants['tropopause_alt'],
-                                   profile_date=site_date, profile_lat=site_lat,
-                                   profile_alt=profile_dict['Height'], profile_gases=vmr_gases,
-                                   gas_name_order=gas_name_order,
-                                   extra_header_info=extra_header_info)
-            
-    return output_dfs
+
+def _init_priors_worker(species, profile_kws):
+    _priors_worker_state['species'] = species
+    _priors_worker_state['profile_kws'] = profile_kws
+
+
+def _priors_worker(args):
+    profile_inds, mod_data, utc_offsets, site_abbrevs = args
+    try:
+        outputs = _generate_profile_priors(mod_data, utc_offsets, site_abbrevs, _priors_worker_state['species'],
+                                           **_priors_worker_state['profile_kws'])
+    except Exception:
+        if len(profile_inds) == 1:
+            # Send the traceback back as a string so that the error is reported against the right profile
+            return [(profile_inds[0], None, None, traceback.format_exc())]
+    else:
+        return [(iprofile, this_df, vmr_kws, None) for iprofile, (this_df, vmr_kws) in zip(profile_inds, outputs)]
+
+    # One profile in the chunk made the whole chunk fail, retry them one at a time to find which
+    results = []
+    for single_args in zip(profile_inds, mod_data, utc_offsets, site_abbrevs):
+        results.extend(_priors_worker([[v] for v in single_args]))
+    return results
+
+
+def _profile_description(mod_data):
+    if isinstance(mod_data, str):
+        return os.path.basename(mod_data)
+    return '.mod data for {}'.format(mod_data['file']['datetime'])
+
+
+def _generate_profile_priors(mod_data, utc_offsets, site_abbrevs, species, vmrs_dir, write_vmrs, gas_name_order,
+                             keep_latlon_prec, flat_outdir, product, special_header_info, consolidate_vmrs,
+                             prior_kwargs, return_vmr_kws=False):
+    """
+    Generate the priors for all requested species for several profiles, see :func:`generate_tccon_priors_driver`.
+
+    The profiles are computed together as in :func:`generate_tccon_priors_batch`.
+
+    :return: for each profile, the dataframe of the trace gas profiles and, if ``return_vmr_kws`` is ``True``, the
+     keywords for :func:`writers.write_vmr_file` so that the caller can write the .vmr file. Otherwise the .vmr file
+     (if requested) is written here and the second value is ``None``.
+    :rtype: list(tuple(:class:`pandas.DataFrame`, dict or None))
+    """
+    mod_data = [readers.read_mod_file(data) if isinstance(data, str) else data for data in mod_data]
+    batches = _batch_species_records(species)
+    batch_results = [_generate_species_priors_for_profiles(mod_data, utc_offsets, records, **prior_kwargs)
+                     for records in batches]
+
+    outputs = []
+    for iprof, site_abbrev in enumerate(site_abbrevs):
+        species_results = [(records, results[iprof]) for records, results in zip(batches, batch_results)]
+        outputs.append(_assemble_profile_priors(species_results, site_abbrev, vmrs_dir, write_vmrs, gas_name_order,
+                                                keep_latlon_prec, flat_outdir, product, special_header_info,
+                                                consolidate_vmrs, return_vmr_kws))
+    return outputs
+
+
+def _assemble_profile_priors(species_results, site_abbrev, vmrs_dir, write_vmrs, gas_name_order, keep_latlon_prec,
+                             flat_outdir, product, special_header_info, consolidate_vmrs, return_vmr_kws):
+    # Combine the results for each batch of species for one profile into its dataframe and .vmr file. Check that the
+    # other variables are all the same for each gas, then combine them to make a single .vmr file
+    ancillary_variables = ('Height', 'Temp', 'Pressure', 'PT', 'EqL')
+    vmr_gases = dict()
+    for ibatch, (records, (specie_profile, specie_units, specie_constants)) in enumerate(species_results):
+        gas_names = [r.gas_name for r in records]
+
+        if ibatch == 0 or np.isnan(map_constants['tropopause_alt']):
+            profile_dict = specie_profile
+            map_constants = specie_constants
+        else:
+            for ancvar in ancillary_variables:
+                if not np.allclose(specie_profile[ancvar], profile_dict[ancvar], equal_nan=True):
+                    raise RuntimeError('Got different vectors for {} for difference species'.format(ancvar))
+
+            # All good? Add the current specie concentrations to the dict
+            for gas_name in gas_names:
+                profile_dict[gas_name] = specie_profile[gas_name]
+
+        # Record the profiles for the .vmr files, converted to dry mole fraction
+        for gas_name in gas_names:
+            vmr_gases[gas_name] = specie_profile[gas_name] * _get_vmr_scale_factor(specie_units[gas_name])
+
+    # Write the combined .vmr file for all the requested species
+    site_lat = map_constants['site_lat']
+    site_lon = map_constants['site_lon']
+    site_date = map_constants['datetime']
+
+    this_df = pd.DataFrame(vmr_gases, index=profile_dict['Height'])
+    if not write_vmrs:
+        return this_df, None
+
+    vmr_name = _vmr_output_file(site_date, site_lat, site_lon, site_abbrev, vmrs_dir=vmrs_dir,
+                                keep_latlon_prec=keep_latlon_prec, flat_outdir=flat_outdir, product=product)
+    if not flat_outdir:
+        # Parallel workers may try to create the same directory at once
+        os.makedirs(os.path.dirname(vmr_name), exist_ok=True)
+    extra_header_info = {
+        'EFF_LAT_TROP': map_constants['trop_eqlat'],
+        'MIDTROP_THETA': '{:.2f}'.format(map_constants['midtrop_theta']),
+        'CO_SOURCE': map_constants['co_source'].value
+    }
+    if special_header_info:
+        extra_header_info.update(special_header_info)
+    vmr_kws = dict(vmr_file=vmr_name, tropopause_alt=map_constants['tropopause_alt'],
+                   profile_date=site_date, profile_lat=site_lat,
+                   profile_alt=profile_dict['Height'], profile_gases=vmr_gases,
+                   gas_name_order=gas_name_order, extra_header_info=extra_header_info)
+    if return_vmr_kws:
+        return this_df, vmr_kws
+
+    writers.write_vmr_file(consolidate=consolidate_vmrs, **vmr_kws)
+    return this_df, None
+
+
+def _batch_species_records(species):
+    batches = []
+    for record in species:
+        if isinstance(record, MidlatTraceGasRecord) and len(batches) > 0 \
+                and isinstance(batches[-1][0], MidlatTraceGasRecord) and batches[-1][0]._vmr_file == record._vmr_file:
+            batches[-1].append(record)
+        else:
+            batches.append([record])
+    return batches
+
+
+def _get_vmr_scale_factor(unit):
+    unit = unit.lower()
+    if unit == 'ppm':
+        return 1e-6
+    elif unit == 'ppb':
+        return 1e-9
+    elif unit == 'mol/mol':
+        return 1.0
+    else:
+        raise ValueError('No conversion factor defined for "{}"'.format(unit))
 
 
 def _add_common_cl_args(parser):
@@ -3214,6 +4491,19 @@ def _add_common_cl_args(parser):
     parser.add_argument('-f', '--flat-outdir', action='store_true',
                         help='Write the .vmr files directly to the specified output directory, rather than organizing '
                              'by product/site/vertical or slant.')
+    parser.add_argument('-n', '--nprocs', default=0, type=int,
+                        help='Number of worker processes to generate the profiles with. The default, 0, runs '
+                             'serially.')
+    parser.add_argument('--consolidate', action='store_true', dest='consolidate_vmrs',
+                        help='Write the .vmr profiles to one netCDF file per site per month instead of individual '
+                             '.vmr files. The readers in ginput read these transparently in place of the .vmr files.')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Only generate .vmr files that do not exist or whose inputs (the .mod file, MLO/SMO '
+                             'records, lookup tables, code or options) have changed since they were last written. '
+                             'The inputs of each .vmr file are recorded in a hidden file in its output directory.')
+    parser.add_argument('--force', action='store_true',
+                        help='Regenerate all .vmr files even if --incremental would skip them, but still record their '
+                             'inputs for future incremental runs.')
     parser.add_argument('--mlo-smo-files-json', dest='mlo_smo_files', 
                         help='A JSON file that configures which files to read MLO/SMO data from. The top level must be a '
                              'dictionary with lowercase gas names as keys. The values must be dictionaries with "mlo_file" '
@@ -3312,7 +4602,7 @@ def cl_driver(date_range, mod_dir=None, mod_root_dir=None, save_dir=None, produc
             this_file = os.path.join(this_mod_dir,
                                      mod_utils.mod_file_name_for_priors(d, site_lat=lat, site_lon_180=lon, prefix=product.upper(),
                                                                         round_latlon=not keep_latlon_prec))
-            if os.path.isfile(this_file):
+            if mod_utils.profile_file_exists(this_file):
                 mod_files.append(this_file)
                 all_site_abbrevs.append(this_abbrev)
             else:
@@ -0,0 +1,215 @@
+"""Quantify the differences between single and double precision mod_maker output
+
+The mod_maker can compute its interpolation, potential temperature and equivalent latitude stages in single precision
+(``--precision single``) to save memory and time. This module runs the standard test case in both precisions and
+reports the largest differences in the .mod and .vmr files, or compares any two existing sets of output files.
+
+Usage::
+
+    python -m ginput.testing.precision_check run
+    python -m ginput.testing.precision_check compare DOUBLE_DIR SINGLE_DIR --kind mod
+"""
+from __future__ import print_function
+
+from argparse import ArgumentParser
+import datetime as dt
+import os
+
+import numpy as np
+
+from . import test_utils
+from ..common_utils import readers
+
+_precision_output_dir = os.path.join(test_utils.output_data_dir, 'precision')
+
+
+def file_max_differences(base_file, new_file):
+    """Compute the maximum absolute and relative differences for every numeric variable in two .mod or .vmr files.
+
+    :param base_file: path to the reference (usually double precision) file
+    :type base_file: str
+
+    :param new_file: path to the file to compare against the reference
+    :type new_file: str
+
+    :return: a dictionary with the file categories (e.g. "scalar", "profile") as keys and dictionaries as values. The
+     inner dictionaries have variable names as keys and tuples of (maximum absolute difference, maximum relative
+     difference) as values. Non-numeric variables are skipped.
+    :rtype: dict
+    """
+    base_data = _read_file(base_file)
+    new_data = _read_file(new_file)
+    diffs = dict()
+    for category in ('constants', 'scalar', 'profile'):
+        if category not in base_data:
+            continue
+        diffs[category] = dict()
+        for varname, base_values in base_data[category].items():
+            try:
+                base_values = np.asarray(base_values, dtype=float)
+                new_values = np.asarray(new_data[category][varname], dtype=float)
+            except (TypeError, ValueError, KeyError):
+                continue
+
+            abs_diff = np.abs(new_values - base_values)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                rel_diff = np.where(base_values != 0, abs_diff / np.abs(base_values), 0.0)
+            diffs[category][varname] = (np.nanmax(abs_diff, initial=0.0), np.nanmax(rel_diff, initial=0.0))
+
+    return diffs
+
+
+def summarize_max_differences(file_pairs):
+    """Compute the largest differences for each variable across many pairs of files.
+
+    :param file_pairs: an iterable of (reference file, new file) paths.
+    :type file_pairs: iterable(tuple(str, str))
+
+    :return: a dictionary of the same form as :func:`file_max_differences`, but with the maximum over all file pairs.
+    :rtype: dict
+    """
+    summary = dict()
+    for base_file, new_file in file_pairs:
+        for category, cat_diffs in file_max_differences(base_file, new_file).items():
+            cat_summary = summary.setdefault(category, dict())
+            for varname, (abs_diff, rel_diff) in cat_diffs.items():
+                old_abs, old_rel = cat_summary.get(varname, (0.0, 0.0))
+                cat_summary[varname] = (max(old_abs, abs_diff), max(old_rel, rel_diff))
+
+    return summary
+
+
+def compare_output_dirs(double_dir, single_dir, kind):
+    """Summarize the differences between .mod or .vmr files in two directories
+
+    :param double_dir: the directory containing the reference (double precision) files.
+    :type double_dir: str
+
+    :param single_dir: the directory containing the single precision files.
+    :type single_dir: str
+
+    :param kind: which type of file to compare, "mod" or "vmr". .mod directories must be organized as
+     site/vertical/*.mod (the standard mod_maker output layout), .vmr directories must be flat.
+    :type kind: str
+
+    :return: the summary from :func:`summarize_max_differences`
+    :rtype: dict
+    """
+    if kind == 'mod':
+        pairs = test_utils.iter_mod_file_pairs(double_dir, single_dir)
+    elif kind == 'vmr':
+        pairs = test_utils.iter_vmr_file_pairs(double_dir, single_dir)
+    else:
+        raise ValueError('kind must be "mod" or "vmr"')
+    return summarize_max_differences(pairs)
+
+
+def run_precision_comparison(output_dir=_precision_output_dir):
+    """Run mod_maker and the priors on the standard test case in double and single precision and compare the outputs
+
+    Requires the GEOS FP-IT test data (see :func:`ginput.testing.test_utils.download_test_geos_data`).
+
+    :param output_dir: the directory to write the output files to. "double" and "single" subdirectories will be
+     created within it.
+    :type output_dir: str
+
+    :return: the summaries of the differences in the .mod and .vmr files
+    :rtype: dict, dict
+    """
+    # Import here so that just comparing existing files does not need all the mod_maker and priors dependencies
+    from ..mod_maker.mod_maker import driver as mmdriver
+    from ..priors import tccon_priors
+
+    test_utils.download_test_geos_data()
+    date_range = [test_utils.test_date, test_utils.test_date + dt.timedelta(days=1)]
+
+    mod_dirs = dict()
+    vmr_dirs = dict()
+    for precision in ('double', 'single'):
+        mod_top_dir = os.path.join(output_dir, precision, 'mod_files')
+        vmr_dir = os.path.join(output_dir, precision, 'vmr_files')
+        if not os.path.exists(vmr_dir):
+            os.makedirs(vmr_dir)
+
+        mmdriver(date_range, test_utils.geos_fp_dir, save_path=mod_top_dir, keep_latlon_prec=False,
+                 save_in_utc=True, site_abbrv=test_utils.test_site, include_chm=True, mode='fpit-eta',
+                 precision=precision, muted=True)
+        mod_dirs[precision] = os.path.join(mod_top_dir, 'fpit')
+
+        mod_files = [f for f in test_utils.iter_mod_file_pairs(mod_dirs[precision], None)]
+        tccon_priors.generate_full_tccon_vmr_file(mod_files, dt.timedelta(hours=0), save_dir=vmr_dir,
+                                                  std_vmr_file=test_utils.std_vmr_file,
+                                                  site_abbrevs=test_utils.test_site)
+        vmr_dirs[precision] = vmr_dir
+
+    mod_diffs = compare_output_dirs(mod_dirs['double'], mod_dirs['single'], 'mod')
+    vmr_diffs = compare_output_dirs(vmr_dirs['double'], vmr_dirs['single'], 'vmr')
+    return mod_diffs, vmr_diffs
+
+
+def print_max_differences(summary, title):
+    """Print a table of the maximum differences in a summary from :func:`summarize_max_differences`
+
+    :param summary: the differences summary
+    :type summary: dict
+
+    :param title: a title to print above the table
+    :type title: str
+    """
+    print(title)
+    print('{:<10s} {:<25s} {:>12s} {:>12s}'.format('Category', 'Variable', 'Max abs.', 'Max rel.'))
+    for category, cat_diffs in summary.items():
+        for varname, (abs_diff, rel_diff) in cat_diffs.items():
+            print('{:<10s} {:<25s} {:>12.4g} {:>12.4g}'.format(category, varname, abs_diff, rel_diff))
+    print('')
+
+
+def _read_file(filename):
+    if filename.endswith('.mod'):
+        return readers.read_mod_file(filename)
+    elif filename.endswith('.vmr'):
+        return readers.read_vmr_file(filename)
+    else:
+        ext = os.path.splitext(filename)[1]
+        raise NotImplementedError('Do not know how to read a "{}" file'.format(ext))
+
+
+def _run_driver(output_dir):
+    mod_diffs, vmr_diffs = run_precision_comparison(output_dir)
+    print_max_differences(mod_diffs, '.mod file differences (single - double precision)')
+    print_max_differences(vmr_diffs, '.vmr file differences (single - double precision)')
+
+
+def _compare_driver(double_dir, single_dir, kind):
+    diffs = compare_output_dirs(double_dir, single_dir, kind)
+    print_max_differences(diffs, '.{} file differences'.format(kind))
+
+
+def parse_args():
+    p = ArgumentParser(description='Quantify differences between single and double precision mod_maker output')
+    subp = p.add_subparsers()
+
+    runp = subp.add_parser('run')
+    runp.description = 'Run the standard test case in both precisions and compare the .mod and .vmr files'
+    runp.add_argument('--output-dir', default=_precision_output_dir,
+                      help='Where to write the test output. Default is %(default)s.')
+    runp.set_defaults(driver_fxn=_run_driver)
+
+    compp = subp.add_parser('compare')
+    compp.description = 'Compare two existing sets of .mod or .vmr files'
+    compp.add_argument('double_dir', help='Directory with the reference (double precision) output')
+    compp.add_argument('single_dir', help='Directory with the single precision output')
+    compp.add_argument('--kind', choices=('mod', 'vmr'), default='mod', help='Which type of file to compare.')
+    compp.set_defaults(driver_fxn=_compare_driver)
+
+    return vars(p.parse_args())
+
+
+def main():
+    cl_args = parse_args()
+    driver_fxn = cl_args.pop('driver_fxn')
+    driver_fxn(**cl_args)
+
+
+if __name__ == '__main__':
+    main()
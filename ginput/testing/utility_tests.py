@@ -1,12 +1,17 @@
-from datetime import datetime as dtime
+from datetime import datetime as dtime, timedelta
 from itertools import product
 import netCDF4 as ncdf
 import numpy as np
 import os
+from scipy.interpolate import RectBivariateSpline
+import shutil
+import tempfile
+from types import SimpleNamespace
 import unittest
 
-from ..common_utils import mod_utils
+from ..common_utils import ioutils, mod_utils, readers, writers
 from ..mod_maker import mod_maker, tccon_sites
+from ..priors import acos_interface, tccon_priors
 
 from . import test_utils
 
@@ -77,6 +82,320 @@ class TestGinputUtils(unittest.TestCase):
                 th_chk = mod_utils.calculate_potential_temperature(p, t)
                 self.assertLess(abs(theta - th_chk), 0.01)
 
+    def test_age_of_air_multiple_tropopauses(self):
+        # Points from several profiles at once, each with its own tropopause, must give the same ages as one profile at
+        # a time
+        z = np.tile(np.arange(0.0, 30.0, 2.5), (3, 1))
+        lat = np.array([[-30.0], [10.0], [55.0]]) + np.zeros_like(z)
+        ztrop = np.array([[16.0], [17.5], [11.0]]) + np.zeros_like(z)
+        aoa = mod_utils.age_of_air(lat=lat.ravel(), z=z.ravel(), ztrop=ztrop.ravel())
+        for i in range(z.shape[0]):
+            with self.subTest(profile=i):
+                aoa_chk = mod_utils.age_of_air(lat=lat[i, 0], z=z[i], ztrop=ztrop[i, 0])
+                np.testing.assert_allclose(aoa.reshape(z.shape)[i], aoa_chk, rtol=1e-12)
+
+    def test_interp_to_zgrid_stacked(self):
+        # Regridding a stack of profiles must match regridding each one, and gases are held constant outside the profile
+        # when requested while the met variables are extrapolated
+        z = np.array([[0.5, 1.0, 2.0, 4.0, 8.0], [0.2, 1.5, 3.0, 6.0, 9.0]])
+        zgrid = np.array([0.0, 1.0, 2.5, 5.0, 10.0])
+        stack = {'Height': z, 'Temp': 290.0 - 6.5 * z, 'co2': 400.0 + z ** 2}
+        regridded = mod_utils.interp_to_zgrid({k: v.copy() for k, v in stack.items()}, zgrid, gas_extrap_method='const')
+        for i in range(z.shape[0]):
+            single = mod_utils.interp_to_zgrid({k: v[i].copy() for k, v in stack.items()}, zgrid,
+                                               gas_extrap_method='const')
+            with self.subTest(profile=i):
+                for key, value in single.items():
+                    np.testing.assert_array_equal(regridded[key][i], value)
+                np.testing.assert_allclose(single['Temp'], 290.0 - 6.5 * zgrid)
+                self.assertEqual(single['co2'][0], stack['co2'][i, 0])
+                self.assertEqual(single['co2'][-1], stack['co2'][i, -1])
+
+    def test_eqlat_table_matches_spline(self):
+        # The vectorized evaluation of the eq. lat. tables must give the same values as the linear FITPACK spline they
+        # come from, including on the grid edges and outside the grid (where the spline holds the edge values)
+        pv_grid = np.array([-50.0, -10.0, -2.0, 0.0, 1.5, 4.0, 20.0, 60.0])
+        theta_grid = np.array([300.0, 350.0, 400.0, 500.0, 700.0, 1000.0])
+        el_grid = 90 * np.tanh(pv_grid[:, np.newaxis] / 10) * (theta_grid[np.newaxis, :] / 1000) ** 0.5
+        spline = RectBivariateSpline(pv_grid, theta_grid, el_grid, kx=1, ky=1)
+        # Mimic the interp2d interpolators, whose tck includes the spline degrees
+        table = acos_interface._eqlat_table(SimpleNamespace(tck=tuple(spline.tck) + tuple(spline.degrees)))
+
+        rng = np.random.RandomState(49)
+        off_grid = (rng.uniform(-45.0, 55.0, 100), rng.uniform(310.0, 990.0, 100))
+        pv_edges, theta_edges = np.meshgrid(pv_grid, theta_grid[[0, -1]])
+        on_edges = (np.concatenate([pv_edges.ravel(), np.tile(pv_grid[[0, -1]], theta_grid.size)]),
+                    np.concatenate([theta_edges.ravel(), np.repeat(theta_grid, 2)]))
+        outside = (np.array([-80.0, 100.0, 0.5, 0.5, -80.0, 100.0]),
+                   np.array([500.0, 500.0, 250.0, 1200.0, 250.0, 1200.0]))
+        for name, (pv, theta) in [('off_grid', off_grid), ('on_edges', on_edges), ('outside', outside)]:
+            with self.subTest(points=name):
+                np.testing.assert_array_equal(acos_interface._eval_eqlat_table(pv, theta, *table), spline.ev(pv, theta))
+
+    @unittest.skipUnless(os.path.exists(tccon_priors._clams_file), 'CLAMS age file not available')
+    def test_priors_batch_matches_single(self):
+        # Computing the priors for many profiles at once must give exactly the same profiles as one at a time
+        mod_files = [f for f in test_utils.iter_mod_file_pairs(test_utils.mod_input_dir, None)]
+        ch4_record = tccon_priors.CH4TropicsRecord()
+        records = [tccon_priors.CO2TropicsRecord(), tccon_priors.N2OTropicsRecord(), ch4_record,
+                   tccon_priors.HFTropicsRecord(ch4_record=ch4_record), tccon_priors.CORecord()]
+        records += [tccon_priors.MidlatTraceGasRecord(gas, vmr_file=test_utils.std_vmr_file) for gas in ('o3', 'no2')]
+        zgrid = np.arange(0.0, 70.5, 1.0)
+
+        for kwargs in (dict(), dict(zgrid=zgrid, use_eqlat_trop=False)):
+            batch_profiles, _, batch_constants = tccon_priors.generate_tccon_priors_batch(
+                mod_files, timedelta(0), records, **kwargs
+            )
+            for record in records:
+                record_profiles = tccon_priors.generate_tccon_priors_for_profiles(mod_files, timedelta(0), record,
+                                                                                  **kwargs)
+                for i, mod_file in enumerate(mod_files):
+                    single_profiles, _, single_constants = tccon_priors.generate_single_tccon_prior(
+                        mod_file, timedelta(0), record, **kwargs
+                    )
+                    with self.subTest(gas=record.gas_name, mod_file=os.path.basename(mod_file), **kwargs):
+                        np.testing.assert_array_equal(batch_profiles[record.gas_name][i],
+                                                      single_profiles[record.gas_name])
+                        # The secondary gases do not return the debugging profiles (see generate_midlat_tccon_priors)
+                        if not isinstance(record, tccon_priors.MidlatTraceGasRecord):
+                            self.assertEqual(record_profiles[i][0].keys(), single_profiles.keys())
+                        for key, value in record_profiles[i][0].items():
+                            if key == 'gas_date' and kwargs.get('zgrid') is None:
+                                self.assertEqual(list(value), list(single_profiles[key]))
+                            else:
+                                np.testing.assert_array_equal(value, single_profiles[key])
+                        if record is records[0]:
+                            for key, value in single_constants.items():
+                                np.testing.assert_array_equal(batch_constants[i][key], value)
+
+    def test_site_index(self):
+        site_index = tccon_sites.TCCONSiteIndex()
+        for site, info in tccon_sites.site_dict.items():
+            for (start, end), span_info in info['time_spans'].items():
+                with self.subTest(site=site, start=start):
+                    for date in (start, start + (end - start) / 2):
+                        site_info = site_index.info_for_date(date, site_abbrv=site)
+                        self.assertEqual(site_info['lat'], span_info['lat'])
+                        self.assertEqual(site_info['lon'], span_info['lon'])
+
+        # Darwin moved on 1 Jul 2015, check that a bulk query picks up the move
+        dates = [dtime(2015, 6, 30, 21), dtime(2015, 7, 1, 0)]
+        db_infos = site_index.info_for_dates(dates, site_abbrv='db')
+        self.assertAlmostEqual(db_infos[dates[0]]['lat'], -12.424)
+        self.assertAlmostEqual(db_infos[dates[1]]['lat'], -12.4561)
+
+    def test_read_mod_files(self):
+        mod_files = [f for f in test_utils.iter_mod_file_pairs(test_utils.mod_input_dir, None)]
+        bulk_data = readers.read_mod_files(mod_files)
+        for i, mod_file in enumerate(mod_files):
+            single_data = readers.read_mod_file(mod_file)
+            with self.subTest(mod_file=os.path.basename(mod_file)):
+                for key, value in single_data['scalar'].items():
+                    self.assertEqual(bulk_data['scalar'][key][i], value)
+                for key, value in single_data['profile'].items():
+                    np.testing.assert_array_equal(bulk_data['profile'][key][i, :value.size], value)
+
+    def test_comma_separated_header_counts(self):
+        # The first line of GGG files may give the header line and column counts separated by a comma
+        mod_file = next(test_utils.iter_mod_file_pairs(test_utils.mod_input_dir, None))
+        with open(mod_file) as fobj:
+            lines = fobj.read().splitlines()
+        comma_lines = [','.join(lines[0].split())] + lines[1:]
+        expected = readers.parse_mod_lines(lines)
+        parsed = readers.parse_mod_lines(comma_lines)
+        for key, value in expected['profile'].items():
+            np.testing.assert_array_equal(parsed['profile'][key], value)
+
+    def test_read_vmr_files(self):
+        vmr_files = [f for f in test_utils.iter_vmr_file_pairs(test_utils.vmr_input_dir, None)]
+        bulk_data = readers.read_vmr_files(vmr_files)
+        for i, vmr_file in enumerate(vmr_files):
+            single_data = readers.read_vmr_file(vmr_file)
+            with self.subTest(vmr_file=os.path.basename(vmr_file)):
+                self.assertEqual(bulk_data['scalar']['ztrop_vmr'][i], single_data['scalar']['ztrop_vmr'])
+                for key, value in single_data['profile'].items():
+                    np.testing.assert_array_equal(bulk_data['profile'][key][i, :value.size], value)
+
+    def test_read_consolidated_mod_files(self):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        for mod_file in test_utils.iter_mod_file_pairs(test_utils.mod_input_dir, None):
+            with open(mod_file) as fobj:
+                mod_data = readers.parse_mod_lines(fobj.read().splitlines(), mod_file)
+            cons_path = os.path.join(tmp_dir, os.path.basename(mod_file))
+            ioutils.write_consolidated_profile(mod_utils.consolidated_file_name(cons_path),
+                                               os.path.basename(mod_file), mod_data)
+
+            text_data = readers.read_mod_file(mod_file)
+            cons_data = readers.read_mod_file(cons_path)
+            with self.subTest(mod_file=os.path.basename(mod_file)):
+                self.assertEqual(cons_data['constants'], text_data['constants'])
+                self.assertEqual(cons_data['scalar'], text_data['scalar'])
+                for key, value in text_data['profile'].items():
+                    np.testing.assert_array_equal(cons_data['profile'][key], value)
+
+    def test_read_consolidated_map_files(self):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        mod_dir = os.path.join(test_utils.mod_input_dir, 'oc', 'vertical')
+        mod_files, vmr_files = zip(*test_utils.iter_file_pairs_by_time('*.mod', mod_dir, test_utils.vmr_input_dir,
+                                                                       test_pattern='*.vmr'))
+        mod_files, vmr_files = list(mod_files), list(vmr_files)
+        # Use two sites so that the consolidated file has more than one profile along each dimension
+        sites = ['oc', 'pa']
+        cons_file = os.path.join(tmp_dir, 'consolidated.map.nc')
+        writers.write_consolidated_map_file(cons_file, vmr_files * 2, mod_files * 2,
+                                            [s for s in sites for _ in mod_files], no_cfunits=True)
+
+        for site, (mod_file, vmr_file) in product(sites, zip(mod_files, vmr_files)):
+            site_dir = os.path.join(tmp_dir, site)
+            os.makedirs(site_dir, exist_ok=True)
+            writers.write_map_from_vmr_mod(vmr_file, mod_file, site_dir, fmt='nc', site_abbrev=site, no_cfunits=True)
+            map_name = mod_utils.map_file_name_from_mod_vmr_files(site, mod_file, vmr_file, 'nc')
+            map_file = os.path.join(site_dir, map_name)
+            date = mod_utils.find_datetime_substring(os.path.basename(mod_file), dtime)
+
+            single_data = readers.read_map_file(map_file)
+            cons_data = readers.read_map_file(cons_file, site=site, date=date)
+            with self.subTest(site=site, mod_file=os.path.basename(mod_file)):
+                self.assertEqual(cons_data['constants'], single_data['constants'])
+                self.assertEqual(sorted(cons_data['profile'].keys()), sorted(single_data['profile'].keys()))
+                for key, value in single_data['profile'].items():
+                    np.testing.assert_array_equal(cons_data['profile'][key], value)
+
+    def test_profile_file_cache(self):
+        mod_file = next(test_utils.iter_mod_file_pairs(test_utils.mod_input_dir, None))
+        disk_data = readers.read_mod_file(mod_file)
+        self.assertFalse(readers.profile_file_cache_active())
+        with readers.profile_file_cache() as cache:
+            self.assertTrue(readers.profile_file_cache_active())
+            with open(mod_file) as fobj:
+                readers.cache_profile_file(mod_file, fobj.read())
+            # Modifying what one read returns must not affect the next
+            readers.read_mod_file(mod_file)['profile']['Height'][:] = -999.0
+            cached_data = readers.read_mod_file(mod_file)
+
+            # Once evicted, the file is no longer held in memory but can still be read from disk
+            readers.evict_cached_profile_file(mod_file)
+            self.assertEqual(len(cache), 0)
+            np.testing.assert_array_equal(readers.read_mod_file(mod_file)['profile']['Height'],
+                                          disk_data['profile']['Height'])
+
+        self.assertIsNone(readers._profile_file_cache)
+        self.assertEqual(cached_data['constants'], disk_data['constants'])
+        self.assertEqual(cached_data['scalar'], disk_data['scalar'])
+        for key, value in disk_data['profile'].items():
+            np.testing.assert_array_equal(cached_data['profile'][key], value)
+
+    def test_memmap_arrays(self):
+        arrays = {'data': np.arange(12.0).reshape(3, 4),
+                  'date': np.array(['2018-01-01', '2018-02-01', '2018-03-01'], dtype='datetime64[ns]')}
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            source_file = os.path.join(tmp_dir, 'source.nc')
+            open(source_file, 'w').close()
+            mmap_dir = os.path.join(tmp_dir, 'source_mmap')
+            ioutils.write_memmap_arrays(mmap_dir, arrays, source_file=source_file, dims={'data': ['date', 'x']})
+
+            mmap_arrays, metadata = ioutils.read_memmap_arrays(mmap_dir, source_file=source_file)
+            self.assertEqual(metadata, {'dims': {'data': ['date', 'x']}})
+            for key, value in arrays.items():
+                np.testing.assert_array_equal(mmap_arrays[key], value)
+                self.assertFalse(mmap_arrays[key].flags.writeable)
+
+            # A copy of a source file that has since changed must not be used
+            with open(source_file, 'w') as fobj:
+                fobj.write('changed')
+            self.assertIsNone(ioutils.read_memmap_arrays(mmap_dir, source_file=source_file)[0])
+
+            # Rewriting replaces the stale copy and leaves no temporary directories behind
+            ioutils.write_memmap_arrays(mmap_dir, {'data': arrays['data'] + 1}, source_file=source_file)
+            mmap_arrays, _ = ioutils.read_memmap_arrays(mmap_dir, source_file=source_file)
+            np.testing.assert_array_equal(mmap_arrays['data'], arrays['data'] + 1)
+            self.assertEqual(sorted(os.listdir(tmp_dir)), ['source.nc', 'source_mmap'])
+        finally:
+            shutil.rmtree(tmp_dir)
+
+    def test_output_fingerprints(self):
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            input_file = os.path.join(tmp_dir, 'input.txt')
+            output_file = os.path.join(tmp_dir, 'output.txt')
+            with open(input_file, 'w') as fobj:
+                fobj.write('original')
+            fingerprint = ioutils.make_output_fingerprint([input_file], option=1)
+            self.assertNotEqual(fingerprint, ioutils.make_output_fingerprint([input_file], option=2))
+            self.assertIsNone(ioutils.make_output_fingerprint([input_file, os.path.join(tmp_dir, 'missing.txt')]))
+
+            open(output_file, 'w').close()
+            with ioutils.OutputFingerprints() as fingerprints:
+                self.assertFalse(fingerprints.is_current(output_file, fingerprint))
+                fingerprints.record(output_file, fingerprint)
+
+            # The manifest is saved on exit, and an output is stale if forced or if its input changes
+            self.assertTrue(ioutils.OutputFingerprints().is_current(output_file, fingerprint))
+            self.assertFalse(ioutils.OutputFingerprints(force=True).is_current(output_file, fingerprint))
+            with open(input_file, 'w') as fobj:
+                fobj.write('changed!')
+            new_fingerprint = ioutils.make_output_fingerprint([input_file], option=1)
+            self.assertFalse(ioutils.OutputFingerprints().is_current(output_file, new_fingerprint))
+        finally:
+            shutil.rmtree(tmp_dir)
+
+    def test_read_geos_files_parallel(self):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        start_date, end_date = dtime(2018, 1, 1, 0), dtime(2018, 1, 1, 12)
+        self._write_fake_geos_files(tmp_dir, start_date, end_date)
+
+        # The original reader's masked arrays are the reference
+        ref_prof, ref_surf, ref_dates = mod_utils.read_geos_files(start_date, end_date, tmp_dir, ['T'], ['PS'],
+                                                                  concatenate_arrays=True)
+        nan_filled = mod_utils.read_geos_files(start_date, end_date, tmp_dir, ['T'], ['PS'], concatenate_arrays=True,
+                                               set_mask_to_nan=True)
+        parallel = [mod_utils.read_geos_files_parallel(start_date, end_date, tmp_dir, ['T'], ['PS'], nthreads=n)
+                    for n in (1, 2)]
+        for i, (prof, surf, dates) in enumerate([nan_filled] + parallel):
+            with self.subTest(i=i):
+                self.assertTrue(dates.equals(ref_dates))
+                for data, ref_data in ((prof, ref_prof), (surf, ref_surf)):
+                    self.assertEqual(sorted(data.keys()), sorted(ref_data.keys()))
+                    for key, value in ref_data.items():
+                        np.testing.assert_array_equal(data[key], value.filled(np.nan))
+
+        prof, surf, _ = mod_utils.read_geos_files_parallel(start_date, end_date, tmp_dir, ['T'], ['PS'],
+                                                           lat_lim=(-10, 10), lev_lim=(500, 1000))
+        np.testing.assert_array_equal(prof['T'], ref_prof['T'][:, :2, 1:3, :].filled(np.nan))
+        np.testing.assert_array_equal(surf['PS'], ref_surf['PS'][:, 1:3, :].filled(np.nan))
+
+        with self.assertRaises(ValueError):
+            mod_utils.read_geos_files_parallel(start_date, start_date, tmp_dir, ['T'], ['PS'])
+
+    @staticmethod
+    def _write_fake_geos_files(geos_dir, start_date, end_date):
+        lon = np.arange(-180.0, 180.0, 72.0)
+        lat = np.array([-45.0, -5.0, 5.0, 45.0])
+        lev = np.array([1000.0, 500.0, 100.0])
+        for levels, subdir in (('p', 'Np'), ('surf', 'Nx')):
+            os.makedirs(os.path.join(geos_dir, subdir))
+            file_names, file_dates = mod_utils.geosfp_file_names('fpit', 'met', levels, start_date, end_date)
+            for i, fname in enumerate(file_names):
+                with ncdf.Dataset(os.path.join(geos_dir, subdir, fname), 'w') as ds:
+                    ds.createDimension('time', 1)
+                    coords = (('lat', lat), ('lon', lon))
+                    if subdir == 'Np':
+                        coords = (('lev', lev),) + coords
+                    for name, values in coords:
+                        ds.createDimension(name, values.size)
+                        ds.createVariable(name, 'f8', (name,))[:] = values
+                    shape = (1,) + tuple(values.size for _, values in coords)
+                    varname = 'T' if subdir == 'Np' else 'PS'
+                    var = ds.createVariable(varname, 'f4', ('time',) + tuple(name for name, _ in coords),
+                                            fill_value=np.float32(1e15))
+                    data = np.arange(np.prod(shape), dtype=np.float32).reshape(shape) + 100 * i
+                    data = np.ma.masked_where(data % 7 == 0, data)
+                    var[:] = data
+
 
 class TestModMakerUtils(unittest.TestCase):
     @staticmethod